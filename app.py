@@ -1,38 +1,73 @@
-from typing import TypedDict, Annotated, Optional
-from langgraph.graph import add_messages, StateGraph, END
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, AIMessageChunk, ToolMessage, AIMessage
+from typing import TypedDict, Annotated, Optional, Literal
+from utils.startup import phase
+with phase("import_langchain"):
+    from langgraph.graph import add_messages, StateGraph, END
+    from langchain_openai import ChatOpenAI
+    from langchain_core.messages import HumanMessage, AIMessageChunk
 from dotenv import load_dotenv
-from langchain_community.tools.tavily_search import TavilySearchResults
-from fastapi import FastAPI, Query
-from fastapi.responses import StreamingResponse
-from fastapi.middleware.cors import CORSMiddleware
-import json
-from uuid import uuid4
-from langgraph.checkpoint.memory import MemorySaver
-from langchain.memory import ConversationSummaryBufferMemory
-import requests
+with phase("import_fastapi"):
+    from fastapi import FastAPI, Query, Header, HTTPException, Request
+    from fastapi.responses import StreamingResponse, Response, JSONResponse
+    from fastapi.middleware.cors import CORSMiddleware
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from utils.api_client import fetch_summary
+from utils.http_pools import http_pools
+from utils.metrics import TurnTimer, timed
+from utils.logger import get_logger, kv
+from services.lifecycle import lifespan
+from services.summary_queue import summary_queue
+from services.summary_writer import summary_writer
+from services.session_store import create_session_store
+from services.memory_manager import create_memory
+from services.summarizer import summarize_new_messages
+from services.context_builder import build_context
+from services.checkpointer import create_checkpointer
+from services.tool_executor import run_tool_calls
+from services.stream_coalescer import coalesce_content
+from services.stream_registry import stream_registry
+from services.rate_limiter import get_scheduler, INTERACTIVE
+from services.admission import admission, Rejected
+from services.worker_routing import mint_checkpoint_id, MOVED_HEADER
+from config.settings import STREAM_COALESCE_MAX_MS
+from routers.metrics_router import metrics_router
+from prompts import prompt_registry
+from services.warmup import on_warmup, warm_backend, warm_openai, dry_run, stub_chat_model
+from services import summarizer
+from tools.tavily_tool import tools
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableConfig
 import os 
 
 
 load_dotenv()
 
+log = get_logger("app")
 Backend_URL = os.getenv("Backend_URL")
-print("Backend URL:", Backend_URL)
-memory = MemorySaver()
+log.info("Backend URL: %s", Backend_URL)
+memory = create_checkpointer()
 
 class State(TypedDict):
     messages: Annotated[list, add_messages]
 
-search_tool = TavilySearchResults(max_results=4)
-tools = [search_tool]
-llm = ChatOpenAI(model="gpt-4o")
+tools_by_name = {tool.name: tool for tool in tools}
+# Retries and pacing are left to the shared rate-limit scheduler, connections to the shared "openai" pool.
+llm = ChatOpenAI(model="gpt-4o", max_retries=0, include_response_headers=True, stream_usage=True, http_async_client=http_pools.get("openai", keep_open=True))
 llm_with_tools = llm.bind_tools(tools=tools)
-
-async def model(state: State):
-    result = await llm_with_tools.ainvoke(state["messages"])
-    return {"messages": [result]}
+scheduler = get_scheduler(llm.model_name)
+
+def make_model(chat_model=None):
+    async def model(state: State, config: RunnableConfig):
+        # System prompt and summary are per-request and never written to the checkpoint.
+        options = config["configurable"]
+        messages = build_context(options.get("__system_prompt", ""), options.get("__summary", ""), state["messages"], system_tokens=options.get("__system_tokens"))
+        if chat_model is not None:
+            result = await chat_model.ainvoke(messages)
+        else:
+            result = await scheduler.run(lambda: llm_with_tools.ainvoke(messages), messages, priority=INTERACTIVE)
+        return {"messages": [result]}
+    return model
 
 async def tools_router(state: State):
     last_message = state["messages"][-1]
@@ -43,30 +78,44 @@ async def tools_router(state: State):
 
 async def tool_node(state):
     tool_calls = state["messages"][-1].tool_calls
-    tool_messages = []
-    for tool_call in tool_calls:
-        tool_name = tool_call["name"]
-        tool_args = tool_call["args"]
-        tool_id = tool_call["id"]
-        if tool_name == "tavily_search_results_json":
-            search_results = await search_tool.ainvoke(tool_args)
-            tool_message = ToolMessage(
-                content=str(search_results),
-                tool_call_id=tool_id,
-                name=tool_name
-            )
-            tool_messages.append(tool_message)
+    tool_messages = await run_tool_calls(tool_calls, tools_by_name)
     return {"messages": tool_messages}
 
-graph_builder = StateGraph(State)
-graph_builder.add_node("model", model)
-graph_builder.add_node("tool_node", tool_node)
-graph_builder.set_entry_point("model")
-graph_builder.add_conditional_edges("model", tools_router)
-graph_builder.add_edge("tool_node", "model")
-graph = graph_builder.compile(checkpointer=memory)
+def build_graph(chat_model=None, checkpointer=None):
+    graph_builder = StateGraph(State)
+    graph_builder.add_node("model", make_model(chat_model))
+    graph_builder.add_node("tool_node", tool_node)
+    graph_builder.set_entry_point("model")
+    graph_builder.add_conditional_edges("model", tools_router)
+    graph_builder.add_edge("tool_node", "model")
+    return graph_builder.compile(checkpointer=checkpointer)
+
+with phase("build_graph"):
+    graph = build_graph(checkpointer=memory)
+
+@on_warmup("backend")
+async def warm_backend_pool():
+    await warm_backend(f"{Backend_URL}/api/v1/chats")
+
+@on_warmup("openai")
+async def warm_openai_pools():
+    await warm_openai(llm, summarizer.summary_llm)
+
+@on_warmup("graph")
+async def warm_graph():
+    # The dry run skips the checkpointer so no "warmup" thread is persisted.
+    await dry_run(build_graph(stub_chat_model()))
 
-app = FastAPI()
+
+@asynccontextmanager
+async def app_lifespan(app):
+    async with lifespan(app):
+        yield
+    if hasattr(memory, "close"):
+        memory.close()
+
+
+app = FastAPI(lifespan=app_lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -84,295 +133,187 @@ def serialise_ai_message_chunk(chunk):
     else:
         raise TypeError(f"Object of type {type(chunk).__name__} is not correctly formatted for serialisation")
 
-chat_type_prompts = {
-     "executive_summary": """
-You are a highly experienced business advisor with over 50 years of expertise in helping people start and grow successful businesses.
-
-You are conducting an onboarding session with a new client who wants to start a business. Your goal is to deeply understand their business idea by asking thoughtful, one-at-a-time questions.
-
-Your behavior depends on the client's input:
-
-1. If the client answers normally:
-- Ask one question at a time.
-- Questions should sound curious, calm, and professional.
-- Your goal is to explore what type of business they want to start, their motivation, target customers, goals, and available resources.
-- Do not give suggestions or advice unless explicitly asked.
-
-2. If the client asks for help, guidance, or suggestions:
-- Provide a brief, clear, and practical suggestion based on what they’ve shared so far.
-- Then revise what you understand from their response to confirm clarity.
-- First reply to their problem or request clearly in 5 points.
-- Then ask a question to continue.
-- After that, resume onboarding with the next relevant question to gather more detail.
-
-Tone:
-- Calm, respectful, experienced, and professional.
-- Show genuine interest in their business vision.
-- Use plain language (avoid jargon or overly technical terms).
-
-Start the session like this:
-- If the user says "hello" or greets casually, reply: 
-  "Hello! Let’s get started with your executive summary."
-  Then continue with:
-  "To begin, could you please tell me a bit about the kind of business you're thinking of starting?"
-
-- Otherwise, just begin with:
-  "Thank you for connecting with me. To begin, could you please tell me a bit about the kind of business you're thinking of starting?"
-"""
-,
-
-    
-    "market_analysis": """
-You are a highly experienced market research advisor with over 50 years of expertise in helping entrepreneurs understand their target markets, analyze customer needs, and evaluate competition effectively.
-
-You are conducting a market analysis session with a new client who wants to better understand the business environment for their product or service. Your goal is to explore their understanding of the market by asking thoughtful, one-at-a-time questions.
-
-Your behavior depends on the client's input:
-
-1. If the client answers normally:
-- Ask one question at a time.
-- Questions should sound curious, calm, and professional.
-- Your goal is to explore:
-  - Who their target customers are
-  - What problems or needs the business will solve
-  - What they know about their competition
-  - Any market trends or opportunities they’ve identified
-  - How they plan to position or price their product or service
-- Do not offer suggestions or advice unless explicitly asked.
-
-2. If the client asks for help, guidance, or suggestions:
-- Provide a brief, clear, and practical response in 5 bullet points, based on what they’ve shared so far.
-- Then summarize what you understand from their response to confirm alignment.
-- After that, ask one relevant follow-up question to continue the analysis.
-
-Tone:
-- Calm, respectful, and analytical.
-- Show genuine interest in their market and business vision.
-- Use simple, clear language without technical jargon.
-
-Begin the market analysis session with this first question:
-"Thank you for joining this session. To start, could you describe who your ideal customer is and what specific need or problem your product or service will address in the market?"
-""",
-
-    "marketing_strategy": """
-You are a highly experienced marketing strategist with over 50 years of expertise in helping entrepreneurs create effective, customer-focused marketing plans.
-
-You are conducting a marketing strategy session with a client who wants to attract, engage, and convert their target customers. Your goal is to understand their current thinking and guide them through key aspects of building a strong marketing strategy by asking thoughtful, one-at-a-time questions.
-
-Your behavior depends on the client's input:
-
-1. If the client answers normally:
-- Ask one question at a time.
-- Questions should sound curious, calm, and professional.
-- Your goal is to explore:
-  - Their unique value proposition
-  - Their ideal customer profile
-  - The channels they plan to use (online/offline)
-  - Their messaging and brand positioning
-  - Any current marketing efforts or ideas they already have
-- Do not offer suggestions or advice unless explicitly asked.
-
-2. If the client asks for help, guidance, or suggestions:
-- Provide a brief, clear, and practical response in 5 bullet points, based on what they’ve shared so far.
-- Then summarize what you understand from their response to confirm alignment.
-- After that, ask one relevant follow-up question to continue the strategy session.
-
-Tone:
-- Calm, respectful, and strategic.
-- Show genuine interest in helping them reach the right audience.
-- Use plain language and avoid marketing jargon unless they are familiar with it.
-
-Begin the marketing strategy session with this first question:
-"Thanks for joining this session. To begin, how would you describe what makes your product or service different or valuable to your target customer?"
-"""
-,
-    "financial_projection": """
-You are a highly experienced financial advisor with over 50 years of expertise in helping entrepreneurs create clear and realistic financial projections for their businesses.
-
-You are conducting a financial projection session with a client who is planning or starting a business. Your goal is to understand their financial thinking and guide them through the core components of projecting income, expenses, and profitability by asking thoughtful, one-at-a-time questions.
-
-Your behavior depends on the client’s input:
-
-1. If the client answers normally:
-- Ask one question at a time.
-- Questions should sound curious, calm, and professional.
-- Your goal is to explore:
-  - Their expected sources of revenue
-  - Their pricing strategy and sales forecast
-  - Estimated fixed and variable costs
-  - Break-even point and funding needs
-  - Timeline for reaching profitability
-- Do not offer suggestions or advice unless explicitly asked.
-
-2. If the client asks for help, guidance, or suggestions:
-- Provide a brief, clear, and practical response in 5 bullet points, based on what they’ve shared so far.
-- Then summarize what you understand from their response to confirm clarity.
-- After that, ask one relevant follow-up question to continue building the projection.
-
-Tone:
-- Calm, respectful, and focused.
-- Show genuine interest in helping them create a strong financial foundation.
-- Use plain, non-technical language—avoid jargon unless they are familiar with it.
-
-Begin the financial projection session with this first question:
-"Thanks for joining. To begin, could you share what revenue streams you expect your business to have in the first year?"
-"""
-,
-    "implementation_timeline": """
-You are a highly experienced operations and execution advisor with over 50 years of expertise in helping entrepreneurs turn their business plans into clear, realistic action timelines.
-
-You are conducting an implementation timeline session with a client who wants to organize and schedule the steps required to launch and grow their business. Your goal is to understand their planned activities, sequence of tasks, and resource planning by asking thoughtful, one-at-a-time questions.
-
-Your behavior depends on the client’s input:
-
-1. If the client answers normally:
-- Ask one question at a time.
-- Questions should sound curious, calm, and professional.
-- Your goal is to explore:
-  - What key milestones they’ve identified (e.g., product development, hiring, marketing launch)
-  - How long they expect each phase to take
-  - Dependencies between tasks or activities
-  - Team roles or support needed for implementation
-  - Their overall launch or growth timeline
-- Do not offer suggestions or advice unless explicitly asked.
-
-2. If the client asks for help, guidance, or suggestions:
-- Provide a brief, clear, and practical response in 5 bullet points, based on what they’ve shared so far.
-- Then summarize what you understand from their response to confirm clarity.
-- After that, ask one relevant follow-up question to continue the planning discussion.
-
-Tone:
-- Calm, respectful, and organized.
-- Show genuine interest in helping them create a practical, achievable roadmap.
-- Use simple, action-focused language—avoid project management jargon unless they are familiar with it.
-
-Begin the implementation timeline session with this first question:
-"Thanks for being here. To begin, could you walk me through the major steps you think you'll need to take to get your business up and running?"
-"""
-
-}
 
 summary_prompt = ChatPromptTemplate.from_template(
     "You are summarizing a chat with a client. Extract only **one most important insight** in the **fewest words possible**.\n\nCurrent summary:\n{summary}\nNew lines:\n{new_lines}"
 )
 
 
-memory_store = {}
+memory_store = create_session_store()
 
 
-async def generate_chat_responses(message: str, checkpoint_id: Optional[str], clerk_id: Optional[str], project_id: Optional[str], chat_type: str):
-   # print("🔵 Incoming user message:", message)
-    is_new_conversation = checkpoint_id is None
-    system_prompt = chat_type_prompts.get(chat_type, "You are a helpful assistant.")
+async def chat_events(message: str, checkpoint_id: str, clerk_id: Optional[str], project_id: Optional[str], chat_type: str, is_new_conversation: bool = False, moved: bool = False):
+    log.debug("🔵 Incoming user message", extra=kv(checkpoint_id=checkpoint_id, chars=len(message)))
+    prompt = prompt_registry.get(chat_type)
     summary_text = ""
+    timer = TurnTimer()
 
-    if checkpoint_id:
-        summary_url = f"{Backend_URL}/api/v1/chats/{clerk_id}/{project_id}/{chat_type}"
+    if not is_new_conversation:
+        with timer.span("fetch_summary"):
+            summary_text = await fetch_summary(clerk_id, project_id, chat_type, base_url=f"{Backend_URL}/api/v1/chats")
+        if summary_text:
+            log.info("📥 Retrieved summary for reload", extra=kv(checkpoint_id=checkpoint_id, chars=len(summary_text)))
+        else:
+            log.info("⚠️ No summary found.", extra=kv(checkpoint_id=checkpoint_id))
 
-        try:
-            res = requests.get(summary_url)
-            if res.status_code == 200:
-                summary_data = res.json()
-                summary_text = summary_data.get("content", "")
-                print("📥 Retrieved summary for reload:", summary_text)
-            else:
-                print("⚠️ No summary found. Status:", res.status_code)
-        except Exception as e:
-            print("❌ Error fetching summary:", e)
 
-
-    initial_messages = [HumanMessage(role="system", content=system_prompt)]
-    if summary_text:
-        initial_messages.append(HumanMessage(role="system", content=f"Previous conversation summary: {summary_text}"))
-    initial_messages.append(HumanMessage(content=message))
+    initial_messages = [HumanMessage(content=message)]
 
     if is_new_conversation:
-        checkpoint_id = str(uuid4())
-       # print("🆕 New conversation. Assigned checkpoint_id:", checkpoint_id)
-        yield f"data: {json.dumps({'type': 'checkpoint', 'checkpoint_id': checkpoint_id})}\n\n"
-    else:
-        print("🟢 Resuming conversation with checkpoint_id:", checkpoint_id)
-
-    config = {"configurable": {"thread_id": checkpoint_id}}
-
-    if checkpoint_id not in memory_store:
-       # print("📦 Creating new memory for checkpoint:", checkpoint_id)
-        memory_store[checkpoint_id] = ConversationSummaryBufferMemory(
-            llm=llm,
-            max_token_limit=1000,
-            return_messages=True,
-            memory_key="chat_history",
-            prompt=summary_prompt
-        )
+        log.info("🆕 New conversation", extra=kv(checkpoint_id=checkpoint_id))
+        yield {"type": "checkpoint", "checkpoint_id": checkpoint_id}
     else:
-        print("📥 Loaded existing memory for checkpoint:", checkpoint_id)
+        log.info("🟢 Resuming conversation", extra=kv(checkpoint_id=checkpoint_id))
+
+    # "__" keys are not copied into checkpoint metadata, so the prompt and summary are not persisted.
+    config = {"configurable": {"thread_id": checkpoint_id, "__system_prompt": prompt.text, "__system_tokens": prompt.tokens, "__summary": summary_text}}
+
+    if moved:
+        # Turns served elsewhere are only in the backend summary; rebuild from it.
+        log.info("🔀 Thread moved back, dropping stale session", extra=kv(checkpoint_id=checkpoint_id))
+        memory_store.discard(checkpoint_id)
+        await graph.checkpointer.adelete_thread(checkpoint_id)
+
+    if checkpoint_id in memory_store:
+        log.debug("📥 Loaded existing memory", extra=kv(checkpoint_id=checkpoint_id))
+
+    def new_memory():
+        # Sessions evicted from the store come back seeded with the persisted summary.
+        memory = create_memory(prompt=summary_prompt)
+        memory.moving_summary_buffer = summary_text
+        return memory
 
-    memory = memory_store[checkpoint_id]
+    memory = memory_store.get_or_create(checkpoint_id, new_memory)
 
-   # print("⚙️ Starting LangGraph stream...")
     events = graph.astream_events({"messages": initial_messages}, version="v2", config=config)
 
     ai_response = ""
     streamed = False
+    graph_started = False
+    search_cache_hits = {}
+    debug = log.isEnabledFor(logging.DEBUG)
+
+    try:
+        async for event in events:
+            event_type = event["event"]
+            if debug:
+                log.debug("📡 Received event", extra=kv("stream_event", checkpoint_id=checkpoint_id, event=event_type))
+            if not graph_started:
+                graph_started = True
+                timer.mark("graph_start")
+
+            if event_type == "on_chat_model_stream":
+                if not streamed:
+                    streamed = True
+                    timer.mark("first_token")
+                chunk_content = serialise_ai_message_chunk(event["data"]["chunk"])
+                ai_response += chunk_content
+                yield {"type": "content", "content": chunk_content}
+
+            elif event_type == "on_chat_model_start":
+                timer.start(event["run_id"], "model")
+
+            elif event_type == "on_chat_model_end":
+                timer.end(event["run_id"])
+                timer.usage(getattr(event["data"].get("output"), "usage_metadata", None))
+                tool_calls = getattr(event["data"]["output"], "tool_calls", [])
+                search_calls = [call for call in tool_calls if call["name"] == "tavily_search_results_json"]
+                if search_calls:
+                    search_query = search_calls[0]["args"].get("query", "")
+                    log.info("🔍 Search tool used", extra=kv(checkpoint_id=checkpoint_id, query=search_query))
+                    yield {"type": "search_start", "query": search_query}
+
+            elif event_type == "on_tool_start":
+                timer.start(event["run_id"], "tool")
+
+            elif event_type == "on_custom_event" and event["name"] == "search_cache":
+                search_cache_hits[event["run_id"]] = event["data"]["cached"]
+
+            elif event_type == "on_tool_end":
+                timer.end(event["run_id"])
+                if event["name"] == "tavily_search_results_json":
+                    output = event["data"]["output"]
+                    cached = search_cache_hits.pop(event["run_id"], False)
+                    if isinstance(output, list):
+                        urls = [item["url"] for item in output if isinstance(item, dict) and "url" in item]
+                        log.debug("🔗 Search results", extra=kv(checkpoint_id=checkpoint_id, urls=urls, cached=cached))
+                        yield {"type": "search_results", "urls": urls, "cached": cached}
+    except (asyncio.CancelledError, GeneratorExit):
+        log.warning("⏱️ Turn cancelled", extra=kv(checkpoint_id=checkpoint_id, spans=timer.finish("cancelled")))
+        raise
+    except Exception:
+        log.exception("⏱️ Turn failed", extra=kv(checkpoint_id=checkpoint_id, spans=timer.finish("error")))
+        raise
 
-    async for event in events:
-        event_type = event["event"]
-       # print("📡 Received event:", event_type)
-
-        if event_type == "on_chat_model_stream":
-            streamed = True
-            chunk_content = serialise_ai_message_chunk(event["data"]["chunk"])
-            ai_response += chunk_content
-            yield f"data: {json.dumps({'type': 'content', 'content': chunk_content})}\n\n"
-
-        elif event_type == "on_chat_model_end":
-           # print("✅ Finished AI generation")
-            tool_calls = getattr(event["data"]["output"], "tool_calls", [])
-            search_calls = [call for call in tool_calls if call["name"] == "tavily_search_results_json"]
-            if search_calls:
-                search_query = search_calls[0]["args"].get("query", "")
-               # print("🔍 Search tool used for query:", search_query)
-                yield f"data: {json.dumps({'type': 'search_start', 'query': search_query})}\n\n"
-
-        elif event_type == "on_tool_end" and event["name"] == "tavily_search_results_json":
-            output = event["data"]["output"]
-            if isinstance(output, list):
-                urls = [item["url"] for item in output if isinstance(item, dict) and "url" in item]
-               # print("🔗 Search results URLs:", urls)
-                yield f"data: {json.dumps({'type': 'search_results', 'urls': urls})}\n\n"
-
-   # print("🧠 Updating memory with user + AI messages")
     memory.chat_memory.add_user_message(message)
     memory.chat_memory.add_ai_message(ai_response)
-   # print("🧠 Total messages in memory:", len(memory.chat_memory.messages))
+    memory_store.resize(checkpoint_id)
 
-    try:
-        summary = memory.predict_new_summary(memory.chat_memory.messages, memory.moving_summary_buffer)
-        memory.moving_summary_buffer = summary
-        print("📘 Summary generated:\n", summary)
-    except Exception as e:
-        summary = ""
-        print("❌ Error generating summary:", e)
+    async def update_summary():
+        try:
+            with timed("summarize"):
+                summary = await summarize_new_messages(memory)
+            log.debug("📘 Summary generated", extra=kv(checkpoint_id=checkpoint_id, summary=summary))
+        except Exception as e:
+            log.error("❌ Error generating summary: %s", e, extra=kv(checkpoint_id=checkpoint_id))
+            return
 
-    payload = {"content": summary}
-    put_url = f"{Backend_URL}/api/v1/chats/save-type-summary/{clerk_id}/{project_id}/{chat_type}"
+        # Buffered and flushed to the node backend in batches; only the newest summary per key is sent.
+        summary_writer.submit(clerk_id, project_id, chat_type, summary, base_url=f"{Backend_URL}/api/v1/chats")
 
-    print("📤 Sending PUT request to node backend to update type summarised data...")
-    try:
-        response = requests.put(put_url, json=payload)
-        print("✅ PUT response:", response.status_code, response.text)
-    except Exception as e:
-        print("❌ Failed to send to node backend to update type summarised data:", e)
+    # Summary generation and persistence run after "end" is sent.
+    await summary_queue.submit((clerk_id, project_id, chat_type), update_summary)
+
+    log.info("⏱️ Turn finished", extra=kv(checkpoint_id=checkpoint_id, spans=timer.finish(), tokens=timer.tokens()))
+    yield {"type": "end"}
 
-    yield f"data: {json.dumps({'type': 'end'})}\n\n"
+
+def start_chat_turn(message: str, checkpoint_id: Optional[str], clerk_id: Optional[str], project_id: Optional[str], chat_type: str, coalesce_ms: int = 0, on_disconnect: Optional[str] = None, on_done=None, moved: bool = False):
+    is_new_conversation = checkpoint_id is None
+    checkpoint_id = checkpoint_id or mint_checkpoint_id()
+    events = chat_events(message, checkpoint_id, clerk_id, project_id, chat_type, is_new_conversation, moved)
+    if coalesce_ms > 0:
+        events = coalesce_content(events, min(coalesce_ms, STREAM_COALESCE_MAX_MS) / 1000)
+    # The turn runs detached from the response; a reconnect can pick it up via Last-Event-ID.
+    return stream_registry.start(checkpoint_id, events, on_disconnect, on_done)
 
 
 @app.get("/chat_stream")
-async def chat_stream(message: str = Query(...), checkpoint_id: Optional[str] = Query(None), clerk_id: str = Query(...), project_id: str = Query(...), chat_type: str = Query(...)):
-    return StreamingResponse(
-        generate_chat_responses(message, checkpoint_id, clerk_id, project_id, chat_type),
-        media_type="text/event-stream"
-    )
+async def chat_stream(request: Request, message: str = Query(...), checkpoint_id: Optional[str] = Query(None), clerk_id: str = Query(...), project_id: str = Query(...), chat_type: str = Query(...), coalesce_ms: int = Query(0, ge=0), on_disconnect: Optional[Literal["finish", "cancel"]] = Query(None), last_event_id: Optional[str] = Header(None), thread_moved: Optional[str] = Header(None, alias=MOVED_HEADER)):
+    if last_event_id:
+        frames = stream_registry.resume(last_event_id)
+        if frames is None:
+            # 204 tells EventSource to stop reconnecting: the turn is gone, or the client has all of it.
+            return Response(status_code=204)
+        return StreamingResponse(frames, media_type="text/event-stream")
+    if checkpoint_id and not stream_registry.reserve(checkpoint_id):
+        raise HTTPException(status_code=409, detail="A turn is already running for this checkpoint_id")
+
+    try:
+        try:
+            ticket = await admission.acquire(clerk_id, project_id)
+        except Rejected as e:
+            return JSONResponse({"detail": "Too many requests", "reason": e.reason}, status_code=429, headers={"Retry-After": str(e.retry_after)})
+        if await request.is_disconnected():
+            admission.release(ticket)
+            return Response(status_code=499)
+
+        stream = start_chat_turn(message, checkpoint_id, clerk_id, project_id, chat_type, coalesce_ms, on_disconnect, on_done=lambda: admission.release(ticket), moved=thread_moved is not None)
+    finally:
+        # Once started, the running turn itself keeps other requests out.
+        if checkpoint_id:
+            stream_registry.unreserve(checkpoint_id)
+    return StreamingResponse(stream.subscribe(), media_type="text/event-stream")
+
+
+@app.post("/chat_stream/{checkpoint_id}/cancel")
+async def cancel_chat(checkpoint_id: str):
+    if not stream_registry.cancel(checkpoint_id):
+        raise HTTPException(status_code=404, detail="No running turn for this checkpoint_id")
+    return {"status": "cancelled", "checkpoint_id": checkpoint_id}
+
+
+app.include_router(metrics_router)
 
 
 @app.get("/health")
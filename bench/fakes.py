@@ -0,0 +1,140 @@
+"""Deterministic stand-ins for OpenAI, Tavily and the Node summary backend.
+
+Nothing here talks to the network, so the benchmark measures only our own
+streaming, memory and persistence overhead.
+"""
+import asyncio
+import hashlib
+import json
+from typing import Any, Optional
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from langchain_community.utilities.tavily_search import TavilySearchAPIWrapper
+from langchain_core.language_models.chat_models import BaseChatModel, agenerate_from_stream
+from langchain_core.messages import AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGenerationChunk
+
+WORDS = (
+    "that sounds like a promising idea could you tell me more about who your "
+    "customers are what they need and how you plan to reach them in the first year"
+).split()
+
+
+def _seed(text: str) -> int:
+    return int(hashlib.sha1(text.encode()).hexdigest()[:8], 16)
+
+
+def _usage(messages, output_tokens: int) -> dict:
+    input_tokens = sum(len(str(m.content)) for m in messages) // 4 + 1
+    return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+
+class FakeStreamingChatModel(BaseChatModel):
+    """Streams a deterministic reply token by token at `tokens_per_second`.
+
+    When the last message is from the user, `tool_call_rate` of the turns
+    (chosen by hashing the message) answer with a Tavily tool call instead.
+    """
+
+    tokens_per_second: float = 50.0
+    reply_tokens: int = 60
+    tool_call_rate: float = 0.0
+    first_token_delay: float = 0.2
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise NotImplementedError("FakeStreamingChatModel is async only")
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        return await agenerate_from_stream(self._astream(messages, stop, run_manager, **kwargs))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        last = messages[-1]
+        seed = _seed(str(last.content))
+        await asyncio.sleep(self.first_token_delay)
+
+        if isinstance(last, HumanMessage) and (seed % 1000) < self.tool_call_rate * 1000:
+            query = " ".join(WORDS[seed % 10: seed % 10 + 4])
+            yield ChatGenerationChunk(message=AIMessageChunk(
+                content="",
+                tool_call_chunks=[{
+                    "name": "tavily_search_results_json",
+                    "args": json.dumps({"query": query}),
+                    "id": f"call_{seed}",
+                    "index": 0,
+                }],
+                usage_metadata=_usage(messages, 1),
+            ))
+            return
+
+        interval = 1 / self.tokens_per_second if self.tokens_per_second else 0
+        for i in range(self.reply_tokens):
+            token = WORDS[(seed + i) % len(WORDS)] + " "
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+            if interval:
+                await asyncio.sleep(interval)
+        # Like OpenAI with stream_usage=True, usage arrives in a final empty chunk.
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=_usage(messages, self.reply_tokens)))
+
+
+class FakeTavilySearchAPIWrapper(TavilySearchAPIWrapper):
+    latency: float = 0.5
+    calls: int = 0
+
+    async def raw_results_async(self, query: str, max_results: Optional[int] = 5, *args, **kwargs) -> dict:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return {
+            "query": query,
+            "results": [
+                {"title": f"Result {i} for {query}", "url": f"https://example.com/{i}/{_seed(query)}", "content": "lorem ipsum", "score": 1 - i / 10}
+                for i in range(max_results or 5)
+            ],
+        }
+
+
+def create_fake_backend(latency: float = 0.01) -> FastAPI:
+    """Node summary backend stand-in with the same routes as the real one."""
+    backend = FastAPI()
+    summaries = {}
+    backend.state.summaries = summaries
+    backend.state.requests = 0
+
+    @backend.get("/api/v1/chats/{clerk_id}/{project_id}/{chat_type}")
+    async def get_summary(clerk_id: str, project_id: str, chat_type: str):
+        backend.state.requests += 1
+        await asyncio.sleep(latency)
+        key = (clerk_id, project_id, chat_type)
+        if key not in summaries:
+            return JSONResponse({"message": "not found"}, status_code=404)
+        return {"content": summaries[key]}
+
+    @backend.put("/api/v1/chats/save-type-summary/{clerk_id}/{project_id}/{chat_type}")
+    async def put_summary(clerk_id: str, project_id: str, chat_type: str, request: Request):
+        backend.state.requests += 1
+        await asyncio.sleep(latency)
+        summaries[(clerk_id, project_id, chat_type)] = (await request.json())["content"]
+        return {"ok": True}
+
+    @backend.post("/api/v1/chats/save-type-summaries")
+    async def put_summaries(request: Request):
+        backend.state.requests += 1
+        await asyncio.sleep(latency)
+        for item in (await request.json())["summaries"]:
+            summaries[(item["clerk_id"], item["project_id"], item["chat_type"])] = item["content"]
+        return {"ok": True}
+
+    @backend.get("/stats")
+    async def stats():
+        return {"requests": backend.state.requests, "summaries": len(summaries)}
+
+    return backend
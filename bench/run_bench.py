@@ -0,0 +1,255 @@
+"""Offline load test for the chat streaming endpoints.
+
+Starts the fake summary backend and the target app (app.py or main.py) with
+the fakes from bench/fakes.py patched in, drives N concurrent SSE clients
+through several turns each and writes a JSON report:
+
+    python -m bench.run_bench --target both --clients 50 --turns 5
+    python -m bench.run_bench --compare bench/results/old.json bench/results/new.json
+
+Reported per target: p50/p95/p99 time to first token, inter-chunk gap and
+total turn latency (ms), event-loop lag (ms) and RSS growth per 1k turns.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "bench", "results")
+CHAT_TYPES = ["executive_summary", "market_analysis", "marketing_strategy", "financial_projection", "implementation_timeline"]
+
+
+def percentiles(values):
+    if not values:
+        return {"count": 0}
+    values = sorted(values)
+
+    def pick(p):
+        return round(values[min(len(values) - 1, int(p / 100 * len(values)))] * 1000, 2)
+
+    return {"count": len(values), "p50": pick(50), "p95": pick(95), "p99": pick(99), "max": round(values[-1] * 1000, 2)}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def git_sha() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def start_server(*args):
+    return subprocess.Popen([sys.executable, "-m", "bench.serve", *args], cwd=ROOT)
+
+
+async def wait_until_up(client, url, proc, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with code {proc.returncode}")
+        try:
+            await client.get(url)
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up in {timeout}s")
+
+
+def stop_server(proc):
+    proc.terminate()
+    try:
+        proc.wait(15)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+class Recorder:
+    def __init__(self):
+        self.ttft = []
+        self.gaps = []
+        self.totals = []
+        self.errors = 0
+        self.turns = 0
+
+
+async def run_turn(client, base_url, params, rec):
+    start = time.perf_counter()
+    first = last = None
+    checkpoint_id = None
+    async with client.stream("GET", f"{base_url}/chat_stream", params=params) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            now = time.perf_counter()
+            event = json.loads(line[5:])
+            kind = event.get("type")
+            if kind == "checkpoint":
+                checkpoint_id = event["checkpoint_id"]
+            elif kind == "content":
+                if first is None:
+                    first = now
+                else:
+                    rec.gaps.append(now - last)
+                last = now
+            elif kind == "end":
+                break
+    rec.totals.append(time.perf_counter() - start)
+    if first is not None:
+        rec.ttft.append(first - start)
+    rec.turns += 1
+    return checkpoint_id
+
+
+async def run_client(client, base_url, client_id, turns, rec, coalesce_ms=0):
+    checkpoint_id = None
+    for turn in range(turns):
+        params = {
+            "message": f"client {client_id} turn {turn}: I want to open a coffee shop near campus",
+            "clerk_id": f"clerk-{client_id}",
+            "project_id": f"project-{client_id}",
+            "chat_type": CHAT_TYPES[client_id % len(CHAT_TYPES)],
+        }
+        if checkpoint_id:
+            params["checkpoint_id"] = checkpoint_id
+        if coalesce_ms:
+            params["coalesce_ms"] = coalesce_ms
+        try:
+            checkpoint_id = await run_turn(client, base_url, params, rec) or checkpoint_id
+        except (httpx.HTTPError, json.JSONDecodeError) as e:
+            rec.errors += 1
+            print(f"⚠️ client {client_id} turn {turn} failed: {e!r}")
+
+
+async def bench_target(target, args):
+    backend_port, app_port = free_port(), free_port()
+    backend_url = f"http://127.0.0.1:{backend_port}"
+    base_url = f"http://127.0.0.1:{app_port}"
+    backend = start_server("--fake-backend", "--port", str(backend_port), "--backend-latency", str(args.backend_latency))
+    server = start_server(
+        "--target", target,
+        "--port", str(app_port),
+        "--backend-url", backend_url,
+        "--tokens-per-second", str(args.tokens_per_second),
+        "--reply-tokens", str(args.reply_tokens),
+        "--first-token-delay", str(args.first_token_delay),
+        "--tool-call-rate", str(args.tool_call_rate),
+        "--search-latency", str(args.search_latency),
+    )
+    limits = httpx.Limits(max_connections=args.clients + 10, max_keepalive_connections=args.clients + 10)
+    try:
+        async with httpx.AsyncClient(timeout=httpx.Timeout(120.0), limits=limits) as client:
+            await wait_until_up(client, f"{backend_url}/stats", backend)
+            await wait_until_up(client, f"{base_url}/bench/stats", server)
+
+            if args.warmup:
+                await asyncio.gather(*(run_client(client, base_url, -1 - i, 1, Recorder()) for i in range(args.warmup)))
+
+            rss_before = (await client.post(f"{base_url}/bench/reset")).json()["rss_bytes"]
+            rec = Recorder()
+            started = time.perf_counter()
+            await asyncio.gather(*(run_client(client, base_url, i, args.turns, rec, args.coalesce_ms) for i in range(args.clients)))
+            elapsed = time.perf_counter() - started
+            # Let the summary queue and write buffer settle before sampling memory.
+            await asyncio.sleep(args.settle)
+            stats = (await client.get(f"{base_url}/bench/stats")).json()
+            backend_stats = (await client.get(f"{backend_url}/stats")).json()
+    finally:
+        stop_server(server)
+        stop_server(backend)
+
+    rss_growth = stats["rss_bytes"] - rss_before
+    return {
+        "turns": rec.turns,
+        "errors": rec.errors,
+        "elapsed_s": round(elapsed, 2),
+        "turns_per_s": round(rec.turns / elapsed, 2) if elapsed else None,
+        "ttft_ms": percentiles(rec.ttft),
+        "inter_chunk_ms": percentiles(rec.gaps),
+        "turn_latency_ms": percentiles(rec.totals),
+        "loop_lag_ms": percentiles(stats["loop_lag"]),
+        "rss_start_mb": round(rss_before / 2 ** 20, 1),
+        "rss_end_mb": round(stats["rss_bytes"] / 2 ** 20, 1),
+        "rss_growth_mb_per_1k_turns": round(rss_growth / 2 ** 20 / rec.turns * 1000, 2) if rec.turns else None,
+        "backend": backend_stats,
+    }
+
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{old['git_sha']} -> {new['git_sha']}")
+    for target in sorted(set(old["results"]) & set(new["results"])):
+        print(f"\n[{target}]")
+        a, b = old["results"][target], new["results"][target]
+        for metric in ("ttft_ms", "inter_chunk_ms", "turn_latency_ms", "loop_lag_ms"):
+            for p in ("p50", "p95", "p99"):
+                if p in a[metric] and p in b[metric]:
+                    before, after = a[metric][p], b[metric][p]
+                    change = f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+                    print(f"  {metric:<16} {p:<4} {before:>10.2f} {after:>10.2f}  {change}")
+        for metric in ("turns_per_s", "rss_growth_mb_per_1k_turns", "errors"):
+            print(f"  {metric:<21} {a.get(metric)!s:>10} {b.get(metric)!s:>10}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=["app", "main", "both"], default="both")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=3, help="sequential turns per client")
+    parser.add_argument("--warmup", type=int, default=2, help="single-turn clients run before measuring")
+    parser.add_argument("--settle", type=float, default=3.0, help="seconds to wait before sampling RSS")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--reply-tokens", type=int, default=60)
+    parser.add_argument("--first-token-delay", type=float, default=0.2)
+    parser.add_argument("--tool-call-rate", type=float, default=0.2)
+    parser.add_argument("--search-latency", type=float, default=0.5)
+    parser.add_argument("--backend-latency", type=float, default=0.01)
+    parser.add_argument("--coalesce-ms", type=int, default=0, help="coalesce_ms sent with every /chat_stream request")
+    parser.add_argument("--output", help="report path (default: bench/results/<sha>-<time>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="print deltas between two reports and exit")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    targets = ["app", "main"] if args.target == "both" else [args.target]
+    config = {k: v for k, v in vars(args).items() if k not in ("output", "compare")}
+    report = {
+        "git_sha": git_sha(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": config,
+        "results": {},
+    }
+    for target in targets:
+        print(f"🏁 Benchmarking {target} with {args.clients} clients x {args.turns} turns")
+        report["results"][target] = asyncio.run(bench_target(target, args))
+        print(json.dumps(report["results"][target], indent=2))
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['git_sha']}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print("📄 Report written to", output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Serve a chat app (or the fake backend) with the offline fakes patched in.
+
+    python -m bench.serve --target app --port 8100 --backend-url http://127.0.0.1:8200
+    python -m bench.serve --fake-backend --port 8200
+
+Started as a subprocess by bench.run_bench, one process per server, so the
+event-loop lag and RSS reported by /bench/stats belong to the app alone.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class LoopLagProbe:
+    """Measures how late a periodic sleep wakes up, i.e. how long the loop was blocked."""
+
+    def __init__(self, interval: float = 0.02):
+        self.interval = interval
+        self.samples = []
+
+    async def run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - start - self.interval))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=["app", "main"], default="app")
+    parser.add_argument("--fake-backend", action="store_true", help="serve the fake Node summary backend instead")
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--backend-url", default="http://127.0.0.1:8200")
+    parser.add_argument("--backend-latency", type=float, default=0.01)
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--reply-tokens", type=int, default=60)
+    parser.add_argument("--first-token-delay", type=float, default=0.2)
+    parser.add_argument("--tool-call-rate", type=float, default=0.2)
+    parser.add_argument("--search-latency", type=float, default=0.5)
+    return parser.parse_args(argv)
+
+
+def load_target(args):
+    data_dir = tempfile.mkdtemp(prefix="bench-")
+    os.environ.update(
+        OPENAI_API_KEY="sk-bench",
+        TAVILY_API_KEY="tvly-bench",
+        Backend_URL=args.backend_url,
+        MONGO_API_BASE=f"{args.backend_url}/api/v1/chats",
+        CHECKPOINT_DB_PATH=os.path.join(data_dir, "checkpoints.sqlite"),
+        SEARCH_CACHE_PATH="",
+    )
+    sys.path.insert(0, ROOT)
+
+    from bench.fakes import FakeStreamingChatModel, FakeTavilySearchAPIWrapper
+
+    if args.target == "app":
+        import app as module
+        engine = module
+    else:
+        import main as module
+        import services.langgraph_engine as engine
+
+    chat_model = FakeStreamingChatModel(
+        tokens_per_second=args.tokens_per_second,
+        reply_tokens=args.reply_tokens,
+        first_token_delay=args.first_token_delay,
+        tool_call_rate=args.tool_call_rate,
+    )
+    engine.llm_with_tools = chat_model
+    import services.summarizer as summarizer
+    summarizer.summary_llm = FakeStreamingChatModel(reply_tokens=8, tokens_per_second=0, first_token_delay=0.05)
+
+    from tools.tavily_tool import search_tool
+    search_tool.api_wrapper = FakeTavilySearchAPIWrapper(tavily_api_key="tvly-bench", latency=args.search_latency)
+    return module.app
+
+
+def add_stats_routes(app, probe):
+    @app.get("/bench/stats")
+    async def bench_stats():
+        return {"rss_bytes": rss_bytes(), "loop_lag": probe.samples}
+
+    @app.post("/bench/reset")
+    async def bench_reset():
+        probe.samples.clear()
+        return {"rss_bytes": rss_bytes()}
+
+
+async def serve(app, port, probe=None):
+    import uvicorn
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="on"))
+    task = asyncio.create_task(probe.run()) if probe else None
+    try:
+        await server.serve()
+    finally:
+        if task:
+            task.cancel()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.fake_backend:
+        sys.path.insert(0, ROOT)
+        from bench.fakes import create_fake_backend
+        asyncio.run(serve(create_fake_backend(args.backend_latency), args.port))
+        return
+
+    app = load_target(args)
+    probe = LoopLagProbe()
+    add_stats_routes(app, probe)
+    asyncio.run(serve(app, args.port, probe))
+
+
+if __name__ == "__main__":
+    main()
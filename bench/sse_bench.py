@@ -0,0 +1,65 @@
+"""Micro-benchmark for SSE frame encoding on a single core.
+
+    python -m bench.sse_bench --frames 200000
+
+Compares the original per-chunk f-string + json.dumps framing with
+utils/sse.SSEEncoder (which adds `id:` fields, and uses orjson when installed).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import sse
+
+TOKENS = ["Hello", " there", ",", " tell", " me", " more", " about", " your", " café", " idea", ".\n", ' "quoted"']
+
+
+def legacy(text):
+    return f"data: {json.dumps({'type': 'content', 'content': text})}\n\n"
+
+
+def run(name, encode, frames):
+    tokens = [TOKENS[i % len(TOKENS)] for i in range(frames)]
+    start = time.perf_counter()
+    total = 0
+    for text in tokens:
+        frame = encode(text)
+        # StreamingResponse encodes str chunks itself, so count that cost too.
+        if isinstance(frame, str):
+            frame = frame.encode()
+        total += len(frame)
+    elapsed = time.perf_counter() - start
+    return {
+        "encoder": name,
+        "frames_per_s": round(frames / elapsed),
+        "mb_per_s": round(total / elapsed / 2 ** 20, 1),
+        "bytes_per_frame": round(total / frames, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=200000)
+    args = parser.parse_args(argv)
+
+    encoder = sse.SSEEncoder("3f2b9c1e-8a4d-4e7b-9c55-0d1e2f3a4b5c")
+    cases = [
+        ("legacy f-string + json.dumps", legacy),
+        ("sse.SSEEncoder, content", lambda text: encoder.encode({"type": "content", "content": text})),
+        ("legacy, generic event", lambda text: f"data: {json.dumps({'type': 'search_results', 'urls': [text]})}\n\n"),
+        ("sse.SSEEncoder, generic event", lambda text: encoder.encode({"type": "search_results", "urls": [text]})),
+    ]
+    print(f"orjson: {'yes' if sse.orjson is not None else 'not installed'}")
+    baseline = None
+    for name, fn in cases:
+        result = run(name, fn, args.frames)
+        baseline = baseline or result["frames_per_s"]
+        print(f"{name:<32} {result['frames_per_s']:>10,} frames/s {result['mb_per_s']:>8} MB/s  x{result['frames_per_s'] / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    main()
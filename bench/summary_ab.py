@@ -0,0 +1,156 @@
+"""A/B comparison of summarizer models over recorded transcripts.
+
+Replays each transcript in bench/transcripts/ turn by turn through the same
+summarize_new_messages() path the app uses, once per model, and reports
+summary latency, token usage and cost:
+
+    python -m bench.summary_ab --models gpt-4o gpt-4o-mini
+    python -m bench.summary_ab --fake    # offline, tokens estimated with tiktoken
+
+A transcript is {"chat_type": ..., "messages": [{"role": "user"|"assistant", "content": ...}]}.
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRANSCRIPTS_DIR = os.path.join(ROOT, "bench", "transcripts")
+RESULTS_DIR = os.path.join(ROOT, "bench", "results")
+
+
+def load_transcripts(path):
+    transcripts = {}
+    for file in sorted(glob.glob(os.path.join(path, "*.json"))):
+        with open(file) as f:
+            transcripts[os.path.splitext(os.path.basename(file))[0]] = json.load(f)
+    return transcripts
+
+
+def turn_cost(model, prompt_tokens, completion_tokens):
+    from langchain_community.callbacks.openai_info import TokenType, get_openai_token_cost_for_model
+    try:
+        return (get_openai_token_cost_for_model(model, prompt_tokens, token_type=TokenType.PROMPT)
+                + get_openai_token_cost_for_model(model, completion_tokens, token_type=TokenType.COMPLETION))
+    except ValueError:
+        return None
+
+
+async def replay(model, transcript, llm):
+    from langchain_community.callbacks import get_openai_callback
+    from langchain_core.messages import HumanMessage, AIMessage, get_buffer_string
+    from services.memory_manager import create_memory
+    from services.summarizer import summarize_new_messages, summary_prompt
+    from utils.tokens import count_tokens
+
+    memory = create_memory(llm)
+    calls = []
+    for entry in transcript["messages"]:
+        message_cls = HumanMessage if entry["role"] == "user" else AIMessage
+        memory.chat_memory.add_message(message_cls(content=entry["content"]))
+        if entry["role"] != "assistant":
+            continue
+
+        previous = memory.moving_summary_buffer
+        new_lines = get_buffer_string(memory.chat_memory.messages[memory.summarized_count:])
+        start = time.perf_counter()
+        with get_openai_callback() as usage:
+            summary = await summarize_new_messages(memory)
+        latency = time.perf_counter() - start
+
+        prompt_tokens, completion_tokens, estimated = usage.prompt_tokens, usage.completion_tokens, False
+        if not usage.total_tokens:
+            # Fake models report no usage; count what would have been sent.
+            prompt_tokens = count_tokens(summary_prompt.format(summary=previous, new_lines=new_lines))
+            completion_tokens = count_tokens(summary)
+            estimated = True
+        calls.append({
+            "latency": latency,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "estimated": estimated,
+            "cost": turn_cost(model, prompt_tokens, completion_tokens),
+        })
+    return calls, memory.moving_summary_buffer
+
+
+def report_for(model, calls):
+    from bench.run_bench import percentiles
+    costs = [c["cost"] for c in calls if c["cost"] is not None]
+    total_cost = round(sum(costs), 6) if len(costs) == len(calls) else None
+    return {
+        "model": model,
+        "summaries": len(calls),
+        "latency_ms": percentiles([c["latency"] for c in calls]),
+        "prompt_tokens": sum(c["prompt_tokens"] for c in calls),
+        "completion_tokens": sum(c["completion_tokens"] for c in calls),
+        "tokens_estimated": any(c["estimated"] for c in calls),
+        "cost_usd": total_cost,
+        "cost_per_1k_summaries_usd": round(total_cost / len(calls) * 1000, 4) if total_cost is not None and calls else None,
+    }
+
+
+async def run(args):
+    from services.summarizer import create_summary_llm
+    transcripts = load_transcripts(args.transcripts)
+    if not transcripts:
+        raise SystemExit(f"No transcripts found in {args.transcripts}")
+
+    results, summaries = {}, {}
+    for model in args.models:
+        if args.fake:
+            from bench.fakes import FakeStreamingChatModel
+            llm = FakeStreamingChatModel(reply_tokens=12, tokens_per_second=0, first_token_delay=args.fake_latency)
+        else:
+            llm = create_summary_llm(model)
+        calls = []
+        for _ in range(args.repeat):
+            for name, transcript in transcripts.items():
+                transcript_calls, summary = await replay(model, transcript, llm)
+                calls.extend(transcript_calls)
+                summaries.setdefault(name, {})[model] = summary
+        results[model] = report_for(model, calls)
+        print(json.dumps(results[model], indent=2))
+    return results, summaries
+
+
+def parse_args(argv=None):
+    from config.settings import SUMMARY_MODEL
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", nargs="+", default=["gpt-4o", SUMMARY_MODEL])
+    parser.add_argument("--transcripts", default=TRANSCRIPTS_DIR)
+    parser.add_argument("--repeat", type=int, default=1, help="replays of every transcript per model")
+    parser.add_argument("--fake", action="store_true", help="use the fake chat model instead of OpenAI")
+    parser.add_argument("--fake-latency", type=float, default=0.05)
+    parser.add_argument("--output", help="report path (default: bench/results/summary-ab-<sha>-<time>.json)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    sys.path.insert(0, ROOT)
+    if "--fake" in (argv if argv is not None else sys.argv):
+        os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+    from bench.run_bench import git_sha
+
+    args = parse_args(argv)
+    results, summaries = asyncio.run(run(args))
+    report = {
+        "git_sha": git_sha(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "results": results,
+        "final_summaries": summaries,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"summary-ab-{report['git_sha']}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print("📄 Report written to", output)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,4 +6,148 @@ load_dotenv()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
-MONGO_API_BASE = "http://192.168.1.64:5000/api/v1/chats"
\ No newline at end of file
+MONGO_API_BASE = os.getenv("MONGO_API_BASE", "http://192.168.1.64:5000/api/v1/chats")
+
+# Node summary backend client
+BACKEND_TIMEOUT = float(os.getenv("BACKEND_TIMEOUT", "5"))
+BACKEND_CONNECT_TIMEOUT = float(os.getenv("BACKEND_CONNECT_TIMEOUT", "2"))
+BACKEND_MAX_CONNECTIONS = int(os.getenv("BACKEND_MAX_CONNECTIONS", "20"))
+BACKEND_KEEPALIVE_EXPIRY = float(os.getenv("BACKEND_KEEPALIVE_EXPIRY", "30"))
+BACKEND_MAX_CONCURRENCY = int(os.getenv("BACKEND_MAX_CONCURRENCY", "50"))
+
+# Background summarization queue
+SUMMARY_QUEUE_WORKERS = int(os.getenv("SUMMARY_QUEUE_WORKERS", "4"))
+SUMMARY_QUEUE_MAXSIZE = int(os.getenv("SUMMARY_QUEUE_MAXSIZE", "1000"))
+SUMMARY_QUEUE_DRAIN_TIMEOUT = float(os.getenv("SUMMARY_QUEUE_DRAIN_TIMEOUT", "10"))
+
+# In-process conversation memory
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "5000"))
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", str(256 * 1024 * 1024)))
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", "3600"))
+
+# Summarization
+TOKENIZER_MODEL = os.getenv("TOKENIZER_MODEL", "gpt-4o")
+SUMMARY_BUFFER_TOKEN_LIMIT = int(os.getenv("SUMMARY_BUFFER_TOKEN_LIMIT", "1000"))
+
+# Summarizer model, separate from the chat model (gpt-4o)
+SUMMARY_MODEL = os.getenv("SUMMARY_MODEL", "gpt-4o-mini")
+SUMMARY_TIMEOUT = float(os.getenv("SUMMARY_TIMEOUT", "20"))
+SUMMARY_MAX_TOKENS = int(os.getenv("SUMMARY_MAX_TOKENS", "120"))
+SUMMARY_MAX_CONCURRENCY = int(os.getenv("SUMMARY_MAX_CONCURRENCY", "4"))
+
+# Logging (LOG_FORMAT "text" or "json"; LOG_SAMPLE_RATES keeps that share of records per sampling key)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "stream_event=0.01")
+
+# SSE content coalescing (?coalesce_ms= on /chat_stream, capped at STREAM_COALESCE_MAX_MS)
+STREAM_COALESCE_MAX_MS = int(os.getenv("STREAM_COALESCE_MAX_MS", "200"))
+STREAM_COALESCE_MAX_CHARS = int(os.getenv("STREAM_COALESCE_MAX_CHARS", "512"))
+
+# JSON backend for SSE frames: "auto" uses orjson when installed, "json" forces the stdlib
+SSE_JSON_BACKEND = os.getenv("SSE_JSON_BACKEND", "auto")
+
+# Resumable streams: frames kept per turn, how long a finished turn stays
+# replayable, and how long shutdown waits for running turns
+REPLAY_BUFFER_FRAMES = int(os.getenv("REPLAY_BUFFER_FRAMES", "4096"))
+REPLAY_TTL = float(os.getenv("REPLAY_TTL", "60"))
+TURN_DRAIN_TIMEOUT = float(os.getenv("TURN_DRAIN_TIMEOUT", "30"))
+
+# What a turn does once every client has gone: "finish" keeps generating and persists
+# the result, "cancel" stops the model call after TURN_CANCEL_GRACE seconds without a reconnect
+TURN_DISCONNECT_POLICY = os.getenv("TURN_DISCONNECT_POLICY", "finish")
+TURN_CANCEL_GRACE = float(os.getenv("TURN_CANCEL_GRACE", "5"))
+
+# Admission control for /chat_stream (0 disables a cap)
+ADMISSION_MAX_INFLIGHT = int(os.getenv("ADMISSION_MAX_INFLIGHT", "100"))
+ADMISSION_MAX_PER_CLERK = int(os.getenv("ADMISSION_MAX_PER_CLERK", "4"))
+ADMISSION_MAX_PER_PROJECT = int(os.getenv("ADMISSION_MAX_PER_PROJECT", "4"))
+ADMISSION_MAX_WAITING = int(os.getenv("ADMISSION_MAX_WAITING", "200"))
+ADMISSION_WAIT_TIMEOUT = float(os.getenv("ADMISSION_WAIT_TIMEOUT", "10"))
+
+# Client-side OpenAI rate limits, shared by chat turns and summaries. OPENAI_RATE_LIMITS
+# overrides them per model as "model:rpm:tpm,..." (0 disables a bucket). The SDK's own
+# retries are off; the scheduler retries 429s and 5xx up to OPENAI_MAX_RETRIES times
+OPENAI_RPM = int(os.getenv("OPENAI_RPM", "500"))
+OPENAI_TPM = int(os.getenv("OPENAI_TPM", "30000"))
+OPENAI_RATE_LIMITS = os.getenv("OPENAI_RATE_LIMITS", "")
+OPENAI_COMPLETION_ESTIMATE = int(os.getenv("OPENAI_COMPLETION_ESTIMATE", "256"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "4"))
+OPENAI_RETRY_BASE_DELAY = float(os.getenv("OPENAI_RETRY_BASE_DELAY", "0.5"))
+
+# Shared outbound HTTP pools for OpenAI and Tavily (HTTP2 "auto" uses HTTP/2 when h2 is installed)
+HTTP2 = os.getenv("HTTP2", "auto")
+OPENAI_HTTP_MAX_CONNECTIONS = int(os.getenv("OPENAI_HTTP_MAX_CONNECTIONS", "100"))
+OPENAI_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_HTTP_KEEPALIVE_EXPIRY", "60"))
+OPENAI_HTTP_CONNECT_TIMEOUT = float(os.getenv("OPENAI_HTTP_CONNECT_TIMEOUT", "5"))
+OPENAI_HTTP_READ_TIMEOUT = float(os.getenv("OPENAI_HTTP_READ_TIMEOUT", "120"))
+TAVILY_HTTP_MAX_CONNECTIONS = int(os.getenv("TAVILY_HTTP_MAX_CONNECTIONS", "20"))
+TAVILY_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("TAVILY_HTTP_KEEPALIVE_EXPIRY", "60"))
+TAVILY_HTTP_CONNECT_TIMEOUT = float(os.getenv("TAVILY_HTTP_CONNECT_TIMEOUT", "5"))
+TAVILY_HTTP_READ_TIMEOUT = float(os.getenv("TAVILY_HTTP_READ_TIMEOUT", "15"))
+
+# Startup warm-up (connection pools and a graph dry run); each step gives up after WARMUP_TIMEOUT seconds
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() in ("1", "true", "yes")
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "10"))
+
+# Multi-worker mode (dispatcher.py). The dispatcher sets WORKER_ID/WORKER_COUNT for each
+# worker it starts; workers listen on DISPATCHER_WORKER_BASE_PORT + index
+WORKER_ID = os.getenv("WORKER_ID", "")
+WORKER_COUNT = int(os.getenv("WORKER_COUNT", "1"))
+DISPATCHER_WORKER_BASE_PORT = int(os.getenv("DISPATCHER_WORKER_BASE_PORT", "8100"))
+DISPATCHER_HEALTH_INTERVAL = float(os.getenv("DISPATCHER_HEALTH_INTERVAL", "1"))
+DISPATCHER_RESTART_BACKOFF = float(os.getenv("DISPATCHER_RESTART_BACKOFF", "1"))
+DISPATCHER_CONNECT_TIMEOUT = float(os.getenv("DISPATCHER_CONNECT_TIMEOUT", "2"))
+# Threads away from their owner whose last worker the dispatcher remembers
+DISPATCHER_MOVED_THREADS_MAX = int(os.getenv("DISPATCHER_MOVED_THREADS_MAX", "100000"))
+
+# Event-loop lag probe interval for /metrics
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.1"))
+
+# System prompts per chat_type (PROMPT_DIR defaults to prompts/templates). Files are
+# re-read when their mtime changes, checked at most every PROMPT_RELOAD_INTERVAL seconds
+PROMPT_DIR = os.getenv("PROMPT_DIR", "")
+PROMPT_RELOAD_INTERVAL = float(os.getenv("PROMPT_RELOAD_INTERVAL", "2"))
+PROMPT_MAX_TOKENS = int(os.getenv("PROMPT_MAX_TOKENS", "2000"))
+
+# Model context window
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "8000"))
+# History is trimmed in blocks of this many tokens so the cached prompt prefix stays stable
+CONTEXT_TRIM_STEP = int(os.getenv("CONTEXT_TRIM_STEP", "1024"))
+# Token counts of stored messages, cached by message id so history is not re-tokenized every call
+TOKEN_COUNT_CACHE_SIZE = int(os.getenv("TOKEN_COUNT_CACHE_SIZE", "50000"))
+
+# LangGraph checkpoints ("sqlite" or "memory")
+CHECKPOINT_BACKEND = os.getenv("CHECKPOINT_BACKEND", "sqlite")
+CHECKPOINT_DB_PATH = os.getenv("CHECKPOINT_DB_PATH", "data/checkpoints.sqlite")
+CHECKPOINT_CACHE_SIZE = int(os.getenv("CHECKPOINT_CACHE_SIZE", "1000"))
+CHECKPOINT_KEEP_LATEST = int(os.getenv("CHECKPOINT_KEEP_LATEST", "10"))
+# Threads are pruned to CHECKPOINT_KEEP_LATEST in one batch every this many checkpoint writes
+CHECKPOINT_PRUNE_EVERY = int(os.getenv("CHECKPOINT_PRUNE_EVERY", "50"))
+
+# Tool execution
+TOOL_MAX_CONCURRENCY = int(os.getenv("TOOL_MAX_CONCURRENCY", "4"))
+TOOL_CALL_TIMEOUT = float(os.getenv("TOOL_CALL_TIMEOUT", "15"))
+
+# Tavily search cache (SEARCH_CACHE_PATH empty disables the on-disk tier)
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", str(6 * 3600)))
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "2048"))
+SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", "data/search_cache.sqlite")
+# On-disk rows kept at most, and how many writes between purges of expired/excess rows
+SEARCH_CACHE_MAX_ROWS = int(os.getenv("SEARCH_CACHE_MAX_ROWS", "20000"))
+SEARCH_CACHE_PURGE_EVERY = int(os.getenv("SEARCH_CACHE_PURGE_EVERY", "500"))
+
+# Summary read-through cache
+SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", "10000"))
+SUMMARY_CACHE_TTL = float(os.getenv("SUMMARY_CACHE_TTL", "120"))
+
+# Write-behind buffer for summary PUTs (SUMMARY_BULK_PATH empty disables bulk mode)
+SUMMARY_FLUSH_INTERVAL = float(os.getenv("SUMMARY_FLUSH_INTERVAL", "2"))
+SUMMARY_FLUSH_MAX_PENDING = int(os.getenv("SUMMARY_FLUSH_MAX_PENDING", "200"))
+SUMMARY_BULK_PATH = os.getenv("SUMMARY_BULK_PATH", "")
+SUMMARY_BULK_MAX_ITEMS = int(os.getenv("SUMMARY_BULK_MAX_ITEMS", "100"))
+SUMMARY_WRITE_RETRIES = int(os.getenv("SUMMARY_WRITE_RETRIES", "3"))
+SUMMARY_RETRY_BASE_DELAY = float(os.getenv("SUMMARY_RETRY_BASE_DELAY", "0.5"))
+# Flushes a summary may fail before it is dropped (counted in summary_writes_dropped_total)
+SUMMARY_FLUSH_MAX_ATTEMPTS = int(os.getenv("SUMMARY_FLUSH_MAX_ATTEMPTS", "5"))
@@ -0,0 +1,306 @@
+"""Run N chat workers behind one port, each thread pinned to the worker that owns it.
+
+    python dispatcher.py --workers 4 --port 8000
+    python dispatcher.py --workers 2 --port 8000 --app app:app
+
+Every worker is a separate uvicorn process with its own checkpoint database,
+search cache, stream registry and admission caps (shared-nothing). Requests
+are routed by checkpoint_id (query parameter, Last-Event-ID header or the
+cancel path) with rendezvous hashing, so a thread's turns, reconnects and
+cancels all reach the process holding its state. New threads go to the
+least-busy worker, which mints a checkpoint_id it owns.
+
+A worker that exits is restarted with backoff. While it is down its threads
+fall to the next-ranked worker (which continues them from the backend
+summary) and move back once it is healthy again. The dispatcher remembers
+which worker served a thread's last turn; a turn sent anywhere else carries
+the X-Thread-Moved header, and that worker drops its cached session and
+checkpoint for the thread and rebuilds it from the backend summary.
+"""
+import argparse
+import asyncio
+import os
+import re
+import signal
+import sys
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+import httpx
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from config.settings import (
+    CHECKPOINT_DB_PATH,
+    SEARCH_CACHE_PATH,
+    DISPATCHER_WORKER_BASE_PORT,
+    DISPATCHER_HEALTH_INTERVAL,
+    DISPATCHER_RESTART_BACKOFF,
+    DISPATCHER_CONNECT_TIMEOUT,
+    DISPATCHER_MOVED_THREADS_MAX,
+)
+from routers.metrics_router import metrics_router
+from services.worker_routing import worker_ids, rank, owner, checkpoint_of, MOVED_HEADER
+from utils.logger import setup_logging, get_logger, kv
+from utils.metrics import registry
+
+log = get_logger("dispatcher")
+
+requests_total = registry.counter("dispatcher_requests_total", "Requests proxied, by worker and how they were routed (owner, fallback, new).", ("worker", "route"))
+unavailable_total = registry.counter("dispatcher_unavailable_total", "Requests rejected because no worker was up.")
+restarts_total = registry.counter("dispatcher_worker_restarts_total", "Worker processes restarted after exiting.", ("worker",))
+worker_up = registry.gauge("dispatcher_worker_up", "1 while the worker answers its health check.", ("worker",))
+moves_total = registry.counter("dispatcher_thread_moves_total", "Turns sent to a worker that did not serve the thread's previous turn.", ("worker",))
+worker_inflight = registry.gauge("dispatcher_worker_inflight", "Requests (including open streams) in flight on each worker.", ("worker",))
+
+_CANCEL_PATH = re.compile(r"^/chat_stream/([^/]+)/cancel$")
+# Per-hop headers that must not be forwarded as-is.
+_HOP_HEADERS = {"host", "connection", "keep-alive", "transfer-encoding", "te", "upgrade", "proxy-connection", "content-length"}
+
+
+def _worker_path(path: str, worker_id: str) -> str:
+    if not path:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{worker_id}{ext}"
+
+
+class Worker:
+    def __init__(self, worker_id: str, port: int):
+        self.id = worker_id
+        self.port = port
+        self.url = f"http://127.0.0.1:{port}"
+        self.process = None
+        self.up = False
+        self.inflight = 0
+
+    def set_up(self, up: bool):
+        if up != self.up:
+            log.info("🟢 Worker up" if up else "🔴 Worker down", extra=kv(worker=self.id, port=self.port))
+        self.up = up
+        worker_up.set(int(up), worker=self.id)
+
+    def track(self, delta: int):
+        self.inflight += delta
+        worker_inflight.set(self.inflight, worker=self.id)
+
+
+class Dispatcher:
+    def __init__(self, command: list, count: int, base_port: int):
+        self.command = command
+        self.workers = {wid: Worker(wid, base_port + i) for i, wid in enumerate(worker_ids(count))}
+        self.client = None
+        self._turn = 0
+        # checkpoint_id -> worker that served its last turn, for threads away from their owner.
+        self._served_by = OrderedDict()
+        self._tasks = []
+        self._stopping = False
+
+    def env(self, worker: Worker) -> dict:
+        env = dict(os.environ)
+        env.update(
+            WORKER_ID=worker.id,
+            WORKER_COUNT=str(len(self.workers)),
+            CHECKPOINT_DB_PATH=_worker_path(CHECKPOINT_DB_PATH, worker.id),
+            SEARCH_CACHE_PATH=_worker_path(SEARCH_CACHE_PATH, worker.id),
+        )
+        return env
+
+    async def supervise(self, worker: Worker):
+        """Keep one worker process running; restart it with exponential backoff when it exits."""
+        backoff = DISPATCHER_RESTART_BACKOFF
+        while not self._stopping:
+            command = [part.format(port=worker.port, worker=worker.id) for part in self.command]
+            worker.process = await asyncio.create_subprocess_exec(*command, env=self.env(worker))
+            started = time.monotonic()
+            log.info("🚀 Worker started", extra=kv(worker=worker.id, port=worker.port, pid=worker.process.pid))
+            code = await worker.process.wait()
+            worker.set_up(False)
+            if self._stopping:
+                return
+            # A worker that stayed up for a while earns a fresh backoff.
+            if time.monotonic() - started > 60:
+                backoff = DISPATCHER_RESTART_BACKOFF
+            log.warning("💥 Worker exited, restarting", extra=kv(worker=worker.id, code=code, backoff=backoff))
+            restarts_total.inc(worker=worker.id)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+    async def check_health(self):
+        while not self._stopping:
+            for worker in self.workers.values():
+                try:
+                    response = await self.client.get(f"{worker.url}/metrics", timeout=DISPATCHER_CONNECT_TIMEOUT)
+                    worker.set_up(response.status_code == 200)
+                except httpx.HTTPError:
+                    worker.set_up(False)
+            await asyncio.sleep(DISPATCHER_HEALTH_INTERVAL)
+
+    async def start(self):
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(None, connect=DISPATCHER_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=100),
+        )
+        self._tasks = [asyncio.create_task(self.supervise(w)) for w in self.workers.values()]
+        self._tasks.append(asyncio.create_task(self.check_health()))
+
+    async def stop(self, timeout: float = 30.0):
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        running = [w.process for w in self.workers.values() if w.process and w.process.returncode is None]
+        for process in running:
+            process.send_signal(signal.SIGTERM)
+        # Workers drain their own running turns on SIGTERM (TURN_DRAIN_TIMEOUT).
+        try:
+            await asyncio.wait_for(asyncio.gather(*(p.wait() for p in running)), timeout)
+        except asyncio.TimeoutError:
+            for process in running:
+                if process.returncode is None:
+                    process.kill()
+        await self.client.aclose()
+
+    def route_key(self, request: Request):
+        match = _CANCEL_PATH.match(request.url.path)
+        if match:
+            return match.group(1)
+        last_event_id = request.headers.get("last-event-id")
+        if last_event_id:
+            return checkpoint_of(last_event_id)
+        return request.query_params.get("checkpoint_id")
+
+    def candidates(self, key):
+        """Workers to try in order, and how the first one was chosen."""
+        live = [w for w in self.workers.values() if w.up]
+        if key:
+            ranked = [self.workers[wid] for wid in rank(key, self.workers)]
+            return [w for w in ranked if w.up], ("owner" if ranked[0].up else "fallback")
+        # Rotate first so idle workers take new threads in turn rather than all landing on w0.
+        self._turn += 1
+        shift = self._turn % len(live) if live else 0
+        return sorted(live[shift:] + live[:shift], key=lambda w: w.inflight), "new"
+
+    def moved(self, key: str, worker_id: str) -> bool:
+        """True when another worker served the thread's last turn, so worker_id's copy is stale."""
+        return self._served_by.get(key, owner(key, self.workers)) != worker_id
+
+    def served(self, key: str, worker_id: str):
+        if worker_id == owner(key, self.workers):
+            self._served_by.pop(key, None)
+            return
+        self._served_by[key] = worker_id
+        self._served_by.move_to_end(key)
+        # Forgetting a thread only risks one stale turn if it ever moves back.
+        while len(self._served_by) > DISPATCHER_MOVED_THREADS_MAX:
+            self._served_by.popitem(last=False)
+
+    async def proxy(self, request: Request) -> Response:
+        key = self.route_key(request)
+        workers, route = self.candidates(key)
+        # Only a new turn on an existing thread uses the worker's state for it.
+        turn = key if request.url.path == "/chat_stream" and "last-event-id" not in request.headers else None
+        headers = [(k, v) for k, v in request.headers.items() if k.lower() not in _HOP_HEADERS and k.lower() != MOVED_HEADER.lower()]
+        body = await request.body()
+        for worker in workers:
+            moved = turn is not None and self.moved(turn, worker.id)
+            upstream = self.client.build_request(
+                request.method,
+                f"{worker.url}{request.url.path}",
+                params=request.url.query,
+                headers=(headers + [(MOVED_HEADER, "1")]) if moved else headers,
+                content=body,
+            )
+            try:
+                response = await self.client.send(upstream, stream=True)
+            except httpx.ConnectError:
+                # Died since the last health check; the next-ranked worker takes it.
+                worker.set_up(False)
+                route = "fallback"
+                continue
+            requests_total.inc(worker=worker.id, route=route)
+            if turn is not None and response.status_code == 200:
+                if moved:
+                    moves_total.inc(worker=worker.id)
+                self.served(turn, worker.id)
+            worker.track(1)
+
+            async def close(response=response, worker=worker):
+                await response.aclose()
+                worker.track(-1)
+
+            return StreamingResponse(
+                response.aiter_raw(),
+                status_code=response.status_code,
+                headers={k: v for k, v in response.headers.items() if k.lower() not in _HOP_HEADERS},
+                background=BackgroundTask(close),
+            )
+        unavailable_total.inc()
+        return JSONResponse({"detail": "No worker available"}, status_code=503, headers={"Retry-After": "1"})
+
+
+def create_app(dispatcher: Dispatcher) -> FastAPI:
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        setup_logging()
+        await dispatcher.start()
+        yield
+        await dispatcher.stop()
+
+    app = FastAPI(lifespan=lifespan)
+    # The dispatcher's own metrics; each worker's are at /workers/{worker}/metrics.
+    app.include_router(metrics_router)
+
+    @app.get("/workers")
+    async def workers():
+        return [
+            {"worker": w.id, "port": w.port, "up": w.up, "inflight": w.inflight, "pid": w.process.pid if w.process else None}
+            for w in dispatcher.workers.values()
+        ]
+
+    @app.get("/workers/{worker_id}/metrics", response_class=PlainTextResponse)
+    async def worker_metrics(worker_id: str):
+        worker = dispatcher.workers.get(worker_id)
+        if worker is None:
+            return PlainTextResponse("unknown worker\n", status_code=404)
+        try:
+            response = await dispatcher.client.get(f"{worker.url}/metrics", timeout=DISPATCHER_CONNECT_TIMEOUT)
+        except httpx.HTTPError:
+            return PlainTextResponse("worker unavailable\n", status_code=503)
+        return PlainTextResponse(response.text, media_type="text/plain; version=0.0.4")
+
+    @app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "HEAD"])
+    async def forward(request: Request):
+        return await dispatcher.proxy(request)
+
+    return app
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--app", default="main:app", help="ASGI app each worker serves")
+    parser.add_argument("--base-port", type=int, default=DISPATCHER_WORKER_BASE_PORT, help="worker i listens on base-port + i")
+    parser.add_argument(
+        "--worker-cmd",
+        help="custom worker command; {port} and {worker} are filled in (default: uvicorn serving --app)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    import shlex
+    import uvicorn
+
+    args = parse_args(argv)
+    if args.worker_cmd:
+        command = shlex.split(args.worker_cmd)
+    else:
+        command = [sys.executable, "-m", "uvicorn", args.app, "--host", "127.0.0.1", "--port", "{port}"]
+    dispatcher = Dispatcher(command, args.workers, args.base_port)
+    uvicorn.run(create_app(dispatcher), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
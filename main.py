@@ -1,12 +1,18 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from routers.chat_router import chat_router
+from utils.startup import phase
+with phase("import_fastapi"):
+    from fastapi import FastAPI
+    from fastapi.middleware.cors import CORSMiddleware
+# Pulls in langchain, langgraph and the OpenAI SDK and builds the graph.
+with phase("import_engine"):
+    from routers.chat_router import chat_router
+    from routers.metrics_router import metrics_router
+    from services.lifecycle import lifespan
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -18,4 +24,5 @@ app.add_middleware(
 )
 
 
-app.include_router(chat_router)
\ No newline at end of file
+app.include_router(chat_router)
+app.include_router(metrics_router)
\ No newline at end of file
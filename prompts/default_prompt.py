@@ -1 +0,0 @@
-default_prompt = "You are a helpful assistant."
\ No newline at end of file
@@ -0,0 +1,144 @@
+import os
+import sys
+import time
+from langchain_core.messages import SystemMessage
+from config.settings import PROMPT_DIR, PROMPT_RELOAD_INTERVAL, PROMPT_MAX_TOKENS
+from utils.tokens import count_message_tokens
+from utils.metrics import registry
+from utils.logger import get_logger, kv
+
+log = get_logger("prompts")
+
+TEMPLATES_DIR = PROMPT_DIR or os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+DEFAULT = "default"
+# Chat types the frontend offers; startup fails if any of them has no prompt.
+CHAT_TYPES = ("executive_summary", "market_analysis", "marketing_strategy", "financial_projection", "implementation_timeline")
+
+
+class Prompt:
+    """One system prompt. `tokens` is its size as a system message, counted once."""
+
+    __slots__ = ("name", "text", "tokens", "mtime", "checked")
+
+    def __init__(self, name: str, text: str, mtime: float):
+        self.name = name
+        # Interned, so every turn and code path holds the same string object.
+        self.text = sys.intern(text)
+        self.tokens = count_message_tokens(SystemMessage(content=self.text))
+        self.mtime = mtime
+        self.checked = time.monotonic()
+
+
+class PromptRegistry:
+    """System prompts per chat_type, read from `<directory>/<chat_type>.txt`.
+
+    A file is read on the first request for its chat_type. Afterwards its
+    mtime is checked at most every `reload_interval` seconds and the prompt is
+    re-read when it changed, so edits apply without a restart (0 disables).
+    Only CHAT_TYPES and the files present in `directory` are looked up; any
+    other chat_type gets the "default" prompt without touching the disk.
+    """
+
+    def __init__(self, directory: str, reload_interval: float = PROMPT_RELOAD_INTERVAL):
+        self.directory = directory
+        self.reload_interval = reload_interval
+        self._prompts = {}
+        self._known = None
+        self._listed = 0.0
+        self.reloads = 0
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.txt")
+
+    def names(self) -> list:
+        return sorted(f[:-4] for f in os.listdir(self.directory) if f.endswith(".txt"))
+
+    def _is_known(self, name: str) -> bool:
+        # chat_type comes from the client: never let it name a path outside the directory.
+        if not name or "/" in name or os.sep in name or ".." in name:
+            return False
+        if name in self._prompts or name in CHAT_TYPES:
+            return True
+        now = time.monotonic()
+        if self._known is None or (self.reload_interval and now - self._listed >= self.reload_interval):
+            try:
+                self._known = frozenset(self.names())
+            except OSError:
+                self._known = frozenset()
+            self._listed = now
+        return name in self._known
+
+    def _load(self, name: str) -> Prompt:
+        path = self._path(name)
+        mtime = os.stat(path).st_mtime
+        with open(path, encoding="utf-8") as f:
+            return Prompt(name, f.read(), mtime)
+
+    def _fresh(self, prompt: Prompt) -> Prompt:
+        now = time.monotonic()
+        if not self.reload_interval or now - prompt.checked < self.reload_interval:
+            return prompt
+        prompt.checked = now
+        try:
+            if os.stat(self._path(prompt.name)).st_mtime == prompt.mtime:
+                return prompt
+            reloaded = self._load(prompt.name)
+        except (OSError, UnicodeDecodeError) as e:
+            log.warning("⚠️ Keeping previous prompt, reload failed", extra=kv(chat_type=prompt.name, error=e))
+            return prompt
+        self._prompts[prompt.name] = reloaded
+        self.reloads += 1
+        log.info("🔄 Prompt reloaded", extra=kv(chat_type=prompt.name, tokens=reloaded.tokens))
+        return reloaded
+
+    def get(self, chat_type: str) -> Prompt:
+        prompt = self._prompts.get(chat_type)
+        if prompt is not None:
+            return self._fresh(prompt)
+        if chat_type != DEFAULT and not self._is_known(chat_type):
+            return self.get(DEFAULT)
+        try:
+            prompt = self._load(chat_type)
+        except FileNotFoundError:
+            if chat_type == DEFAULT:
+                raise
+            return self.get(DEFAULT)
+        self._prompts[chat_type] = prompt
+        return prompt
+
+    def validate(self, required=CHAT_TYPES, max_tokens: int = PROMPT_MAX_TOKENS) -> dict:
+        """Load every prompt and fail loudly on a missing, empty or oversized one."""
+        names = self.names()
+        self._known, self._listed = frozenset(names), time.monotonic()
+        problems = [f"missing {name}.txt" for name in (DEFAULT, *required) if name not in names]
+        sizes = {}
+        for name in names:
+            try:
+                prompt = self._load(name)
+            except UnicodeDecodeError as e:
+                problems.append(f"{name}.txt is not UTF-8: {e}")
+                continue
+            if not prompt.text.strip():
+                problems.append(f"{name}.txt is empty")
+            elif prompt.tokens > max_tokens:
+                problems.append(f"{name}.txt is {prompt.tokens} tokens, over PROMPT_MAX_TOKENS={max_tokens}")
+            self._prompts[name] = prompt
+            sizes[name] = prompt.tokens
+        if problems:
+            raise ValueError(f"Invalid prompts in {self.directory}: " + "; ".join(problems))
+        log.info("📝 Prompts loaded", extra=kv(**sizes))
+        return sizes
+
+    def collect(self):
+        return [
+            ("prompts_loaded", "gauge", "Prompts held in the registry.", len(self._prompts)),
+            ("prompts_reloaded_total", "counter", "Prompts re-read after their file changed.", self.reloads),
+        ]
+
+
+prompt_registry = PromptRegistry(TEMPLATES_DIR)
+registry.collect(prompt_registry.collect)
+
+
+def get_prompt(chat_type: str) -> str:
+    return prompt_registry.get(chat_type).text
@@ -1,13 +1,44 @@
-from fastapi import APIRouter, Query
-from fastapi.responses import StreamingResponse
-from services.langgraph_engine import generate_chat_responses
+from typing import Optional, Literal
+from fastapi import APIRouter, Query, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse, Response, JSONResponse
+from services.langgraph_engine import start_chat_turn
+from services.admission import admission, Rejected
+from services.stream_registry import stream_registry
+from services.worker_routing import MOVED_HEADER
 
 
 chat_router = APIRouter()
 
 @chat_router.get("/chat_stream")
-async def chat_stream(message: str = Query(...), checkpoint_id: str = Query(None), clerk_id: str = Query(...), project_id: str = Query(...), chat_type: str = Query(...)):
-    return StreamingResponse(
-        generate_chat_responses(message, checkpoint_id, clerk_id, project_id, chat_type),
-        media_type="text/event-stream"
-    )
\ No newline at end of file
+async def chat_stream(request: Request, message: str = Query(...), checkpoint_id: str = Query(None), clerk_id: str = Query(...), project_id: str = Query(...), chat_type: str = Query(...), coalesce_ms: int = Query(0, ge=0), on_disconnect: Optional[Literal["finish", "cancel"]] = Query(None), last_event_id: Optional[str] = Header(None), thread_moved: Optional[str] = Header(None, alias=MOVED_HEADER)):
+    if last_event_id:
+        frames = stream_registry.resume(last_event_id)
+        if frames is None:
+            # 204 tells EventSource to stop reconnecting: the turn is gone, or the client has all of it.
+            return Response(status_code=204)
+        return StreamingResponse(frames, media_type="text/event-stream")
+    if checkpoint_id and not stream_registry.reserve(checkpoint_id):
+        raise HTTPException(status_code=409, detail="A turn is already running for this checkpoint_id")
+
+    try:
+        try:
+            ticket = await admission.acquire(clerk_id, project_id)
+        except Rejected as e:
+            return JSONResponse({"detail": "Too many requests", "reason": e.reason}, status_code=429, headers={"Retry-After": str(e.retry_after)})
+        if await request.is_disconnected():
+            admission.release(ticket)
+            return Response(status_code=499)
+
+        stream = start_chat_turn(message, checkpoint_id, clerk_id, project_id, chat_type, coalesce_ms, on_disconnect, on_done=lambda: admission.release(ticket), moved=thread_moved is not None)
+    finally:
+        # Once started, the running turn itself keeps other requests out.
+        if checkpoint_id:
+            stream_registry.unreserve(checkpoint_id)
+    return StreamingResponse(stream.subscribe(), media_type="text/event-stream")
+
+
+@chat_router.post("/chat_stream/{checkpoint_id}/cancel")
+async def cancel_chat(checkpoint_id: str):
+    if not stream_registry.cancel(checkpoint_id):
+        raise HTTPException(status_code=404, detail="No running turn for this checkpoint_id")
+    return {"status": "cancelled", "checkpoint_id": checkpoint_id}
\ No newline at end of file
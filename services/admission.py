@@ -0,0 +1,142 @@
+import asyncio
+import math
+import time
+from collections import deque
+from config.settings import (
+    ADMISSION_MAX_INFLIGHT,
+    ADMISSION_MAX_PER_CLERK,
+    ADMISSION_MAX_PER_PROJECT,
+    ADMISSION_MAX_WAITING,
+    ADMISSION_WAIT_TIMEOUT,
+)
+from utils.metrics import registry, stage_seconds
+from utils.logger import get_logger, kv
+
+log = get_logger("admission")
+rejections = registry.counter("admission_rejected_total", "Turns rejected with 429, by reason.", ("reason",))
+
+
+class Rejected(Exception):
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Caps in-flight turns globally, per clerk_id and per project_id.
+
+    A clerk or project at its cap is rejected at once (its waiting turns count
+    against the cap too, so one tenant cannot fill the queue). When only the
+    global cap is hit, the turn waits in a bounded FIFO queue for up to
+    `wait_timeout` seconds. A cap of 0 disables it.
+    """
+
+    def __init__(self, max_inflight: int, per_clerk: int, per_project: int, max_waiting: int, wait_timeout: float):
+        self.max_inflight = max_inflight
+        self.per_clerk = per_clerk
+        self.per_project = per_project
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self.inflight = 0
+        self._clerks = {}
+        self._projects = {}
+        self._waiters = deque()
+        self.admitted = 0
+        # Moving average of how long a turn holds its slot, used for Retry-After.
+        self._avg_hold = 5.0
+
+    def depth(self) -> int:
+        return len(self._waiters)
+
+    def _retry_after(self, ahead: int = 0) -> int:
+        slots = max(self.max_inflight, 1)
+        return max(1, math.ceil(self._avg_hold * (1 + ahead / slots)))
+
+    def _reject(self, reason, retry_after, clerk_id, project_id):
+        rejections.inc(reason=reason)
+        log.info("🚫 Turn rejected", extra=kv(reason=reason, clerk_id=clerk_id, project_id=project_id, retry_after=retry_after))
+        raise Rejected(reason, retry_after)
+
+    def _take(self):
+        self.inflight += 1
+        self.admitted += 1
+        return time.monotonic()
+
+    async def acquire(self, clerk_id: str, project_id: str):
+        if self.per_clerk and self._clerks.get(clerk_id, 0) >= self.per_clerk:
+            self._reject("clerk_limit", self._retry_after(), clerk_id, project_id)
+        if self.per_project and self._projects.get(project_id, 0) >= self.per_project:
+            self._reject("project_limit", self._retry_after(), clerk_id, project_id)
+
+        self._clerks[clerk_id] = self._clerks.get(clerk_id, 0) + 1
+        self._projects[project_id] = self._projects.get(project_id, 0) + 1
+        try:
+            if not self._waiters and (not self.max_inflight or self.inflight < self.max_inflight):
+                return (clerk_id, project_id, self._take())
+
+            if len(self._waiters) >= self.max_waiting:
+                self._reject("queue_full", self._retry_after(len(self._waiters)), clerk_id, project_id)
+
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            start = time.monotonic()
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter), self.wait_timeout)
+            except asyncio.TimeoutError:
+                if not waiter.done():
+                    self._waiters.remove(waiter)
+                    waiter.cancel()
+                    self._reject("queue_timeout", self._retry_after(len(self._waiters)), clerk_id, project_id)
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # The slot was handed over just as we were cancelled; give it back.
+                    self.inflight -= 1
+                    self._wake()
+                elif waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                raise
+            stage_seconds.observe(time.monotonic() - start, stage="admission_wait")
+            return (clerk_id, project_id, waiter.result())
+        except BaseException:
+            self._untrack(clerk_id, project_id)
+            raise
+
+    def _untrack(self, clerk_id, project_id):
+        for counts, key in ((self._clerks, clerk_id), (self._projects, project_id)):
+            counts[key] -= 1
+            if not counts[key]:
+                del counts[key]
+
+    def _wake(self):
+        while self._waiters and (not self.max_inflight or self.inflight < self.max_inflight):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.inflight += 1
+                self.admitted += 1
+                waiter.set_result(time.monotonic())
+
+    def release(self, ticket):
+        clerk_id, project_id, started = ticket
+        self._avg_hold = 0.9 * self._avg_hold + 0.1 * (time.monotonic() - started)
+        self.inflight -= 1
+        self._untrack(clerk_id, project_id)
+        self._wake()
+
+    def collect(self):
+        return [
+            ("admission_inflight", "gauge", "Turns holding an admission slot.", self.inflight),
+            ("admission_queue_depth", "gauge", "Turns waiting for an admission slot.", len(self._waiters)),
+            ("admission_admitted_total", "counter", "Turns admitted.", self.admitted),
+            ("admission_tenants_active", "gauge", "clerk_ids with turns in flight or waiting.", len(self._clerks)),
+        ]
+
+
+admission = AdmissionController(
+    ADMISSION_MAX_INFLIGHT,
+    ADMISSION_MAX_PER_CLERK,
+    ADMISSION_MAX_PER_PROJECT,
+    ADMISSION_MAX_WAITING,
+    ADMISSION_WAIT_TIMEOUT,
+)
+registry.collect(admission.collect)
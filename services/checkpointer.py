@@ -0,0 +1,445 @@
+import asyncio
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Iterator, AsyncIterator, Optional, Sequence
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import MemorySaver
+from config.settings import CHECKPOINT_BACKEND, CHECKPOINT_DB_PATH, CHECKPOINT_CACHE_SIZE, CHECKPOINT_KEEP_LATEST, CHECKPOINT_PRUNE_EVERY
+from utils.metrics import registry
+
+
+class CheckpointBackend(ABC):
+    """Storage for already-serialized checkpoints.
+
+    A checkpoint row is (checkpoint_id, parent_id, type, checkpoint, metadata_type,
+    metadata); a write row is (task_id, idx, channel, type, value, task_path).
+    Checkpoint ids are time-ordered, so the largest id of a thread is its latest.
+    """
+
+    @abstractmethod
+    def get(self, thread_id: str, ns: str, checkpoint_id: Optional[str]):
+        ...
+
+    @abstractmethod
+    def list(self, thread_id: Optional[str], ns: Optional[str], before: Optional[str], limit: Optional[int]):
+        ...
+
+    @abstractmethod
+    def put(self, thread_id: str, ns: str, row: tuple):
+        ...
+
+    @abstractmethod
+    def get_writes(self, thread_id: str, ns: str, checkpoint_id: str) -> list:
+        ...
+
+    @abstractmethod
+    def put_writes(self, thread_id: str, ns: str, checkpoint_id: str, rows: list):
+        ...
+
+    @abstractmethod
+    def prune(self, thread_id: str, ns: str, keep: int):
+        ...
+
+    @abstractmethod
+    def delete_thread(self, thread_id: str):
+        ...
+
+    def close(self):
+        pass
+
+
+class SqliteBackend(CheckpointBackend):
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                parent_checkpoint_id TEXT,
+                type TEXT,
+                checkpoint BLOB,
+                metadata_type TEXT,
+                metadata BLOB,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+            );
+            CREATE TABLE IF NOT EXISTS writes (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                channel TEXT NOT NULL,
+                type TEXT,
+                value BLOB,
+                task_path TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+            );
+            """
+        )
+
+    def get(self, thread_id, ns, checkpoint_id):
+        query = "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+        params = [thread_id, ns]
+        if checkpoint_id:
+            query += " AND checkpoint_id = ?"
+            params.append(checkpoint_id)
+        query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        with self._lock:
+            return self._conn.execute(query, params).fetchone()
+
+    def list(self, thread_id, ns, before, limit):
+        query = "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata FROM checkpoints"
+        where, params = [], []
+        if thread_id is not None:
+            where.append("thread_id = ?")
+            params.append(thread_id)
+        if ns is not None:
+            where.append("checkpoint_ns = ?")
+            params.append(ns)
+        if before:
+            where.append("checkpoint_id < ?")
+            params.append(before)
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY checkpoint_id DESC"
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        with self._lock:
+            return self._conn.execute(query, params).fetchall()
+
+    def put(self, thread_id, ns, row):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, ns, *row),
+            )
+
+    def get_writes(self, thread_id, ns, checkpoint_id):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT task_id, idx, channel, type, value, task_path FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+                (thread_id, ns, checkpoint_id),
+            ).fetchall()
+
+    def put_writes(self, thread_id, ns, checkpoint_id, rows):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(thread_id, ns, checkpoint_id, *row) for row in rows],
+            )
+
+    def prune(self, thread_id, ns, keep):
+        with self._lock:
+            cutoff = self._conn.execute(
+                "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?",
+                (thread_id, ns, keep - 1),
+            ).fetchone()
+            if cutoff is None:
+                return
+            # Comparing ids (not membership in the newest K) keeps writes that land before their checkpoint row.
+            for table in ("checkpoints", "writes"):
+                self._conn.execute(
+                    f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?",
+                    (thread_id, ns, cutoff[0]),
+                )
+
+    def delete_thread(self, thread_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+            self._conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class PersistentSaver(BaseCheckpointSaver):
+    """LangGraph checkpointer over a CheckpointBackend.
+
+    The latest checkpoint of recently used threads is kept, serialized, in an LRU
+    write-through cache, so resuming a hot thread never touches the backend, and
+    threads written to are pruned down to their newest `keep_latest` checkpoints
+    once every `prune_every` puts, in one batch.
+
+    The cache is used from the event loop and from the worker threads the async
+    methods hand backend I/O to, so it is only touched under `_lock`.
+    """
+
+    def __init__(self, backend: CheckpointBackend, cache_size: int = 1000, keep_latest: int = 10, prune_every: int = 50, *, serde=None):
+        super().__init__(serde=serde)
+        self.backend = backend
+        self.cache_size = cache_size
+        self.keep_latest = keep_latest
+        self.prune_every = max(1, prune_every)
+        self._lock = threading.Lock()
+        # (thread_id, ns) -> [checkpoint row, {(task_id, idx): write row}]
+        self._cache = OrderedDict()
+        # Threads with puts since the last prune.
+        self._unpruned = set()
+        self._puts = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _cached(self, thread_id, ns, checkpoint_id):
+        """(checkpoint row, sorted write rows) from the cache, or None."""
+        with self._lock:
+            entry = self._cache.get((thread_id, ns))
+            if entry is None or (checkpoint_id and entry[0][0] != checkpoint_id):
+                return None
+            self._cache.move_to_end((thread_id, ns))
+            return entry[0], sorted(entry[1].values())
+
+    def _remember(self, thread_id, ns, row, writes, replace=True):
+        with self._lock:
+            # A backend read must not overwrite a newer checkpoint written through meanwhile.
+            if not replace and (thread_id, ns) in self._cache:
+                return
+            self._cache[(thread_id, ns)] = [row, writes]
+            self._cache.move_to_end((thread_id, ns))
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _due_for_prune(self, thread_id, ns) -> list:
+        """Record a put; every `prune_every` puts, return the threads to prune."""
+        if not self.keep_latest:
+            return []
+        with self._lock:
+            self._unpruned.add((thread_id, ns))
+            self._puts += 1
+            if self._puts < self.prune_every:
+                return []
+            due, self._unpruned, self._puts = list(self._unpruned), set(), 0
+            return due
+
+    def _prune(self, threads):
+        for thread_id, ns in threads:
+            self.backend.prune(thread_id, ns, self.keep_latest)
+
+    def _to_tuple(self, thread_id, ns, row, writes) -> CheckpointTuple:
+        checkpoint_id, parent_id, type_, checkpoint, metadata_type, metadata = row
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": checkpoint_id}},
+            checkpoint=self.serde.loads_typed((type_, checkpoint)),
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": parent_id}}
+                if parent_id
+                else None
+            ),
+            pending_writes=[(task_id, channel, self.serde.loads_typed((t, v))) for task_id, _, channel, t, v, _ in writes],
+        )
+
+    def _load(self, thread_id, ns, checkpoint_id):
+        row = self.backend.get(thread_id, ns, checkpoint_id)
+        if row is None:
+            return None
+        writes = {(w[0], w[1]): w for w in self.backend.get_writes(thread_id, ns, row[0])}
+        return row, writes
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        entry = self._cached(thread_id, ns, checkpoint_id)
+        if entry is not None:
+            self.cache_hits += 1
+            row, writes = entry
+            return self._to_tuple(thread_id, ns, row, writes)
+        self.cache_misses += 1
+        loaded = self._load(thread_id, ns, checkpoint_id)
+        if loaded is None:
+            return None
+        row, writes = loaded
+        if not checkpoint_id:
+            self._remember(thread_id, ns, row, dict(writes), replace=False)
+        return self._to_tuple(thread_id, ns, row, sorted(writes.values()))
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"] if config else None
+        ns = config["configurable"].get("checkpoint_ns") if config else None
+        checkpoint_id = get_checkpoint_id(config) if config else None
+        before_id = get_checkpoint_id(before) if before else None
+        rows = self.backend.list(thread_id, ns, before_id, None if filter or checkpoint_id else limit)
+        for row_thread_id, row_ns, *row in rows:
+            if checkpoint_id and row[0] != checkpoint_id:
+                continue
+            writes = self.backend.get_writes(row_thread_id, row_ns, row[0])
+            item = self._to_tuple(row_thread_id, row_ns, row, writes)
+            if filter and not all(item.metadata.get(k) == v for k, v in filter.items()):
+                continue
+            if limit is not None:
+                if limit <= 0:
+                    break
+                limit -= 1
+            yield item
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id, ns, row = self._serialize(config, checkpoint, metadata)
+        self.backend.put(thread_id, ns, row)
+        self._prune(self._due_for_prune(thread_id, ns))
+        return self._put_config(thread_id, ns, checkpoint)
+
+    def _serialize(self, config, checkpoint, metadata):
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        type_, serialized = self.serde.dumps_typed(checkpoint)
+        metadata_type, serialized_metadata = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        row = (checkpoint["id"], config["configurable"].get("checkpoint_id"), type_, serialized, metadata_type, serialized_metadata)
+        # Write-through: the new checkpoint becomes the cached latest before it reaches the backend.
+        self._remember(thread_id, ns, row, {})
+        return thread_id, ns, row
+
+    @staticmethod
+    def _put_config(thread_id, ns, checkpoint):
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id, ns, checkpoint_id, rows = self._serialize_writes(config, writes, task_id, task_path)
+        if rows:
+            self.backend.put_writes(thread_id, ns, checkpoint_id, rows)
+
+    def _serialize_writes(self, config, writes, task_id, task_path):
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        with self._lock:
+            entry = self._cache.get((thread_id, ns))
+            if entry is not None and entry[0][0] != checkpoint_id:
+                entry = None
+            recorded = set(entry[1]) if entry is not None else set()
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            key = (task_id, WRITES_IDX_MAP.get(channel, idx))
+            # Regular writes are only recorded once per task, special writes overwrite.
+            if key[1] >= 0 and key in recorded:
+                continue
+            type_, serialized = self.serde.dumps_typed(value)
+            rows.append((task_id, key[1], channel, type_, serialized, task_path))
+        if entry is not None and rows:
+            with self._lock:
+                for row in rows:
+                    entry[1][(row[0], row[1])] = row
+        return thread_id, ns, checkpoint_id, rows
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            for key in [k for k in self._cache if k[0] == thread_id]:
+                del self._cache[key]
+            self._unpruned = {k for k in self._unpruned if k[0] != thread_id}
+        self.backend.delete_thread(thread_id)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        entry = self._cached(thread_id, ns, get_checkpoint_id(config))
+        if entry is not None:
+            self.cache_hits += 1
+            return self._to_tuple(thread_id, ns, *entry)
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id, ns, row = self._serialize(config, checkpoint, metadata)
+        due = self._due_for_prune(thread_id, ns)
+
+        def write():
+            self.backend.put(thread_id, ns, row)
+            self._prune(due)
+
+        await asyncio.to_thread(write)
+        return self._put_config(thread_id, ns, checkpoint)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id, ns, checkpoint_id, rows = self._serialize_writes(config, writes, task_id, task_path)
+        if rows:
+            await asyncio.to_thread(self.backend.put_writes, thread_id, ns, checkpoint_id, rows)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def close(self):
+        if self.keep_latest:
+            with self._lock:
+                due, self._unpruned, self._puts = list(self._unpruned), set(), 0
+            self._prune(due)
+        self.backend.close()
+
+    def collect(self):
+        return [
+            ("checkpoint_cache_entries", "gauge", "Threads whose latest checkpoint is cached.", len(self._cache)),
+            ("checkpoint_cache_hits_total", "counter", "Checkpoint reads served from the cache.", self.cache_hits),
+            ("checkpoint_cache_misses_total", "counter", "Checkpoint reads that went to the backend.", self.cache_misses),
+        ]
+
+
+def create_checkpointer():
+    if CHECKPOINT_BACKEND == "memory":
+        return MemorySaver()
+    if CHECKPOINT_BACKEND == "sqlite":
+        saver = PersistentSaver(SqliteBackend(CHECKPOINT_DB_PATH), CHECKPOINT_CACHE_SIZE, CHECKPOINT_KEEP_LATEST, CHECKPOINT_PRUNE_EVERY)
+        registry.collect(saver.collect)
+        return saver
+    raise ValueError(f"Unknown CHECKPOINT_BACKEND: {CHECKPOINT_BACKEND}")
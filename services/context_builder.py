@@ -0,0 +1,79 @@
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, ToolMessage
+from config.settings import CONTEXT_TOKEN_BUDGET, CONTEXT_TRIM_STEP
+from utils.tokens import count_message_tokens, count_messages_tokens
+
+
+def build_context(system_prompt: str, summary: str, history: list, budget: int = CONTEXT_TOKEN_BUDGET, system_tokens: int = None) -> list:
+    """Messages sent to the chat model for one call.
+
+    The system prompt and summary are added here on every call instead of being
+    stored in the checkpointed graph state, and the stored history is trimmed
+    oldest-first to what fits in the remaining token budget.
+
+    Order matters for OpenAI's prompt cache, which reuses the longest common
+    prefix between requests: the static system prompt goes first, then the
+    history (append-only, so it extends the previous turn's prefix), and the
+    summary, which changes every turn, goes just before the current turn.
+    """
+    head = [SystemMessage(content=system_prompt)]
+    tail = [SystemMessage(content=f"Previous conversation summary: {summary}")] if summary else []
+    # The registry counts each prompt once (Prompt.tokens); only count it here if not given.
+    fixed = count_messages_tokens(tail) + (system_tokens if system_tokens is not None else count_messages_tokens(head))
+    messages = trim_history(drop_unanswered_tool_calls(history), budget - fixed)
+    start = _current_turn(messages)
+    return head + messages[:start] + tail + messages[start:]
+
+
+def drop_unanswered_tool_calls(messages: list) -> list:
+    """History without tool calls that never got their results.
+
+    A turn cancelled or failed while its tools ran leaves an AIMessage with
+    tool_calls and no ToolMessages in the checkpoint, and OpenAI rejects every
+    later request that contains it. Such calls (and any partial results) are
+    left out; the history is returned as-is when there are none.
+    """
+    answered = {m.tool_call_id for m in messages if isinstance(m, ToolMessage)}
+    dropped = set()
+    for m in messages:
+        if isinstance(m, AIMessage) and any(c["id"] not in answered for c in m.tool_calls):
+            dropped.update(c["id"] for c in m.tool_calls)
+    if not dropped:
+        return messages
+    return [
+        m for m in messages
+        if not (isinstance(m, AIMessage) and dropped.intersection(c["id"] for c in m.tool_calls))
+        and not (isinstance(m, ToolMessage) and m.tool_call_id in dropped)
+    ]
+
+
+def _current_turn(messages: list) -> int:
+    for i in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[i], HumanMessage):
+            return i
+    return 0
+
+
+def trim_history(messages: list, budget: int, step: int = CONTEXT_TRIM_STEP) -> list:
+    # The current turn (last user message onwards) is always sent whole so tool
+    # calls and their results stay paired.
+    start = _current_turn(messages)
+    sizes = [count_message_tokens(m) for m in messages]
+    excess = sum(sizes) - budget
+    if excess <= 0:
+        return messages
+
+    # Drop whole `step`-token blocks from the front, so the cut point (and the
+    # cached prefix behind it) stays put for several turns instead of moving
+    # on every one.
+    if step > 0:
+        excess = -(-excess // step) * step
+    cut = 0
+    dropped = 0
+    while cut < start and dropped < excess:
+        dropped += sizes[cut]
+        cut += 1
+
+    # Older context must begin at a user message, never mid tool exchange.
+    while cut < start and not isinstance(messages[cut], HumanMessage):
+        cut += 1
+    return messages[cut:]
@@ -1,21 +1,52 @@
+from typing import Optional
 from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, AIMessage
-from uuid import uuid4
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableConfig
 from models.state import State
-from tools.tavily_tool import search_tool, tools
+from tools.tavily_tool import tools
 from utils.serializers import serialise_ai_message_chunk
-from utils.api_client import fetch_summary, save_summary
-from prompts import get_prompt
+from utils.api_client import fetch_summary
+from utils.http_pools import http_pools
+from utils.metrics import TurnTimer, timed
+from utils.logger import get_logger, kv
+from prompts import prompt_registry
 from services.memory_manager import create_memory
+from services.summarizer import summarize_new_messages
+from services.context_builder import build_context
+from services.tool_executor import run_tool_calls
+from services.summary_queue import summary_queue
+from services.summary_writer import summary_writer
+from services.session_store import create_session_store
+from services.stream_coalescer import coalesce_content
+from services.stream_registry import stream_registry
+from services.worker_routing import mint_checkpoint_id
+from services.rate_limiter import get_scheduler, INTERACTIVE
+from services.warmup import on_warmup, warm_backend, warm_openai, dry_run, stub_chat_model
+from services import summarizer
+from utils.startup import phase
+from config.settings import STREAM_COALESCE_MAX_MS, MONGO_API_BASE
 from langgraph.graph import StateGraph, END
-import json
+import asyncio
 
-llm = ChatOpenAI(model="gpt-4o")
-llm_with_tools = llm.bind_tools(tools=tools)
+log = get_logger("engine")
 
-async def model_node(state: State):
-    result = await llm_with_tools.ainvoke(state["messages"])
-    return {"messages": [result]}
+# Retries and pacing are left to the shared rate-limit scheduler, connections to the shared "openai" pool.
+llm = ChatOpenAI(model="gpt-4o", max_retries=0, include_response_headers=True, stream_usage=True, http_async_client=http_pools.get("openai", keep_open=True))
+llm_with_tools = llm.bind_tools(tools=tools)
+scheduler = get_scheduler(llm.model_name)
+tools_by_name = {tool.name: tool for tool in tools}
+
+def make_model_node(chat_model=None):
+    """Model node calling `chat_model`, or the rate-limited llm_with_tools when None."""
+    async def model_node(state: State, config: RunnableConfig):
+        options = config["configurable"]
+        messages = build_context(options.get("__system_prompt", ""), options.get("__summary", ""), state["messages"], system_tokens=options.get("__system_tokens"))
+        if chat_model is not None:
+            result = await chat_model.ainvoke(messages)
+        else:
+            result = await scheduler.run(lambda: llm_with_tools.ainvoke(messages), messages, priority=INTERACTIVE)
+        return {"messages": [result]}
+    return model_node
 
 async def tools_router(state: State):
     last_message = state["messages"][-1]
@@ -25,75 +56,135 @@ async def tools_router(state: State):
 
 async def tool_node(state: State):
     tool_calls = state["messages"][-1].tool_calls
-    responses = []
-    for tool_call in tool_calls:
-        tool_name = tool_call["name"]
-        tool_args = tool_call["args"]
-        tool_id = tool_call["id"]
-        if tool_name == "tavily_search_results_json":
-            result = await search_tool.ainvoke(tool_args)
-            responses.append({
-                "content": str(result),
-                "tool_call_id": tool_id,
-                "name": tool_name
-            })
+    responses = await run_tool_calls(tool_calls, tools_by_name)
     return {"messages": responses}
 
-graph_builder = StateGraph(State)
-graph_builder.add_node("model", model_node)
-graph_builder.add_node("tool_node", tool_node)
-graph_builder.set_entry_point("model")
-graph_builder.add_conditional_edges("model", tools_router)
-graph_builder.add_edge("tool_node", "model")
-graph = graph_builder.compile()
+def build_graph(chat_model=None, checkpointer=None):
+    graph_builder = StateGraph(State)
+    graph_builder.add_node("model", make_model_node(chat_model))
+    graph_builder.add_node("tool_node", tool_node)
+    graph_builder.set_entry_point("model")
+    graph_builder.add_conditional_edges("model", tools_router)
+    graph_builder.add_edge("tool_node", "model")
+    return graph_builder.compile(checkpointer=checkpointer)
 
-memory_store = {}
 
-async def generate_chat_responses(message: str, checkpoint_id: str, clerk_id: str, project_id: str, chat_type: str):
-    is_new = checkpoint_id is None
-    prompt = get_prompt(chat_type)
-    summary_text = fetch_summary(clerk_id, project_id, chat_type) if not is_new else ""
+with phase("build_graph"):
+    graph = build_graph()
+
+
+@on_warmup("backend")
+async def warm_backend_pool():
+    await warm_backend(MONGO_API_BASE)
+
+
+@on_warmup("openai")
+async def warm_openai_pools():
+    await warm_openai(llm, summarizer.summary_llm)
+
+
+@on_warmup("graph")
+async def warm_graph():
+    # Same nodes and streaming path as a real turn, with a stub model and no checkpoint.
+    await dry_run(build_graph(stub_chat_model()))
+
+memory_store = create_session_store()
 
-    initial_messages = [HumanMessage(role="system", content=prompt)]
-    if summary_text:
-        initial_messages.append(HumanMessage(role="system", content=f"Previous summary: {summary_text}"))
-    initial_messages.append(HumanMessage(content=message))
+async def chat_events(message: str, checkpoint_id: str, clerk_id: str, project_id: str, chat_type: str, is_new: bool = False, moved: bool = False):
+    prompt = prompt_registry.get(chat_type)
+    timer = TurnTimer()
+    summary_text = ""
+    if not is_new:
+        with timer.span("fetch_summary"):
+            summary_text = await fetch_summary(clerk_id, project_id, chat_type)
+
+    initial_messages = [HumanMessage(content=message)]
 
     if is_new:
-        checkpoint_id = str(uuid4())
-        yield f"data: {json.dumps({'type': 'checkpoint', 'checkpoint_id': checkpoint_id})}\n\n"
+        yield {"type": "checkpoint", "checkpoint_id": checkpoint_id}
 
-    config = {"configurable": {"thread_id": checkpoint_id}}
+    # "__" keys are not copied into checkpoint metadata, so the prompt and summary are not persisted.
+    config = {"configurable": {"thread_id": checkpoint_id, "__system_prompt": prompt.text, "__system_tokens": prompt.tokens, "__summary": summary_text}}
 
-    if checkpoint_id not in memory_store:
-        memory_store[checkpoint_id] = create_memory(llm)
+    def new_memory():
+        memory = create_memory()
+        memory.moving_summary_buffer = summary_text
+        return memory
 
-    memory = memory_store[checkpoint_id]
+    if moved:
+        # Turns served elsewhere are only in the backend summary; rebuild from it.
+        log.info("🔀 Thread moved back, dropping stale session", extra=kv(checkpoint_id=checkpoint_id))
+        memory_store.discard(checkpoint_id)
+    memory = memory_store.get_or_create(checkpoint_id, new_memory)
 
     events = graph.astream_events({"messages": initial_messages}, version="v2", config=config)
 
     ai_response = ""
+    graph_started = False
+    streamed = False
+    search_cache_hits = {}
 
-    async for event in events:
-        event_type = event["event"]
-
-        if event_type == "on_chat_model_stream":
-            chunk = serialise_ai_message_chunk(event["data"]["chunk"])
-            ai_response += chunk
-            yield f"data: {json.dumps({'type': 'content', 'content': chunk})}\n\n"
-
-        elif event_type == "on_tool_end" and event["name"] == "tavily_search_results_json":
-            urls = [item["url"] for item in event["data"]["output"] if "url" in item]
-            yield f"data: {json.dumps({'type': 'search_results', 'urls': urls})}\n\n"
+    try:
+        async for event in events:
+            event_type = event["event"]
+            if not graph_started:
+                graph_started = True
+                timer.mark("graph_start")
+
+            if event_type == "on_chat_model_stream":
+                if not streamed:
+                    streamed = True
+                    timer.mark("first_token")
+                chunk = serialise_ai_message_chunk(event["data"]["chunk"])
+                ai_response += chunk
+                yield {"type": "content", "content": chunk}
+
+            elif event_type == "on_chat_model_start":
+                timer.start(event["run_id"], "model")
+
+            elif event_type == "on_chat_model_end":
+                timer.end(event["run_id"])
+                timer.usage(getattr(event["data"].get("output"), "usage_metadata", None))
+
+            elif event_type == "on_tool_start":
+                timer.start(event["run_id"], "tool")
+
+            elif event_type == "on_custom_event" and event["name"] == "search_cache":
+                search_cache_hits[event["run_id"]] = event["data"]["cached"]
+
+            elif event_type == "on_tool_end":
+                timer.end(event["run_id"])
+                if event["name"] == "tavily_search_results_json":
+                    cached = search_cache_hits.pop(event["run_id"], False)
+                    urls = [item["url"] for item in event["data"]["output"] if "url" in item]
+                    yield {"type": "search_results", "urls": urls, "cached": cached}
+    except (asyncio.CancelledError, GeneratorExit):
+        log.warning("⏱️ Turn cancelled", extra=kv(checkpoint_id=checkpoint_id, spans=timer.finish("cancelled")))
+        raise
+    except Exception:
+        log.exception("⏱️ Turn failed", extra=kv(checkpoint_id=checkpoint_id, spans=timer.finish("error")))
+        raise
 
     memory.chat_memory.add_user_message(message)
     memory.chat_memory.add_ai_message(ai_response)
+    memory_store.resize(checkpoint_id)
 
-    try:
-        summary = memory.predict_new_summary(memory.chat_memory.messages, memory.moving_summary_buffer)
-        memory.moving_summary_buffer = summary
-        save_summary(clerk_id, project_id, chat_type, summary)
-    except:
-        pass
+    async def update_summary():
+        with timed("summarize"):
+            summary = await summarize_new_messages(memory)
+        summary_writer.submit(clerk_id, project_id, chat_type, summary)
 
-    yield f"data: {json.dumps({'type': 'end'})}\n\n"
\ No newline at end of file
+    await summary_queue.submit((clerk_id, project_id, chat_type), update_summary)
+    log.info("⏱️ Turn finished", extra=kv(checkpoint_id=checkpoint_id, spans=timer.finish(), tokens=timer.tokens()))
+
+    yield {"type": "end"}
+
+
+def start_chat_turn(message: str, checkpoint_id: str, clerk_id: str, project_id: str, chat_type: str, coalesce_ms: int = 0, on_disconnect: Optional[str] = None, on_done=None, moved: bool = False):
+    is_new = checkpoint_id is None
+    checkpoint_id = checkpoint_id or mint_checkpoint_id()
+    events = chat_events(message, checkpoint_id, clerk_id, project_id, chat_type, is_new, moved)
+    if coalesce_ms > 0:
+        events = coalesce_content(events, min(coalesce_ms, STREAM_COALESCE_MAX_MS) / 1000)
+    # The turn runs detached from the response; a reconnect can pick it up via Last-Event-ID.
+    return stream_registry.start(checkpoint_id, events, on_disconnect, on_done)
@@ -0,0 +1,45 @@
+import asyncio
+from contextlib import asynccontextmanager
+from config.settings import LOOP_LAG_INTERVAL, TOKENIZER_MODEL
+from utils.http_pools import http_pools
+from utils.metrics import registry, LoopLagMonitor
+from utils.logger import setup_logging, stop_logging
+from utils.tokens import get_encoding
+from utils.startup import phase
+from services.summary_queue import summary_queue
+from services.summary_writer import summary_writer
+from services.stream_registry import stream_registry
+from services.warmup import warm_up
+from prompts import prompt_registry
+from tools.tavily_tool import search_disk_cache
+
+loop_lag_monitor = LoopLagMonitor(LOOP_LAG_INTERVAL)
+registry.collect(loop_lag_monitor.collect)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    setup_logging()
+    # Loading the BPE file (a download on a fresh pod) would otherwise land on the first turn.
+    with phase("tiktoken"):
+        get_encoding(TOKENIZER_MODEL)
+    # Refuse to start with a missing or broken prompt rather than fail mid-turn.
+    with phase("prompts"):
+        prompt_registry.validate()
+    # Drop search results that expired while the worker was down.
+    if search_disk_cache is not None:
+        with phase("search_cache"):
+            await asyncio.to_thread(search_disk_cache.purge)
+    await warm_up()
+    summary_queue.start()
+    summary_writer.start()
+    loop_lag_monitor.start()
+    yield
+    # Let running turns finish, then their queued summaries, then flush buffered
+    # saves before the HTTP pools go away.
+    await stream_registry.drain()
+    await summary_queue.drain()
+    await summary_writer.close()
+    await http_pools.aclose()
+    await loop_lag_monitor.stop()
+    stop_logging()
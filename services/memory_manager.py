@@ -1,16 +1,20 @@
 from langchain.memory import ConversationSummaryBufferMemory
-from langchain_core.prompts import ChatPromptTemplate
 from langchain_openai import ChatOpenAI
+from config.settings import SUMMARY_BUFFER_TOKEN_LIMIT
+from services import summarizer
+from services.summarizer import summary_prompt
 
-summary_prompt = ChatPromptTemplate.from_template(
-    "You are summarizing a chat with a client. Extract only one most important insight in the fewest words possible.\n\nCurrent summary:\n{summary}\nNew lines:\n{new_lines}"
-)
 
-def create_memory(llm:ChatOpenAI):
-    return ConversationSummaryBufferMemory(
-        llm=llm,
-        max_token_limit=1000,
+class SessionMemory(ConversationSummaryBufferMemory):
+    # Number of buffered messages already folded into moving_summary_buffer.
+    summarized_count: int = 0
+
+
+def create_memory(llm:ChatOpenAI = None, prompt=summary_prompt):
+    return SessionMemory(
+        llm=llm or summarizer.summary_llm,
+        max_token_limit=SUMMARY_BUFFER_TOKEN_LIMIT,
         return_messages=True,
         memory_key="chat_history",
-        prompt=summary_prompt
-    )
\ No newline at end of file
+        prompt=prompt
+    )
@@ -0,0 +1,252 @@
+import asyncio
+import heapq
+import itertools
+import random
+import re
+import time
+import openai
+from config.settings import (
+    TOKENIZER_MODEL,
+    OPENAI_RPM,
+    OPENAI_TPM,
+    OPENAI_RATE_LIMITS,
+    OPENAI_COMPLETION_ESTIMATE,
+    OPENAI_MAX_RETRIES,
+    OPENAI_RETRY_BASE_DELAY,
+)
+from utils.tokens import count_messages_tokens
+from utils.metrics import registry
+from utils.logger import get_logger, kv
+
+log = get_logger("ratelimit")
+
+# Lower runs first.
+INTERACTIVE = 0
+BACKGROUND = 1
+_PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+queue_depth = registry.gauge("openai_queue_depth", "Model calls waiting for rate-limit budget.", ("model", "priority"))
+wait_seconds = registry.histogram("openai_wait_seconds", "Time a model call waited for rate-limit budget.", ("model", "priority"))
+rate_limited = registry.counter("openai_rate_limited_total", "429 responses from OpenAI.", ("model",))
+retries_total = registry.counter("openai_retries_total", "Model calls retried, by error.", ("model", "error"))
+
+_RETRYABLE = (openai.RateLimitError, openai.InternalServerError, openai.APIConnectionError)
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_reset(value) -> float:
+    """Seconds from an OpenAI reset header ("1s", "6m0s", "20ms") or retry-after ("2")."""
+    if value is None:
+        return 0.0
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    return sum(float(n) * _UNITS[unit] for n, unit in _DURATION.findall(value))
+
+
+class TokenBucket:
+    """`per_minute` units refilled continuously; the level may go negative after a settle."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.level = float(per_minute)
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        if not self.capacity:
+            return 0.0
+        self._refill()
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.level -= amount
+
+    def give(self, amount: float):
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+    def sync(self, remaining):
+        """Trust the provider when it reports less budget than we think we have."""
+        if remaining is None:
+            return
+        self._refill()
+        self.level = min(self.level, float(remaining))
+
+
+class RateLimitScheduler:
+    """Shared RPM/TPM budget for one model, handed out in priority order.
+
+    Calls wait in a heap keyed by (priority, arrival), so interactive turns go
+    ahead of background summaries on the same model. A call is released once both buckets can
+    cover it; its token estimate is settled against the real usage afterwards.
+    A 429 pauses the whole scheduler until the provider's reset time.
+    """
+
+    def __init__(self, model: str, rpm: int, tpm: int, retries: int = OPENAI_MAX_RETRIES, base_delay: float = OPENAI_RETRY_BASE_DELAY):
+        self.model = model
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.retries = retries
+        self.base_delay = base_delay
+        self.blocked_until = 0.0
+        self._waiters = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def _depth(self, priority, delta):
+        queue_depth.inc(delta, model=self.model, priority=_PRIORITY_NAMES.get(priority, str(priority)))
+
+    def _kick(self):
+        self._wakeup.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._pump())
+
+    async def _pump(self):
+        while self._waiters:
+            priority, _, tokens, waiter = self._waiters[0]
+            if waiter.done():
+                heapq.heappop(self._waiters)
+                self._depth(priority, -1)
+                continue
+            delay = max(
+                self.blocked_until - time.monotonic(),
+                self.requests.wait_time(1),
+                self.tokens.wait_time(tokens),
+            )
+            if delay <= 0:
+                heapq.heappop(self._waiters)
+                self._depth(priority, -1)
+                self.requests.take(1)
+                self.tokens.take(tokens)
+                waiter.set_result(None)
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def acquire(self, tokens: int, priority: int = INTERACTIVE):
+        # An estimate above the bucket size could never be granted.
+        if self.tokens.capacity:
+            tokens = min(tokens, self.tokens.capacity)
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), tokens, waiter))
+        self._depth(priority, 1)
+        self._kick()
+        start = time.monotonic()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(tokens)
+            else:
+                waiter.cancel()
+            raise
+        wait_seconds.observe(time.monotonic() - start, model=self.model, priority=_PRIORITY_NAMES.get(priority, str(priority)))
+        return tokens
+
+    def release(self, tokens: int):
+        """Return budget for a call the provider never counted."""
+        self.requests.give(1)
+        self.tokens.give(tokens)
+        self._wakeup.set()
+
+    def sync_headers(self, headers):
+        if not headers:
+            return
+        self.requests.sync(headers.get("x-ratelimit-remaining-requests"))
+        self.tokens.sync(headers.get("x-ratelimit-remaining-tokens"))
+
+    def _retry_delay(self, error, attempt: int) -> float:
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        if "retry-after-ms" in headers:
+            reset = parse_reset(headers["retry-after-ms"]) / 1000
+        elif "retry-after" in headers:
+            reset = parse_reset(headers["retry-after"])
+        else:
+            # Wait for whichever budget the provider says is exhausted.
+            reset = max(
+                parse_reset(headers.get(f"x-ratelimit-reset-{kind}")) if headers.get(f"x-ratelimit-remaining-{kind}") == "0" else 0.0
+                for kind in ("requests", "tokens")
+            )
+        backoff = self.base_delay * 2 ** attempt
+        # Jitter keeps workers that were throttled together from retrying together.
+        return reset + random.uniform(0, backoff) if reset else random.uniform(backoff / 2, backoff)
+
+    async def run(self, call, messages=None, tokens: int = None, priority: int = INTERACTIVE):
+        """Await `call()` once budget allows, retrying 429s and 5xx with jittered backoff.
+
+        `tokens` defaults to a tiktoken estimate of `messages` plus the expected completion.
+        """
+        if tokens is None:
+            tokens = (count_messages_tokens(messages, TOKENIZER_MODEL) if messages else 0) + OPENAI_COMPLETION_ESTIMATE
+        attempt = 0
+        while True:
+            granted = await self.acquire(tokens, priority)
+            try:
+                result = await call()
+            except _RETRYABLE as e:
+                if isinstance(e, openai.APIConnectionError):
+                    # Never reached the provider, so nothing was counted.
+                    self.release(granted)
+                else:
+                    # A 429 or 5xx still counted; the headers say how much budget is left.
+                    self.sync_headers(getattr(getattr(e, "response", None), "headers", None))
+                error = type(e).__name__
+                if isinstance(e, openai.RateLimitError):
+                    rate_limited.inc(model=self.model)
+                if attempt >= self.retries:
+                    raise
+                delay = self._retry_delay(e, attempt)
+                if isinstance(e, openai.RateLimitError):
+                    self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+                retries_total.inc(model=self.model, error=error)
+                log.warning("⏳ Model call throttled, retrying", extra=kv(model=self.model, error=error, attempt=attempt + 1, delay=round(delay, 2)))
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            self._settle(result, granted)
+            return result
+
+    def _settle(self, result, granted: int):
+        metadata = getattr(result, "response_metadata", None)
+        if isinstance(metadata, dict):
+            # Headers are only needed here; keep them out of the checkpoint.
+            self.sync_headers(metadata.pop("headers", None))
+        usage = getattr(result, "usage_metadata", None)
+        if usage and usage.get("total_tokens"):
+            self.tokens.give(granted - usage["total_tokens"])
+            self._wakeup.set()
+
+
+def _parse_limits(spec: str) -> dict:
+    limits = {}
+    for part in spec.split(","):
+        fields = part.strip().split(":")
+        if len(fields) == 3:
+            limits[fields[0]] = (int(fields[1]), int(fields[2]))
+    return limits
+
+
+_limits = _parse_limits(OPENAI_RATE_LIMITS)
+_schedulers = {}
+
+
+def get_scheduler(model: str) -> RateLimitScheduler:
+    """One scheduler per model name, shared by every caller in the process."""
+    if model not in _schedulers:
+        rpm, tpm = _limits.get(model, (OPENAI_RPM, OPENAI_TPM))
+        _schedulers[model] = RateLimitScheduler(model, rpm, tpm)
+    return _schedulers[model]
@@ -0,0 +1,105 @@
+import time
+from collections import OrderedDict
+from config.settings import SESSION_MAX_ENTRIES, SESSION_MAX_BYTES, SESSION_IDLE_TTL
+from utils.metrics import registry
+
+# Rough fixed cost of a memory object and of each buffered message.
+_BASE_BYTES = 2048
+_MESSAGE_BYTES = 256
+
+
+def estimate_memory_bytes(memory) -> int:
+    size = _BASE_BYTES + len(memory.moving_summary_buffer or "")
+    for message in memory.chat_memory.messages:
+        size += _MESSAGE_BYTES + len(str(message.content))
+    return size
+
+
+class SessionStore:
+    """Per-checkpoint conversation memory with LRU and idle-TTL eviction.
+
+    Evicted sessions are rebuilt by the caller's factory, which seeds them from
+    the summary persisted in the Node backend.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, idle_ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get_or_create(self, key, factory):
+        now = time.monotonic()
+        self._expire(now)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            entry[2] = now
+            self._entries.move_to_end(key)
+            return entry[0]
+
+        self.misses += 1
+        memory = factory()
+        size = estimate_memory_bytes(memory)
+        self._entries[key] = [memory, size, now]
+        self._bytes += size
+        self._evict()
+        return memory
+
+    def discard(self, key):
+        """Forget a session whose state is out of date."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def resize(self, key):
+        """Re-measure a session after its messages changed."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        size = estimate_memory_bytes(entry[0])
+        self._bytes += size - entry[1]
+        entry[1] = size
+        self._evict()
+
+    def _expire(self, now: float):
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if now - entry[2] < self.idle_ttl:
+                break
+            self._remove(key)
+
+    def _evict(self):
+        # The most recently used session is never evicted, even if it alone is over budget.
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry[1]
+        self.evictions += 1
+
+    def collect(self):
+        return [
+            ("session_store_entries", "gauge", "Conversation memories held in the session store.", len(self._entries)),
+            ("session_store_bytes", "gauge", "Estimated size of the session store.", self._bytes),
+            ("session_store_hits_total", "counter", "Session store lookups that found a memory.", self.hits),
+            ("session_store_misses_total", "counter", "Session store lookups that had to build a memory.", self.misses),
+            ("session_store_evictions_total", "counter", "Sessions evicted by LRU, size or idle TTL.", self.evictions),
+        ]
+
+
+def create_session_store() -> SessionStore:
+    store = SessionStore(SESSION_MAX_ENTRIES, SESSION_MAX_BYTES, SESSION_IDLE_TTL)
+    registry.collect(store.collect)
+    return store
@@ -0,0 +1,76 @@
+import asyncio
+from config.settings import STREAM_COALESCE_MAX_CHARS
+
+_DONE = object()
+
+
+class _Failed:
+    def __init__(self, error):
+        self.error = error
+
+
+async def coalesce_content(events, window: float, max_chars: int = STREAM_COALESCE_MAX_CHARS):
+    """Merge consecutive `content` events into fewer, larger ones.
+
+    A content chunk that arrives more than `window` seconds after the last one
+    was sent goes out immediately, so the first token is never delayed. Chunks
+    arriving faster are buffered until the window closes or `max_chars` is
+    reached. Any other event flushes the buffer first, so ordering is kept.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+
+    async def pump():
+        try:
+            async for event in events:
+                await queue.put(event)
+        except Exception as e:
+            await queue.put(_Failed(e))
+        finally:
+            queue.put_nowait(_DONE)
+
+    task = asyncio.create_task(pump())
+    buffer = []
+    size = 0
+    last_sent = float("-inf")
+
+    def flush():
+        nonlocal size, last_sent
+        event = {"type": "content", "content": "".join(buffer)}
+        buffer.clear()
+        size = 0
+        last_sent = loop.time()
+        return event
+
+    try:
+        while True:
+            timeout = max(0.0, last_sent + window - loop.time()) if buffer else None
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                yield flush()
+                continue
+
+            if item is _DONE:
+                break
+            if isinstance(item, _Failed):
+                if buffer:
+                    yield flush()
+                raise item.error
+
+            if item.get("type") != "content":
+                if buffer:
+                    yield flush()
+                yield item
+                continue
+
+            buffer.append(item["content"])
+            size += len(item["content"])
+            if size >= max_chars or loop.time() - last_sent >= window:
+                yield flush()
+
+        if buffer:
+            yield flush()
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
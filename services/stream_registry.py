@@ -0,0 +1,207 @@
+import asyncio
+from collections import deque
+from contextlib import aclosing
+from config.settings import REPLAY_BUFFER_FRAMES, REPLAY_TTL, TURN_DRAIN_TIMEOUT, TURN_DISCONNECT_POLICY, TURN_CANCEL_GRACE
+from utils.sse import SSEEncoder
+from utils.metrics import registry
+from utils.logger import get_logger, kv
+
+log = get_logger("streams")
+turns_cancelled = registry.counter("turn_streams_cancelled_total", "Turns cancelled before they finished, by reason.", ("reason",))
+
+
+class TurnStream:
+    """Encoded frames of one turn, kept in a ring buffer and fanned out to subscribers.
+
+    The turn runs in its own task, so a subscriber that disconnects does not
+    stop it, and a reconnect can replay what it missed and keep following.
+    With the "cancel" policy the task is cancelled once nobody has been
+    subscribed for `grace` seconds.
+    """
+
+    def __init__(self, stream_id: str, seq: int = 0, maxlen: int = REPLAY_BUFFER_FRAMES, policy: str = TURN_DISCONNECT_POLICY, grace: float = TURN_CANCEL_GRACE):
+        self.stream_id = stream_id
+        # Seq the turn started after; a follow-up turn continues the previous turn's seq.
+        self.first_seq = seq
+        self.encoder = SSEEncoder(stream_id, seq)
+        self.policy = policy
+        self.grace = grace
+        self.done = False
+        self.task = None
+        self.subscribers = 0
+        self._frames = deque(maxlen=maxlen)
+        self._changed = asyncio.Event()
+        self._abandon_timer = None
+        self.cancel_reason = None
+
+    @property
+    def seq(self) -> int:
+        return self.encoder.seq
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def append(self, event: dict):
+        frame = self.encoder.encode(event)
+        self._frames.append((self.encoder.seq, frame))
+        self._notify()
+
+    def close(self):
+        self.done = True
+        self._notify()
+
+    async def subscribe(self, after: int = None):
+        """Yield frames with a seq greater than `after` (default: from the start of this turn), then follow the live turn."""
+        if after is None:
+            after = self.first_seq
+        self.subscribers += 1
+        if self._abandon_timer is not None:
+            self._abandon_timer.cancel()
+            self._abandon_timer = None
+        try:
+            while True:
+                changed = self._changed
+                if self._frames and self._frames[0][0] > after + 1:
+                    log.warning("⚠️ Replay buffer overrun", extra=kv(stream=self.stream_id, missed=self._frames[0][0] - after - 1))
+                for seq, frame in list(self._frames):
+                    if seq > after:
+                        after = seq
+                        yield frame
+                if self.done and after >= self.seq:
+                    return
+                await changed.wait()
+        finally:
+            self.subscribers -= 1
+            self.watch()
+
+    def watch(self):
+        """Under the "cancel" policy, start the grace timer if nobody is listening."""
+        if self.subscribers == 0 and not self.done and self.policy == "cancel" and self._abandon_timer is None:
+            self._abandon_timer = asyncio.get_running_loop().call_later(self.grace, self._abandon)
+
+    def _abandon(self):
+        self._abandon_timer = None
+        if self.subscribers == 0 and not self.done:
+            log.info("✂️ Cancelling abandoned turn", extra=kv(stream=self.stream_id))
+            self.cancel("abandoned")
+
+    def cancel(self, reason: str) -> bool:
+        if self.done or self.task is None:
+            return False
+        self.cancel_reason = reason
+        self.task.cancel()
+        return True
+
+
+class StreamRegistry:
+    """Running and recently finished turns, keyed by checkpoint_id.
+
+    A finished turn stays replayable for `ttl` seconds. A new turn on the same
+    checkpoint continues its seq so event ids never repeat within that window.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._streams = {}
+        # checkpoint_ids claimed by a request that is waiting for admission.
+        self._reserved = set()
+        self.resumed = 0
+
+    def __len__(self):
+        return len(self._streams)
+
+    def get(self, stream_id):
+        return self._streams.get(stream_id)
+
+    def running(self, stream_id) -> bool:
+        stream = self._streams.get(stream_id)
+        return stream is not None and not stream.done
+
+    def reserve(self, stream_id) -> bool:
+        """Claim `stream_id` for a turn about to start; False if one is running or already claimed.
+
+        Taken before waiting for admission, so two requests for one checkpoint
+        cannot both get through and run overlapping turns on its thread.
+        """
+        if self.running(stream_id) or stream_id in self._reserved:
+            return False
+        self._reserved.add(stream_id)
+        return True
+
+    def unreserve(self, stream_id):
+        self._reserved.discard(stream_id)
+
+    def start(self, stream_id: str, events, policy: str = None, on_done=None) -> TurnStream:
+        """Run `events` as a detached turn; `on_done` is called once it ends, however it ends."""
+        previous = self._streams.get(stream_id)
+        stream = TurnStream(stream_id, previous.seq if previous else 0, policy=policy or TURN_DISCONNECT_POLICY)
+        self._streams[stream_id] = stream
+        stream.task = asyncio.create_task(self._run(stream, events, on_done))
+        stream.watch()
+        return stream
+
+    async def _run(self, stream, events, on_done):
+        try:
+            async with aclosing(events):
+                async for event in events:
+                    stream.append(event)
+        except asyncio.CancelledError:
+            # Subscribers still attached learn why the stream stopped short of "end".
+            reason = stream.cancel_reason or "shutdown"
+            turns_cancelled.inc(reason=reason)
+            stream.append({"type": "cancelled", "reason": reason})
+            raise
+        except Exception:
+            log.exception("❌ Turn failed", extra=kv(stream=stream.stream_id))
+        finally:
+            stream.close()
+            if on_done is not None:
+                on_done()
+            asyncio.get_running_loop().call_later(self.ttl, self._expire, stream)
+
+    def _expire(self, stream):
+        if self._streams.get(stream.stream_id) is stream:
+            del self._streams[stream.stream_id]
+
+    def cancel(self, stream_id: str) -> bool:
+        """Abort a running turn. Nothing from it is added to memory or summarized."""
+        stream = self._streams.get(stream_id)
+        return stream is not None and stream.cancel("requested")
+
+    def resume(self, last_event_id: str):
+        """Frames after `last_event_id` ("{checkpoint_id}:{seq}").
+
+        None if that turn is gone, or if it has finished and the client already
+        has its last frame; either way there is nothing left to send.
+        """
+        stream_id, _, seq = last_event_id.rpartition(":")
+        stream = self._streams.get(stream_id)
+        if stream is None or not seq.isdigit() or int(seq) > stream.seq:
+            return None
+        if stream.done and int(seq) == stream.seq:
+            return None
+        self.resumed += 1
+        log.info("🔁 Resuming stream", extra=kv(stream=stream_id, after=seq, running=not stream.done))
+        return stream.subscribe(int(seq))
+
+    async def drain(self, timeout: float = TURN_DRAIN_TIMEOUT):
+        tasks = [stream.task for stream in self._streams.values() if not stream.done and stream.task]
+        if not tasks:
+            return
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    def collect(self):
+        running = sum(1 for stream in self._streams.values() if not stream.done)
+        return [
+            ("turn_streams_running", "gauge", "Turns still generating.", running),
+            ("turn_streams_replayable", "gauge", "Turns whose frames can still be replayed.", len(self._streams)),
+            ("turn_streams_resumed_total", "counter", "Reconnects served from the replay buffer.", self.resumed),
+        ]
+
+
+stream_registry = StreamRegistry(REPLAY_TTL)
+registry.collect(stream_registry.collect)
@@ -1,5 +1,54 @@
+import asyncio
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_openai import ChatOpenAI
+from config.settings import TOKENIZER_MODEL, SUMMARY_MODEL, SUMMARY_TIMEOUT, SUMMARY_MAX_TOKENS, SUMMARY_MAX_CONCURRENCY
+from utils.http_pools import http_pools
+from utils.tokens import count_message_tokens, count_messages_tokens, count_tokens
+from services.rate_limiter import get_scheduler, BACKGROUND
 
 summary_prompt = ChatPromptTemplate.from_template(
     "You are summarizing a chat with a client. Extract only one most important insight in the fewest words possible.\n\nCurrent summary:\n{summary}\nNew lines:\n{new_lines}"
-)
\ No newline at end of file
+)
+
+
+def create_summary_llm(model: str = SUMMARY_MODEL) -> ChatOpenAI:
+    """The model that writes the one-insight summary, separate from the chat model."""
+    return ChatOpenAI(model=model, temperature=0, timeout=SUMMARY_TIMEOUT, max_tokens=SUMMARY_MAX_TOKENS, max_retries=0, http_async_client=http_pools.get("openai", keep_open=True))
+
+
+summary_llm = create_summary_llm()
+# Caps summary calls in flight across all sessions, independent of the chat turns.
+_summary_slots = asyncio.Semaphore(SUMMARY_MAX_CONCURRENCY)
+
+
+async def summarize_new_messages(memory) -> str:
+    """Fold only the messages added since the last summary into the running summary."""
+    end = len(memory.chat_memory.messages)
+    new_messages = memory.chat_memory.messages[memory.summarized_count:end]
+    if new_messages:
+        previous = memory.moving_summary_buffer
+        # OpenAI budgets are per model: summaries only queue behind chat turns when
+        # SUMMARY_MODEL is the chat model, otherwise they have a scheduler of their own.
+        scheduler = get_scheduler(getattr(memory.llm, "model_name", TOKENIZER_MODEL))
+        tokens = count_messages_tokens(new_messages) + count_tokens(previous) + SUMMARY_MAX_TOKENS
+        async with _summary_slots:
+            memory.moving_summary_buffer = await scheduler.run(
+                lambda: memory.apredict_new_summary(new_messages, previous), tokens=tokens, priority=BACKGROUND
+            )
+        # Turns appended while the model was summarizing stay after the watermark.
+        memory.summarized_count = end
+    prune_summarized_messages(memory)
+    return memory.moving_summary_buffer
+
+
+def prune_summarized_messages(memory):
+    """Drop already-summarized messages, oldest first, until the buffer fits max_token_limit."""
+    messages = memory.chat_memory.messages
+    total = sum(count_message_tokens(m) for m in messages)
+    drop = 0
+    while total > memory.max_token_limit and drop < memory.summarized_count:
+        total -= count_message_tokens(messages[drop])
+        drop += 1
+    if drop:
+        memory.chat_memory.messages = messages[drop:]
+        memory.summarized_count -= drop
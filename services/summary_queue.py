@@ -0,0 +1,93 @@
+import asyncio
+from config.settings import SUMMARY_QUEUE_WORKERS, SUMMARY_QUEUE_MAXSIZE, SUMMARY_QUEUE_DRAIN_TIMEOUT
+from utils.metrics import registry
+from utils.logger import get_logger
+
+log = get_logger("summary_queue")
+
+
+class SummaryQueue:
+    """Runs post-turn summary jobs on a few background workers.
+
+    Jobs are keyed by (clerk_id, project_id, chat_type). A job submitted while an
+    earlier one for the same key is still waiting replaces it, and jobs for one key
+    never run concurrently, so the backend only ever sees the newest summary.
+    """
+
+    def __init__(self, workers: int, maxsize: int):
+        self.workers = workers
+        self._queue = asyncio.Queue(maxsize)
+        self._pending = {}
+        self._running = set()
+        self._tasks = []
+        self._closed = False
+        self.coalesced = 0
+
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def start(self):
+        """Reopen the queue on the running loop after a previous lifespan drained it."""
+        self._queue = asyncio.Queue(self._queue.maxsize)
+        self._pending.clear()
+        self._running.clear()
+        self._tasks = []
+        self._closed = False
+
+    def _ensure_workers(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def submit(self, key, job):
+        if self._closed:
+            await self._run(key, job)
+            return
+        self._ensure_workers()
+        if key in self._pending:
+            self._pending[key] = job
+            self.coalesced += 1
+            return
+        self._pending[key] = job
+        if key not in self._running:
+            # Blocks only when the queue is full, which pushes back on new turns.
+            await self._queue.put(key)
+
+    async def _run(self, key, job):
+        try:
+            await job()
+        except Exception as e:
+            log.error("❌ Summary job failed for %s: %s", key, e)
+
+    async def _worker(self):
+        while True:
+            key = await self._queue.get()
+            self._running.add(key)
+            try:
+                # Updates that arrive while this key is running are picked up here.
+                while key in self._pending:
+                    job = self._pending.pop(key)
+                    await self._run(key, job)
+            finally:
+                self._running.discard(key)
+                self._queue.task_done()
+
+    async def drain(self, timeout: float = SUMMARY_QUEUE_DRAIN_TIMEOUT):
+        self._closed = True
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            log.warning("⚠️ Summary queue drain timed out with %d jobs pending", self.depth())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def collect(self):
+        return [
+            ("summary_queue_depth", "gauge", "Summary jobs waiting for a worker.", self.depth()),
+            ("summary_queue_coalesced_total", "counter", "Summary jobs replaced by a newer one for the same key.", self.coalesced),
+        ]
+
+
+summary_queue = SummaryQueue(SUMMARY_QUEUE_WORKERS, SUMMARY_QUEUE_MAXSIZE)
+registry.collect(summary_queue.collect)
@@ -0,0 +1,187 @@
+import asyncio
+import random
+from config.settings import (
+    MONGO_API_BASE,
+    SUMMARY_FLUSH_INTERVAL,
+    SUMMARY_FLUSH_MAX_PENDING,
+    SUMMARY_BULK_PATH,
+    SUMMARY_BULK_MAX_ITEMS,
+    SUMMARY_WRITE_RETRIES,
+    SUMMARY_RETRY_BASE_DELAY,
+    SUMMARY_FLUSH_MAX_ATTEMPTS,
+)
+from utils.api_client import remember_summary, put_summary, put_summaries_bulk
+from utils.metrics import registry, timed
+from utils.logger import get_logger
+
+log = get_logger("summary_writer")
+
+
+class SummaryWriteBuffer:
+    """Write-behind buffer for summary saves to the Node backend.
+
+    Only the newest summary per (base_url, clerk_id, project_id, chat_type) is kept.
+    Pending summaries are flushed every `flush_interval` seconds or as soon as
+    `max_pending` keys are waiting, and once more on shutdown. A summary that
+    still fails after `max_attempts` flushes is dropped, so an outage does not
+    keep every flush retrying the same backlog.
+    """
+
+    def __init__(self, flush_interval: float, max_pending: int, bulk_path: str, retries: int, retry_delay: float, max_attempts: int = 5):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.bulk_path = bulk_path
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.max_attempts = max_attempts
+        self._pending = {}
+        # Key -> flushes its pending summary has failed.
+        self._attempts = {}
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = None
+        self.superseded = 0
+        self.written = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def start(self):
+        # asyncio primitives bind to the loop that first waits on them; a new
+        # lifespan runs on a new loop.
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+
+    def submit(self, clerk_id, project_id, chat_type, summary, base_url=MONGO_API_BASE):
+        key = (base_url, clerk_id, project_id, chat_type)
+        if key in self._pending:
+            self.superseded += 1
+        self._pending[key] = summary
+        self._attempts.pop(key, None)
+        remember_summary(clerk_id, project_id, chat_type, summary)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        if len(self._pending) >= self.max_pending:
+            self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                # Shielded so shutdown cannot cancel a flush that already took its batch.
+                await asyncio.shield(self.flush())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error("❌ Summary flush failed: %s", e)
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            failed = {}
+            with timed("save"):
+                if self.bulk_path:
+                    failed = await self._flush_bulk(batch)
+                else:
+                    results = await asyncio.gather(*(self._put_with_retry(key, summary) for key, summary in batch.items()))
+                    failed = {key: summary for (key, summary), ok in zip(batch.items(), results) if not ok}
+            self.written += len(batch) - len(failed)
+            for key in batch.keys() - failed.keys():
+                self._attempts.pop(key, None)
+            for key, summary in failed.items():
+                # A newer summary submitted during the flush wins over the failed one.
+                if key in self._pending:
+                    continue
+                attempts = self._attempts.get(key, 0) + 1
+                if attempts >= self.max_attempts:
+                    self._attempts.pop(key, None)
+                    self.dropped += 1
+                    log.error("❌ Dropping summary after %d failed flushes: %s", attempts, key[1:])
+                    continue
+                self._attempts[key] = attempts
+                self._pending[key] = summary
+
+    async def _put_with_retry(self, key, summary):
+        base_url, clerk_id, project_id, chat_type = key
+        for attempt in range(self.retries + 1):
+            if await put_summary(clerk_id, project_id, chat_type, summary, base_url):
+                return True
+            if attempt < self.retries:
+                await asyncio.sleep(random.uniform(0, self.retry_delay * 2 ** attempt))
+        self.failed += 1
+        return False
+
+    async def _flush_bulk(self, batch):
+        by_base = {}
+        for key, summary in batch.items():
+            by_base.setdefault(key[0], []).append((key, summary))
+
+        failed = {}
+        for base_url, entries in by_base.items():
+            for start in range(0, len(entries), SUMMARY_BULK_MAX_ITEMS):
+                chunk = entries[start:start + SUMMARY_BULK_MAX_ITEMS]
+                # Checked per chunk: a 404/405 earlier in this flush already switched to single PUTs.
+                if self.bulk_path:
+                    status = await self._post_bulk_with_retry(f"{base_url}/{self.bulk_path}", chunk)
+                    if status is not None and status < 400:
+                        continue
+                    if status not in (404, 405):
+                        self.failed += len(chunk)
+                        failed.update(chunk)
+                        continue
+                    log.warning("⚠️ Backend has no bulk summary endpoint, falling back to single PUTs")
+                    self.bulk_path = ""
+                results = await asyncio.gather(*(self._put_with_retry(key, summary) for key, summary in chunk))
+                failed.update({key: summary for (key, summary), ok in zip(chunk, results) if not ok})
+        return failed
+
+    async def _post_bulk_with_retry(self, url, chunk):
+        items = [
+            {"clerk_id": key[1], "project_id": key[2], "chat_type": key[3], "content": summary}
+            for key, summary in chunk
+        ]
+        status = None
+        for attempt in range(self.retries + 1):
+            status = await put_summaries_bulk(url, items)
+            if status is not None and (status < 400 or status in (404, 405)):
+                break
+            if attempt < self.retries:
+                await asyncio.sleep(random.uniform(0, self.retry_delay * 2 ** attempt))
+        return status
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+        if self._pending:
+            log.error("❌ Lost %d summaries that could not be saved on shutdown", len(self._pending))
+
+    def collect(self):
+        return [
+            ("summary_writes_pending", "gauge", "Summaries buffered for the next flush.", self.depth()),
+            ("summary_writes_superseded_total", "counter", "Buffered summaries replaced before they were sent.", self.superseded),
+            ("summary_writes_total", "counter", "Summaries saved to the backend.", self.written),
+            ("summary_write_failures_total", "counter", "Summary saves that failed after all retries.", self.failed),
+            ("summary_writes_dropped_total", "counter", "Summaries given up on after SUMMARY_FLUSH_MAX_ATTEMPTS failed flushes.", self.dropped),
+        ]
+
+
+summary_writer = SummaryWriteBuffer(
+    SUMMARY_FLUSH_INTERVAL,
+    SUMMARY_FLUSH_MAX_PENDING,
+    SUMMARY_BULK_PATH,
+    SUMMARY_WRITE_RETRIES,
+    SUMMARY_RETRY_BASE_DELAY,
+    SUMMARY_FLUSH_MAX_ATTEMPTS,
+)
+registry.collect(summary_writer.collect)
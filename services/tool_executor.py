@@ -0,0 +1,40 @@
+import asyncio
+import time
+from langchain_core.messages import ToolMessage
+from config.settings import TOOL_MAX_CONCURRENCY, TOOL_CALL_TIMEOUT
+from utils.metrics import tool_call_seconds
+from utils.logger import get_logger
+
+log = get_logger("tools")
+
+
+async def run_tool_calls(tool_calls, tools_by_name, max_concurrency: int = TOOL_MAX_CONCURRENCY, timeout: float = TOOL_CALL_TIMEOUT):
+    """Run one model step's tool calls concurrently.
+
+    A call that fails or times out becomes an error ToolMessage for the model to see
+    instead of failing the step. Results come back in the same order as tool_calls.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(tool_call):
+        tool_name = tool_call["name"]
+        tool_id = tool_call["id"]
+        tool = tools_by_name.get(tool_name)
+        if tool is None:
+            return ToolMessage(content=f"Error: unknown tool {tool_name}", tool_call_id=tool_id, name=tool_name, status="error")
+        try:
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    result = await asyncio.wait_for(tool.ainvoke(tool_call["args"]), timeout)
+                finally:
+                    tool_call_seconds.observe(time.perf_counter() - start, tool=tool_name)
+        except asyncio.TimeoutError:
+            log.warning("⚠️ Tool call timed out: %s", tool_name)
+            return ToolMessage(content=f"Error: {tool_name} timed out after {timeout:g}s", tool_call_id=tool_id, name=tool_name, status="error")
+        except Exception as e:
+            log.error("❌ Tool call failed: %s %s", tool_name, e)
+            return ToolMessage(content=f"Error: {tool_name} failed: {e}", tool_call_id=tool_id, name=tool_name, status="error")
+        return ToolMessage(content=str(result), tool_call_id=tool_id, name=tool_name)
+
+    return list(await asyncio.gather(*(run(tool_call) for tool_call in tool_calls)))
@@ -0,0 +1,64 @@
+import asyncio
+from itertools import cycle
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from config.settings import WARMUP_ENABLED, WARMUP_TIMEOUT
+from utils.api_client import get_client
+from utils.startup import phase, breakdown
+from utils.logger import get_logger, kv
+from prompts import prompt_registry, CHAT_TYPES
+
+log = get_logger("warmup")
+
+_hooks = []
+
+
+def on_warmup(name: str):
+    """Register an async warm-up step; the app that owns the graph adds its own."""
+    def register(fn):
+        _hooks.append((name, fn))
+        return fn
+    return register
+
+
+def stub_chat_model() -> GenericFakeChatModel:
+    """Answers every call with a short streamed reply, without touching the network."""
+    return GenericFakeChatModel(messages=cycle([AIMessage(content="Warm-up reply.")]))
+
+
+async def dry_run(graph, chat_type: str = CHAT_TYPES[0]):
+    """Stream one turn through `graph` the way chat_events does, and discard it."""
+    prompt = prompt_registry.get(chat_type)
+    config = {"configurable": {"thread_id": "warmup", "__system_prompt": prompt.text, "__system_tokens": prompt.tokens, "__summary": "Warm-up summary."}}
+    async for _ in graph.astream_events({"messages": [HumanMessage(content="hello")]}, version="v2", config=config):
+        pass
+
+
+async def warm_openai(*models):
+    """Open a connection in each distinct OpenAI connection pool (TLS handshake included)."""
+    # Models sharing an http_async_client share a pool; warm it once.
+    clients = {id(c._client): c for c in (getattr(m, "root_async_client", None) for m in models) if c is not None}
+    for client in clients.values():
+        await client.models.list()
+
+
+async def warm_backend(base_url: str):
+    # Any response will do; the point is a pooled keep-alive connection to the backend.
+    await get_client().get(base_url)
+
+
+async def warm_up():
+    """Run the registered steps before the worker takes traffic.
+
+    Apps register steps that open the backend and OpenAI connection pools
+    and dry-run their graph. A step that fails or takes longer than
+    WARMUP_TIMEOUT is logged and skipped; the worker still starts.
+    """
+    if WARMUP_ENABLED:
+        for name, fn in _hooks:
+            with phase(f"warmup_{name}"):
+                try:
+                    await asyncio.wait_for(fn(), WARMUP_TIMEOUT)
+                except Exception as e:
+                    log.warning("⚠️ Warm-up step failed", extra=kv(step=name, error=repr(e)))
+    log.info("🔥 Startup finished", extra=kv(**breakdown()))
@@ -0,0 +1,47 @@
+import hashlib
+from uuid import uuid4
+from config.settings import WORKER_ID, WORKER_COUNT
+
+# Set by the dispatcher when another worker served the thread's last turn, so the
+# receiving worker's cached session and checkpoint for it are out of date.
+MOVED_HEADER = "X-Thread-Moved"
+
+
+def worker_ids(count: int) -> list:
+    return [f"w{i}" for i in range(count)]
+
+
+def _score(worker: str, key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(f"{worker}:{key}".encode(), digest_size=8).digest(), "big")
+
+
+def rank(key: str, workers) -> list:
+    """Workers in preference order for `key` (rendezvous / highest-random-weight hashing).
+
+    The first is the owner. When it is down the key falls to the next one,
+    and only the keys that worker owned move; they move back when it returns.
+    """
+    return sorted(workers, key=lambda worker: _score(worker, key), reverse=True)
+
+
+def owner(key: str, workers) -> str:
+    return max(workers, key=lambda worker: _score(worker, key))
+
+
+def checkpoint_of(last_event_id: str) -> str:
+    """checkpoint_id part of an SSE id ("{checkpoint_id}:{seq}")."""
+    return last_event_id.rpartition(":")[0]
+
+
+def mint_checkpoint_id() -> str:
+    """A new checkpoint_id, owned by this worker when running behind the dispatcher.
+
+    Each try has a 1/WORKER_COUNT chance, so this takes WORKER_COUNT tries on average.
+    """
+    if not WORKER_ID or WORKER_COUNT <= 1:
+        return str(uuid4())
+    workers = worker_ids(WORKER_COUNT)
+    while True:
+        checkpoint_id = str(uuid4())
+        if owner(checkpoint_id, workers) == WORKER_ID:
+            return checkpoint_id
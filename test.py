@@ -12,12 +12,16 @@ from uuid import uuid4
 from langgraph.checkpoint.memory import MemorySaver
 from langchain.memory import ConversationSummaryBufferMemory
 import requests
+import logging
+from utils.logger import get_logger, kv
 from langchain_core.prompts import ChatPromptTemplate
+from prompts import get_prompt
 
 
 
 load_dotenv()
 
+log = get_logger("test")
 memory = MemorySaver()
 
 class State(TypedDict):
@@ -82,173 +86,6 @@ def serialise_ai_message_chunk(chunk):
     else:
         raise TypeError(f"Object of type {type(chunk).__name__} is not correctly formatted for serialisation")
 
-chat_type_prompts = {
-     "executive_summary": """
-You are a highly experienced business advisor with over 50 years of expertise in helping people start and grow successful businesses.
-
-You are conducting an onboarding session with a new client who wants to start a business. Your goal is to deeply understand their business idea by asking thoughtful, one-at-a-time questions.
-
-Your behavior depends on the client's input:
-
-1. If the client answers normally:
-- Ask one question at a time.
-- Questions should sound curious, calm, and professional.
-- Your goal is to explore what type of business they want to start, their motivation, target customers, goals, and available resources.
-- Do not give suggestions or advice unless explicitly asked.
-
-2. If the client asks for help, guidance, or suggestions:
-- Provide a brief, clear, and practical suggestion based on what they've shared so far.
-- Then revise what you understand from their response to confirm clarity.
-- First reply to their problem or request clearly in 5 points.
-- Then ask a question to continue.
-- After that, resume onboarding with the next relevant question to gather more detail.
-
-Tone:
-- Calm, respectful, experienced, and professional.
-- Show genuine interest in their business vision.
-- Use plain language (avoid jargon or overly technical terms).
-
-Start the session like this:
-- If the user says "hello" or greets casually, reply: 
-  "Hello! Let's get started with your executive summary."
-  Then continue with:
-  "To begin, could you please tell me a bit about the kind of business you're thinking of starting?"
-
-- Otherwise, just begin with:
-  "Thank you for connecting with me. To begin, could you please tell me a bit about the kind of business you're thinking of starting?"
-"""
-,
-
-    
-    "market_analysis": """
-You are a highly experienced market research advisor with over 50 years of expertise in helping entrepreneurs understand their target markets, analyze customer needs, and evaluate competition effectively.
-
-You are conducting a market analysis session with a new client who wants to better understand the business environment for their product or service. Your goal is to explore their understanding of the market by asking thoughtful, one-at-a-time questions.
-
-Your behavior depends on the client's input:
-
-1. If the client answers normally:
-- Ask one question at a time.
-- Questions should sound curious, calm, and professional.
-- Your goal is to explore:
-  - Who their target customers are
-  - What problems or needs the business will solve
-  - What they know about their competition
-  - Any market trends or opportunities they've identified
-  - How they plan to position or price their product or service
-- Do not offer suggestions or advice unless explicitly asked.
-
-2. If the client asks for help, guidance, or suggestions:
-- Provide a brief, clear, and practical response in 5 bullet points, based on what they've shared so far.
-- Then summarize what you understand from their response to confirm alignment.
-- After that, ask one relevant follow-up question to continue the analysis.
-
-Tone:
-- Calm, respectful, and analytical.
-- Show genuine interest in their market and business vision.
-- Use simple, clear language without technical jargon.
-
-Begin the market analysis session with this first question:
-"Thank you for joining this session. To start, could you describe who your ideal customer is and what specific need or problem your product or service will address in the market?"
-""",
-
-    "marketing_strategy": """
-You are a highly experienced marketing strategist with over 50 years of expertise in helping entrepreneurs create effective, customer-focused marketing plans.
-
-You are conducting a marketing strategy session with a client who wants to attract, engage, and convert their target customers. Your goal is to understand their current thinking and guide them through key aspects of building a strong marketing strategy by asking thoughtful, one-at-a-time questions.
-
-Your behavior depends on the client's input:
-
-1. If the client answers normally:
-- Ask one question at a time.
-- Questions should sound curious, calm, and professional.
-- Your goal is to explore:
-  - Their unique value proposition
-  - Their ideal customer profile
-  - The channels they plan to use (online/offline)
-  - Their messaging and brand positioning
-  - Any current marketing efforts or ideas they already have
-- Do not offer suggestions or advice unless explicitly asked.
-
-2. If the client asks for help, guidance, or suggestions:
-- Provide a brief, clear, and practical response in 5 bullet points, based on what they've shared so far.
-- Then summarize what you understand from their response to confirm alignment.
-- After that, ask one relevant follow-up question to continue the strategy session.
-
-Tone:
-- Calm, respectful, and strategic.
-- Show genuine interest in helping them reach the right audience.
-- Use plain language and avoid marketing jargon unless they are familiar with it.
-
-Begin the marketing strategy session with this first question:
-"Thanks for joining this session. To begin, how would you describe what makes your product or service different or valuable to your target customer?"
-"""
-,
-    "financial_projection": """
-You are a highly experienced financial advisor with over 50 years of expertise in helping entrepreneurs create clear and realistic financial projections for their businesses.
-
-You are conducting a financial projection session with a client who is planning or starting a business. Your goal is to understand their financial thinking and guide them through the core components of projecting income, expenses, and profitability by asking thoughtful, one-at-a-time questions.
-
-Your behavior depends on the client's input:
-
-1. If the client answers normally:
-- Ask one question at a time.
-- Questions should sound curious, calm, and professional.
-- Your goal is to explore:
-  - Their expected sources of revenue
-  - Their pricing strategy and sales forecast
-  - Estimated fixed and variable costs
-  - Break-even point and funding needs
-  - Timeline for reaching profitability
-- Do not offer suggestions or advice unless explicitly asked.
-
-2. If the client asks for help, guidance, or suggestions:
-- Provide a brief, clear, and practical response in 5 bullet points, based on what they've shared so far.
-- Then summarize what you understand from their response to confirm clarity.
-- After that, ask one relevant follow-up question to continue building the projection.
-
-Tone:
-- Calm, respectful, and focused.
-- Show genuine interest in helping them create a strong financial foundation.
-- Use plain, non-technical language—avoid jargon unless they are familiar with it.
-
-Begin the financial projection session with this first question:
-"Thanks for joining. To begin, could you share what revenue streams you expect your business to have in the first year?"
-"""
-,
-    "implementation_timeline": """
-You are a highly experienced operations and execution advisor with over 50 years of expertise in helping entrepreneurs turn their business plans into clear, realistic action timelines.
-
-You are conducting an implementation timeline session with a client who wants to organize and schedule the steps required to launch and grow their business. Your goal is to understand their planned activities, sequence of tasks, and resource planning by asking thoughtful, one-at-a-time questions.
-
-Your behavior depends on the client's input:
-
-1. If the client answers normally:
-- Ask one question at a time.
-- Questions should sound curious, calm, and professional.
-- Your goal is to explore:
-  - What key milestones they've identified (e.g., product development, hiring, marketing launch)
-  - How long they expect each phase to take
-  - Dependencies between tasks or activities
-  - Team roles or support needed for implementation
-  - Their overall launch or growth timeline
-- Do not offer suggestions or advice unless explicitly asked.
-
-2. If the client asks for help, guidance, or suggestions:
-- Provide a brief, clear, and practical response in 5 bullet points, based on what they've shared so far.
-- Then summarize what you understand from their response to confirm clarity.
-- After that, ask one relevant follow-up question to continue the planning discussion.
-
-Tone:
-- Calm, respectful, and organized.
-- Show genuine interest in helping them create a practical, achievable roadmap.
-- Use simple, action-focused language—avoid project management jargon unless they are familiar with it.
-
-Begin the implementation timeline session with this first question:
-"Thanks for being here. To begin, could you walk me through the major steps you think you'll need to take to get your business up and running?"
-"""
-
-}
 
 summary_prompt = ChatPromptTemplate.from_template(
     "You are summarizing a chat with a client. Extract only **one most important insight** in the **fewest words possible**.\n\nCurrent summary:\n{summary}\nNew lines:\n{new_lines}"
@@ -259,9 +96,9 @@ memory_store = {}
 
 
 async def generate_chat_responses(message: str, checkpoint_id: Optional[str], clerk_id: Optional[str], project_id: Optional[str], chat_type: str):
-    print("🔵 Incoming user message:", message)
+    log.debug("🔵 Incoming user message", extra=kv(checkpoint_id=checkpoint_id, chars=len(message)))
     is_new_conversation = checkpoint_id is None
-    system_prompt = chat_type_prompts.get(chat_type, "You are a helpful assistant.")
+    system_prompt = get_prompt(chat_type)
     summary_text = ""
 
     # Always try to fetch summary data if we have the required parameters
@@ -272,23 +109,23 @@ async def generate_chat_responses(message: str, checkpoint_id: Optional[str], cl
             if res.status_code == 200:
                 summary_data = res.json()
                 summary_text = summary_data.get("content", "")
-                print("📥 Retrieved summary:", summary_text)
+                log.info("📥 Retrieved summary", extra=kv(chars=len(summary_text)))
             else:
-                print("⚠️ No summary found. Status:", res.status_code)
+                log.info("⚠️ No summary found.", extra=kv(status=res.status_code))
         except Exception as e:
-            print("❌ Error fetching summary:", e)
+            log.error("❌ Error fetching summary: %s", e)
 
     # Create or get memory object
     if is_new_conversation:
         checkpoint_id = str(uuid4())
-        print("🆕 New conversation. Assigned checkpoint_id:", checkpoint_id)
+        log.info("🆕 New conversation", extra=kv(checkpoint_id=checkpoint_id))
         yield f"data: {json.dumps({'type': 'checkpoint', 'checkpoint_id': checkpoint_id})}\n\n"
     else:
-        print("🟢 Resuming conversation with checkpoint_id:", checkpoint_id)
+        log.info("🟢 Resuming conversation", extra=kv(checkpoint_id=checkpoint_id))
 
     # Initialize or retrieve memory
     if checkpoint_id not in memory_store:
-        print("📦 Creating new memory for checkpoint:", checkpoint_id)
+        log.debug("📦 Creating new memory", extra=kv(checkpoint_id=checkpoint_id))
         memory_store[checkpoint_id] = ConversationSummaryBufferMemory(
             llm=llm,
             max_token_limit=1000,
@@ -299,10 +136,10 @@ async def generate_chat_responses(message: str, checkpoint_id: Optional[str], cl
         
         # If we have summary text, initialize the memory buffer with it
         if summary_text:
-            print("🧠 Initializing memory with existing summary")
+            log.debug("🧠 Initializing memory with existing summary", extra=kv(checkpoint_id=checkpoint_id))
             memory_store[checkpoint_id].moving_summary_buffer = summary_text
     else:
-        print("📥 Loaded existing memory for checkpoint:", checkpoint_id)
+        log.debug("📥 Loaded existing memory", extra=kv(checkpoint_id=checkpoint_id))
 
     memory = memory_store[checkpoint_id]
 
@@ -317,15 +154,17 @@ async def generate_chat_responses(message: str, checkpoint_id: Optional[str], cl
 
     config = {"configurable": {"thread_id": checkpoint_id}}
 
-    print("⚙️ Starting LangGraph stream...")
+    log.debug("⚙️ Starting LangGraph stream", extra=kv(checkpoint_id=checkpoint_id))
     events = graph.astream_events({"messages": initial_messages}, version="v2", config=config)
 
     ai_response = ""
     streamed = False
+    debug = log.isEnabledFor(logging.DEBUG)
 
     async for event in events:
         event_type = event["event"]
-        print("📡 Received event:", event_type)
+        if debug:
+            log.debug("📡 Received event", extra=kv("stream_event", checkpoint_id=checkpoint_id, event=event_type))
 
         if event_type == "on_chat_model_stream":
             streamed = True
@@ -334,25 +173,23 @@ async def generate_chat_responses(message: str, checkpoint_id: Optional[str], cl
             yield f"data: {json.dumps({'type': 'content', 'content': chunk_content})}\n\n"
 
         elif event_type == "on_chat_model_end":
-            print("✅ Finished AI generation")
             tool_calls = getattr(event["data"]["output"], "tool_calls", [])
             search_calls = [call for call in tool_calls if call["name"] == "tavily_search_results_json"]
             if search_calls:
                 search_query = search_calls[0]["args"].get("query", "")
-                print("🔍 Search tool used for query:", search_query)
+                log.info("🔍 Search tool used", extra=kv(checkpoint_id=checkpoint_id, query=search_query))
                 yield f"data: {json.dumps({'type': 'search_start', 'query': search_query})}\n\n"
 
         elif event_type == "on_tool_end" and event["name"] == "tavily_search_results_json":
             output = event["data"]["output"]
             if isinstance(output, list):
                 urls = [item["url"] for item in output if isinstance(item, dict) and "url" in item]
-                print("🔗 Search results URLs:", urls)
+                log.debug("🔗 Search results", extra=kv(checkpoint_id=checkpoint_id, urls=urls))
                 yield f"data: {json.dumps({'type': 'search_results', 'urls': urls})}\n\n"
 
-    print("🧠 Updating memory with user + AI messages")
     memory.chat_memory.add_user_message(message)
     memory.chat_memory.add_ai_message(ai_response)
-    print("🧠 Total messages in memory:", len(memory.chat_memory.messages))
+    log.debug("🧠 Updated memory", extra=kv(checkpoint_id=checkpoint_id, messages=len(memory.chat_memory.messages)))
 
     # Generate updated summary
     try:
@@ -360,24 +197,23 @@ async def generate_chat_responses(message: str, checkpoint_id: Optional[str], cl
         current_summary = getattr(memory, 'moving_summary_buffer', '')
         new_summary = memory.predict_new_summary(memory.chat_memory.messages, current_summary)
         memory.moving_summary_buffer = new_summary
-        print("📘 Updated summary generated:\n", new_summary)
+        log.debug("📘 Updated summary generated", extra=kv(checkpoint_id=checkpoint_id, summary=new_summary))
         summary_to_save = new_summary
     except Exception as e:
         # Fallback: use existing summary if available
         summary_to_save = getattr(memory, 'moving_summary_buffer', '')
-        print("❌ Error generating new summary, using existing:", e)
+        log.error("❌ Error generating new summary, using existing: %s", e)
 
     # Save summary to backend
     if summary_to_save and clerk_id and project_id and chat_type:
         payload = {"content": summary_to_save}
         put_url = f"http://192.168.1.33:5000/api/v1/chats/save-type-summary/{clerk_id}/{project_id}/{chat_type}"
 
-        print("📤 Sending PUT request to node backend to update type summarised data...")
         try:
             response = requests.put(put_url, json=payload)
-            print("✅ PUT response:", response.status_code, response.text)
+            log.debug("✅ PUT response", extra=kv(status=response.status_code, body=response.text))
         except Exception as e:
-            print("❌ Failed to send to node backend to update type summarised data:", e)
+            log.error("❌ Failed to send to node backend to update type summarised data: %s", e)
 
     yield f"data: {json.dumps({'type': 'end'})}\n\n"
 
@@ -0,0 +1,15 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Settings are read at import time; keep the suite offline and off the real data/ directory.
+_data_dir = tempfile.mkdtemp(prefix="chat-tests-")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("TAVILY_API_KEY", "tvly-test")
+os.environ.setdefault("CHECKPOINT_DB_PATH", os.path.join(_data_dir, "checkpoints.sqlite"))
+os.environ.setdefault("SEARCH_CACHE_PATH", "")
+os.environ.setdefault("WARMUP_ENABLED", "false")
+os.environ.setdefault("MONGO_API_BASE", "http://backend/api/v1/chats")
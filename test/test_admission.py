@@ -0,0 +1,103 @@
+import asyncio
+import httpx
+import pytest
+from services.admission import AdmissionController, Rejected
+
+
+def controller(**kwargs):
+    options = dict(max_inflight=2, per_clerk=0, per_project=0, max_waiting=10, wait_timeout=1)
+    options.update(kwargs)
+    return AdmissionController(**options)
+
+
+def test_per_clerk_cap_rejects_at_once():
+    async def scenario():
+        admission = controller(per_clerk=1)
+        ticket = await admission.acquire("c", "p1")
+        with pytest.raises(Rejected) as rejected:
+            await admission.acquire("c", "p2")
+        other = await admission.acquire("other", "p1")
+        admission.release(ticket)
+        admission.release(other)
+        return rejected.value, admission
+
+    rejected, admission = asyncio.run(scenario())
+    assert rejected.reason == "clerk_limit" and rejected.retry_after >= 1
+    assert admission.inflight == 0 and not admission._clerks
+
+
+def test_global_cap_queues_in_fifo_order():
+    async def scenario():
+        admission = controller(max_inflight=1)
+        first = await admission.acquire("a", "p")
+        order = []
+
+        async def wait(clerk):
+            ticket = await admission.acquire(clerk, "p")
+            order.append(clerk)
+            admission.release(ticket)
+
+        waiters = [asyncio.create_task(wait(clerk)) for clerk in ("b", "c", "d")]
+        await asyncio.sleep(0)
+        assert admission.depth() == 3
+        admission.release(first)
+        await asyncio.gather(*waiters)
+        return order, admission.inflight
+
+    assert asyncio.run(scenario()) == (["b", "c", "d"], 0)
+
+
+def test_queue_timeout_and_full_queue():
+    async def scenario():
+        admission = controller(max_inflight=1, max_waiting=1, wait_timeout=0.05)
+        ticket = await admission.acquire("a", "p")
+        waiting = asyncio.create_task(admission.acquire("b", "p"))
+        await asyncio.sleep(0)
+        with pytest.raises(Rejected) as full:
+            await admission.acquire("c", "p")
+        with pytest.raises(Rejected) as timed_out:
+            await waiting
+        admission.release(ticket)
+        return full.value.reason, timed_out.value.reason, admission
+
+    full, timed_out, admission = asyncio.run(scenario())
+    assert (full, timed_out) == ("queue_full", "queue_timeout")
+    assert admission.inflight == 0 and admission.depth() == 0
+
+
+def test_cancelled_waiter_gives_its_slot_back():
+    async def scenario():
+        admission = controller(max_inflight=1)
+        ticket = await admission.acquire("a", "p")
+        waiting = asyncio.create_task(admission.acquire("b", "p"))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        admission.release(ticket)
+        return admission
+
+    admission = asyncio.run(scenario())
+    assert admission.inflight == 0 and admission.depth() == 0
+
+
+def test_same_checkpoint_cannot_queue_twice(monkeypatch):
+    main = pytest.importorskip("main")
+    from routers import chat_router
+
+    admission = controller(max_inflight=1, wait_timeout=0.2)
+    monkeypatch.setattr(chat_router, "admission", admission)
+    params = {"message": "hi", "checkpoint_id": "thread-1", "clerk_id": "c", "project_id": "p", "chat_type": "default"}
+
+    async def scenario():
+        # Every slot is taken, so both requests would wait for admission.
+        await admission.acquire("someone", "else")
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+            first = asyncio.create_task(client.get("/chat_stream", params=params))
+            await asyncio.sleep(0.05)
+            second = await client.get("/chat_stream", params=params)
+            first = await first
+            # The reservation is released once the first request gives up.
+            third = await client.get("/chat_stream", params=params)
+        return first.status_code, second.status_code, third.status_code
+
+    assert asyncio.run(scenario()) == (429, 409, 429)
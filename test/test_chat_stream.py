@@ -0,0 +1,91 @@
+import asyncio
+import json
+import httpx
+import pytest
+from bench.fakes import FakeStreamingChatModel, FakeTavilySearchAPIWrapper, create_fake_backend
+
+main = pytest.importorskip("main")
+from services import langgraph_engine, summarizer  # noqa: E402
+from tools.tavily_tool import search_tool  # noqa: E402
+from services.worker_routing import MOVED_HEADER  # noqa: E402
+from utils.http_pools import http_pools  # noqa: E402
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    """Fake OpenAI, Tavily and Node backend, wired in the way bench.serve does it."""
+    monkeypatch.setattr(langgraph_engine, "llm_with_tools", FakeStreamingChatModel(tokens_per_second=0, reply_tokens=5, first_token_delay=0))
+    monkeypatch.setattr(summarizer, "summary_llm", FakeStreamingChatModel(tokens_per_second=0, reply_tokens=3, first_token_delay=0))
+    monkeypatch.setattr(search_tool, "api_wrapper", FakeTavilySearchAPIWrapper(tavily_api_key="tvly-test", latency=0))
+    fake = create_fake_backend(latency=0)
+    monkeypatch.setitem(http_pools._clients, "backend", httpx.AsyncClient(transport=httpx.ASGITransport(app=fake)))
+    return fake
+
+
+def frames(text):
+    return [json.loads(line[5:]) for line in text.splitlines() if line.startswith("data:")]
+
+
+def run_turns(*turns):
+    """Run turns through main.app inside its lifespan; each turn maps the earlier results to query params (and headers)."""
+    async def scenario():
+        results = []
+        async with main.app.router.lifespan_context(main.app):
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test", timeout=30) as client:
+                for turn in turns:
+                    request = turn(results)
+                    params, headers = request if isinstance(request, tuple) else (request, None)
+                    response = await client.get("/chat_stream", params=params, headers=headers)
+                    results.append((response.status_code, frames(response.text)))
+        return results
+
+    return asyncio.run(scenario())
+
+
+def params(message, checkpoint_id=None):
+    values = {"message": message, "clerk_id": "clerk", "project_id": "project", "chat_type": "executive_summary"}
+    if checkpoint_id:
+        values["checkpoint_id"] = checkpoint_id
+    return values
+
+
+def test_new_conversation_and_follow_up(backend):
+    results = run_turns(
+        lambda _: params("I want to open a bakery"),
+        lambda previous: params("Who are my customers?", previous[0][1][0]["checkpoint_id"]),
+    )
+    (status, first), (follow_status, follow_up) = results
+    assert status == follow_status == 200
+
+    assert first[0]["type"] == "checkpoint"
+    assert {f["type"] for f in first[1:-1]} == {"content"} and first[-1]["type"] == "end"
+    # The final usage-only chunk arrives as an empty content frame.
+    assert len([f for f in first if f.get("content")]) == 5
+    assert "checkpoint" not in [f["type"] for f in follow_up]
+    assert follow_up[-1]["type"] == "end"
+
+    # The summary is flushed to the backend by shutdown at the latest.
+    assert list(backend.state.summaries) == [("clerk", "project", "executive_summary")]
+
+
+def test_search_results_are_streamed(backend):
+    langgraph_engine.llm_with_tools.tool_call_rate = 1.0
+    (status, turn), = run_turns(lambda _: params("Find bakeries near me"))
+    assert status == 200
+    types = [f["type"] for f in turn]
+    assert "search_results" in types and types[-1] == "end"
+    results = next(f for f in turn if f["type"] == "search_results")
+    assert len(results["urls"]) == 4 and results["cached"] is False
+
+
+def test_moved_thread_rebuilds_its_session(backend):
+    store = langgraph_engine.memory_store
+    misses = store.misses
+    results = run_turns(
+        lambda _: params("I want to open a bakery"),
+        lambda previous: params("Who are my customers?", previous[0][1][0]["checkpoint_id"]),
+        lambda previous: (params("What should I charge?", previous[0][1][0]["checkpoint_id"]), {MOVED_HEADER: "1"}),
+    )
+    assert [status for status, _ in results] == [200, 200, 200]
+    # The follow-up reuses the session; the turn after the thread moved rebuilds it.
+    assert store.misses - misses == 2
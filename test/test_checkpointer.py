@@ -0,0 +1,155 @@
+import asyncio
+import threading
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.base import create_checkpoint, empty_checkpoint
+from langgraph.graph import StateGraph
+from models.state import State
+from services.checkpointer import CheckpointBackend, PersistentSaver, SqliteBackend
+
+
+def saver_at(path, **kwargs):
+    return PersistentSaver(SqliteBackend(str(path)), **kwargs)
+
+
+def config(thread_id, checkpoint_id=None):
+    configurable = {"thread_id": thread_id, "checkpoint_ns": ""}
+    if checkpoint_id:
+        configurable["checkpoint_id"] = checkpoint_id
+    return {"configurable": configurable}
+
+
+def put_step(saver, thread_id, step, parent=None):
+    checkpoint = create_checkpoint(empty_checkpoint(), None, step)
+    checkpoint["channel_values"] = {"step": step}
+    return saver.put(config(thread_id, parent), checkpoint, {"step": step}, {})
+
+
+def echo_graph(saver):
+    async def reply(state: State):
+        return {"messages": [AIMessage(content=f"echo {len(state['messages'])}")]}
+
+    builder = StateGraph(State)
+    builder.add_node("reply", reply)
+    builder.set_entry_point("reply")
+    return builder.compile(checkpointer=saver)
+
+
+def test_backend_is_abstract():
+    with pytest.raises(TypeError):
+        CheckpointBackend()
+
+
+def test_put_get_list_and_writes(tmp_path):
+    saver = saver_at(tmp_path / "c.sqlite", keep_latest=0)
+    first = put_step(saver, "t", 1)
+    second = put_step(saver, "t", 2, first["configurable"]["checkpoint_id"])
+    saver.put_writes(second, [("messages", "pending")], "task-1")
+
+    latest = saver.get_tuple(config("t"))
+    assert latest.checkpoint["channel_values"] == {"step": 2}
+    assert latest.parent_config["configurable"]["checkpoint_id"] == first["configurable"]["checkpoint_id"]
+    assert latest.pending_writes == [("task-1", "messages", "pending")]
+
+    older = saver.get_tuple(first)
+    assert older.checkpoint["channel_values"] == {"step": 1}
+    assert [t.metadata["step"] for t in saver.list(config("t"))] == [2, 1]
+    assert [t.metadata["step"] for t in saver.list(config("t"), limit=1)] == [2]
+    assert [t.metadata["step"] for t in saver.list(None, filter={"step": 1})] == [1]
+    saver.close()
+
+
+def test_state_survives_a_restart(tmp_path):
+    path = tmp_path / "c.sqlite"
+
+    async def turn(saver, text):
+        return await echo_graph(saver).ainvoke({"messages": [HumanMessage(content=text)]}, config("thread"))
+
+    saver = saver_at(path)
+    asyncio.run(turn(saver, "hello"))
+    saver.close()
+
+    restarted = saver_at(path)
+    result = asyncio.run(turn(restarted, "again"))
+    assert [m.content for m in result["messages"]] == ["hello", "echo 1", "again", "echo 3"]
+    assert restarted.cache_misses == 1
+    restarted.close()
+
+
+def test_prune_runs_in_batches(tmp_path):
+    saver = saver_at(tmp_path / "c.sqlite", keep_latest=2, prune_every=5)
+    parent = None
+    for step in range(4):
+        parent = put_step(saver, "t", step, parent and parent["configurable"]["checkpoint_id"])
+    assert len(list(saver.list(config("t")))) == 4
+    put_step(saver, "t", 4, parent["configurable"]["checkpoint_id"])
+    assert [t.metadata["step"] for t in saver.list(config("t"))] == [4, 3]
+    saver.close()
+
+
+def test_close_prunes_pending_threads(tmp_path):
+    path = tmp_path / "c.sqlite"
+    saver = saver_at(path, keep_latest=1, prune_every=100)
+    for step in range(3):
+        put_step(saver, "t", step)
+    saver.close()
+    assert len(list(saver_at(path).list(config("t")))) == 1
+
+
+def test_delete_thread(tmp_path):
+    saver = saver_at(tmp_path / "c.sqlite")
+    put_step(saver, "a", 1)
+    put_step(saver, "b", 1)
+    saver.delete_thread("a")
+    assert saver.get_tuple(config("a")) is None
+    assert saver.get_tuple(config("b")) is not None
+
+
+def test_cache_is_safe_across_threads(tmp_path):
+    saver = saver_at(tmp_path / "c.sqlite", cache_size=8, keep_latest=3, prune_every=4)
+    errors = []
+
+    def hammer(worker):
+        try:
+            for i in range(50):
+                thread_id = f"t{(worker + i) % 12}"
+                put_step(saver, thread_id, i)
+                saver.get_tuple(config(thread_id))
+                if i % 10 == 0:
+                    saver.delete_thread(thread_id)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=hammer, args=(n,)) for n in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert len(saver._cache) <= 8
+
+
+def test_checkpoint_metadata_leaves_out_prompt_and_summary(tmp_path):
+    from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+    from services import langgraph_engine
+    from services.warmup import dry_run
+
+    seen = []
+
+    class RecordingModel(GenericFakeChatModel):
+        async def ainvoke(self, messages, *args, **kwargs):
+            seen.append(messages)
+            return await super().ainvoke(messages, *args, **kwargs)
+
+    saver = saver_at(tmp_path / "checkpoints.sqlite")
+    graph = langgraph_engine.build_graph(RecordingModel(messages=iter([AIMessage(content="hi")])), checkpointer=saver)
+    asyncio.run(dry_run(graph))
+
+    # The model still gets them from the config...
+    assert seen[0][0].content.strip() and "Warm-up summary." in seen[0][-2].content
+    # ...but no checkpoint stores them.
+    checkpoints = list(saver.list(config("warmup")))
+    assert checkpoints
+    for checkpoint in checkpoints:
+        assert not {"system_prompt", "summary", "system_tokens"} & checkpoint.metadata.keys()
+        assert "Warm-up summary." not in repr(checkpoint.metadata)
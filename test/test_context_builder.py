@@ -0,0 +1,53 @@
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from services.context_builder import build_context, drop_unanswered_tool_calls
+from utils import tokens
+
+
+def history(turns):
+    messages = []
+    for i in range(turns):
+        messages += [HumanMessage(content=f"question {i} " * 50, id=f"h{i}"), AIMessage(content=f"answer {i} " * 50, id=f"a{i}")]
+    return messages + [HumanMessage(content="current", id="current")]
+
+
+def test_layout_and_trimming():
+    messages = history(20)
+    context = build_context("system", "the summary", messages, budget=1500)
+    assert isinstance(context[0], SystemMessage) and context[0].content == "system"
+    assert context[-2].content == "Previous conversation summary: the summary"
+    assert context[-1].id == "current"
+    assert len(context) < len(messages)
+    # Older context starts at a user message.
+    assert isinstance(context[1], HumanMessage)
+
+
+def test_stored_history_is_tokenized_once(monkeypatch):
+    messages = history(10)
+    build_context("system", "", messages)
+    calls = []
+    real = tokens.count_tokens
+    monkeypatch.setattr(tokens, "count_tokens", lambda text, model=tokens.TOKENIZER_MODEL: calls.append(text) or real(text, model))
+    build_context("system", "", messages)
+    # Only the per-call system message is counted again.
+    assert calls == ["system"]
+
+
+def test_replaced_message_is_recounted():
+    message = AIMessage(content="short", id="same")
+    before = tokens.count_message_tokens(message)
+    after = tokens.count_message_tokens(AIMessage(content="a much longer reply " * 20, id="same"))
+    assert after > before
+
+
+def call(call_id):
+    return {"name": "search", "args": {"query": "q"}, "id": call_id}
+
+
+def test_unanswered_tool_calls_are_dropped():
+    answered = [HumanMessage(content="q1"), AIMessage(content="", tool_calls=[call("a")]), ToolMessage(content="r", tool_call_id="a"), AIMessage(content="done")]
+    # Cancelled mid-tool: one call of two answered before the turn stopped.
+    cancelled = [HumanMessage(content="q2"), AIMessage(content="", tool_calls=[call("b"), call("c")]), ToolMessage(content="r", tool_call_id="b")]
+    current = [HumanMessage(content="q3")]
+    assert drop_unanswered_tool_calls(answered + cancelled + current) == answered + cancelled[:1] + current
+    history = answered + current
+    assert drop_unanswered_tool_calls(history) is history
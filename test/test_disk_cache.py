@@ -0,0 +1,29 @@
+from utils import cache
+from utils.cache import DiskCache
+
+
+def rows(disk):
+    return disk._conn.execute("SELECT key FROM cache ORDER BY key").fetchall()
+
+
+def test_purge_drops_expired_and_excess_rows(tmp_path):
+    disk = DiskCache(str(tmp_path / "c.sqlite"), max_rows=2)
+    disk.set("expired", 1, ttl=-1)
+    disk.set("soon", 2, ttl=10)
+    disk.set("later", 3, ttl=20)
+    disk.set("latest", 4, ttl=30)
+    assert disk.purge() == 2
+    assert rows(disk) == [("later",), ("latest",)]
+    assert disk.get("latest")[0] == 4
+
+
+def test_purges_every_n_sets(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    disk = DiskCache(str(tmp_path / "c.sqlite"), purge_every=3)
+    disk.set("a", 1, ttl=5)
+    disk.set("b", 2, ttl=5)
+    now[0] += 10
+    assert len(rows(disk)) == 2
+    disk.set("c", 3, ttl=5)
+    assert rows(disk) == [("c",)]
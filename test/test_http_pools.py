@@ -0,0 +1,48 @@
+import asyncio
+import httpx
+import pytest
+from utils.http_pools import HttpPools
+
+
+def _pools():
+    pools = HttpPools()
+    pools.register("upstream", 4, 5.0, 1.0, 5.0)
+    pools.register("kept", 4, 5.0, 1.0, 5.0)
+    return pools
+
+
+def test_aclose_rebuilds_per_call_clients_and_keeps_handed_out_ones():
+    async def scenario():
+        pools = _pools()
+        upstream = pools.get("upstream")
+        kept = pools.get("kept", keep_open=True)
+        assert pools.get("upstream") is upstream
+        await pools.aclose()
+        assert upstream.is_closed and not kept.is_closed
+        assert pools.get("upstream") is not upstream
+        # Looked up again without keep_open, it is still the client the model holds.
+        assert pools.get("kept") is kept
+        await pools.aclose()
+        assert not kept.is_closed
+        await kept.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_occupancy_falls_back_to_zeros():
+    pools = _pools()
+    assert pools._occupancy(pools.get("upstream")) == (0, 0, 0)
+    assert pools._occupancy(httpx.AsyncClient(transport=httpx.MockTransport(lambda r: httpx.Response(200)))) == (0, 0, 0)
+    assert pools._occupancy(object()) == (0, 0, 0)
+
+
+def test_chat_model_client_survives_a_second_lifespan():
+    main = pytest.importorskip("main")
+    from services import langgraph_engine
+
+    async def scenario():
+        for _ in range(2):
+            async with main.app.router.lifespan_context(main.app):
+                assert not langgraph_engine.llm.http_async_client.is_closed
+
+    asyncio.run(scenario())
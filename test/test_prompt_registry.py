@@ -0,0 +1,43 @@
+import os
+from prompts.registry import PromptRegistry
+
+
+def _registry(tmp_path, **prompts):
+    for name, text in {"default": "Default prompt.", **prompts}.items():
+        (tmp_path / f"{name}.txt").write_text(text, encoding="utf-8")
+    return PromptRegistry(str(tmp_path), reload_interval=0)
+
+
+def test_known_chat_type_is_loaded_and_cached(tmp_path):
+    registry = _registry(tmp_path, market_analysis="Analyse the market.")
+    prompt = registry.get("market_analysis")
+    assert prompt.text == "Analyse the market."
+    assert registry.get("market_analysis") is prompt
+
+
+def test_unknown_chat_type_falls_back_to_default_without_caching(tmp_path):
+    registry = _registry(tmp_path)
+    assert registry.get("no_such_type").name == "default"
+    assert set(registry._prompts) == {"default"}
+
+
+def test_path_traversal_is_rejected(tmp_path):
+    outside = tmp_path / "secret.txt"
+    outside.write_text("Leaked.", encoding="utf-8")
+    directory = tmp_path / "templates"
+    directory.mkdir()
+    registry = _registry(directory)
+    for chat_type in ("../secret", f"..{os.sep}secret", str(tmp_path / "secret"), "sub/../../secret", ".."):
+        assert registry.get(chat_type).text == "Default prompt."
+    assert set(registry._prompts) == {"default"}
+
+
+def test_unknown_chat_type_does_not_touch_the_disk(tmp_path, monkeypatch):
+    registry = _registry(tmp_path)
+    registry.validate(required=())
+    opened = []
+    monkeypatch.setattr(registry, "_load", lambda name: opened.append(name))
+    monkeypatch.setattr(registry, "names", lambda: opened.append("listdir") or [])
+    for _ in range(3):
+        assert registry.get("no_such_type").name == "default"
+    assert opened == []
@@ -0,0 +1,123 @@
+import asyncio
+import httpx
+import openai
+import pytest
+from langchain_core.messages import AIMessage
+from services.rate_limiter import BACKGROUND, INTERACTIVE, RateLimitScheduler, TokenBucket, parse_reset
+
+REQUEST = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+
+
+def scheduler(rpm=60, tpm=100000, retries=2):
+    return RateLimitScheduler("test-model", rpm, tpm, retries=retries, base_delay=0.001)
+
+
+def rate_limit_error(**headers):
+    return openai.RateLimitError("rate limited", response=httpx.Response(429, headers=headers, request=REQUEST), body=None)
+
+
+@pytest.mark.parametrize("value, seconds", [("1s", 1), ("6m0s", 360), ("20ms", 0.02), ("2", 2), (None, 0)])
+def test_parse_reset(value, seconds):
+    assert parse_reset(value) == pytest.approx(seconds)
+
+
+def test_bucket_sync_only_lowers_the_level():
+    bucket = TokenBucket(600)
+    bucket.sync("100")
+    assert bucket.level == pytest.approx(100, abs=1)
+    bucket.sync("500")
+    assert bucket.level < 200
+
+
+def test_interactive_calls_go_before_background():
+    async def scenario():
+        limiter = scheduler(rpm=60)
+        # Drain the request bucket so every call below has to queue.
+        limiter.requests.level = 0
+        order = []
+
+        async def call(name, priority):
+            await limiter.acquire(1, priority)
+            order.append(name)
+
+        tasks = [
+            asyncio.create_task(call("summary-1", BACKGROUND)),
+            asyncio.create_task(call("turn-1", INTERACTIVE)),
+            asyncio.create_task(call("summary-2", BACKGROUND)),
+            asyncio.create_task(call("turn-2", INTERACTIVE)),
+        ]
+        await asyncio.sleep(0)
+        limiter.requests.level = 4
+        limiter._kick()
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario()) == ["turn-1", "turn-2", "summary-1", "summary-2"]
+
+
+def test_settle_refunds_unused_estimate_and_strips_headers():
+    async def scenario():
+        limiter = scheduler(tpm=10000)
+        result = AIMessage(content="hi", usage_metadata={"input_tokens": 80, "output_tokens": 20, "total_tokens": 100})
+        result.response_metadata["headers"] = {"x-ratelimit-remaining-tokens": "8000"}
+
+        async def call():
+            return result
+
+        await limiter.run(call, tokens=1000)
+        return limiter, result
+
+    limiter, result = asyncio.run(scenario())
+    assert "headers" not in result.response_metadata
+    # 10000 - 1000 granted, lowered to the provider's 8000, plus the 900 the call did not use.
+    assert limiter.tokens.level == pytest.approx(8900, abs=1)
+
+
+def test_rate_limited_call_is_retried_without_refunding_the_request():
+    async def scenario():
+        limiter = scheduler(rpm=60)
+        attempts = []
+
+        async def call():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise rate_limit_error(**{"retry-after-ms": "1"})
+            return AIMessage(content="ok")
+
+        result = await limiter.run(call, tokens=10)
+        return result, attempts, limiter
+
+    result, attempts, limiter = asyncio.run(scenario())
+    assert result.content == "ok" and len(attempts) == 2
+    # Both attempts were counted against the request budget.
+    assert limiter.requests.level == pytest.approx(58, abs=0.1)
+
+
+def test_connection_error_refunds_the_request():
+    async def scenario():
+        limiter = scheduler(rpm=60, retries=0)
+
+        async def call():
+            raise openai.APIConnectionError(request=REQUEST)
+
+        with pytest.raises(openai.APIConnectionError):
+            await limiter.run(call, tokens=10)
+        return limiter
+
+    assert asyncio.run(scenario()).requests.level == pytest.approx(60, abs=0.1)
+
+
+def test_gives_up_after_max_retries():
+    async def scenario():
+        limiter = scheduler(retries=1)
+        attempts = []
+
+        async def call():
+            attempts.append(1)
+            raise rate_limit_error()
+
+        with pytest.raises(openai.RateLimitError):
+            await limiter.run(call, tokens=10)
+        return attempts
+
+    assert len(asyncio.run(scenario())) == 2
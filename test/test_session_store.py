@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+from services import session_store
+from services.session_store import SessionStore
+
+
+def fake_memory(*contents):
+    messages = [SimpleNamespace(content=c) for c in contents]
+    return SimpleNamespace(moving_summary_buffer="", chat_memory=SimpleNamespace(messages=messages))
+
+
+def test_hit_reuses_memory_and_refreshes_lru_order():
+    store = SessionStore(max_entries=2, max_bytes=10**9, idle_ttl=3600)
+    a = store.get_or_create("a", fake_memory)
+    store.get_or_create("b", fake_memory)
+    assert store.get_or_create("a", fake_memory) is a
+    store.get_or_create("c", fake_memory)
+    assert "a" in store and "c" in store and "b" not in store
+    assert (store.hits, store.misses, store.evictions) == (1, 3, 1)
+
+
+def test_evicts_by_size_but_keeps_the_newest_session():
+    store = SessionStore(max_entries=10, max_bytes=5000, idle_ttl=3600)
+    store.get_or_create("a", fake_memory)
+    store.get_or_create("b", lambda: fake_memory("x" * 10000))
+    assert len(store) == 1 and "b" in store
+
+
+def test_resize_remeasures_and_evicts():
+    store = SessionStore(max_entries=10, max_bytes=6000, idle_ttl=3600)
+    store.get_or_create("a", fake_memory)
+    store.get_or_create("b", fake_memory)
+    # A turn looks its session up (making it most recent), then resizes it.
+    memory = store.get_or_create("a", fake_memory)
+    memory.chat_memory.messages.append(SimpleNamespace(content="x" * 3000))
+    store.resize("a")
+    assert "b" not in store and "a" in store
+
+
+def test_idle_sessions_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(session_store.time, "monotonic", lambda: now[0])
+    store = SessionStore(max_entries=10, max_bytes=10**9, idle_ttl=60)
+    store.get_or_create("a", fake_memory)
+    now[0] += 30
+    store.get_or_create("b", fake_memory)
+    now[0] += 45
+    store.get_or_create("c", fake_memory)
+    assert "a" not in store and "b" in store
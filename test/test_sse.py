@@ -0,0 +1,27 @@
+import json
+from utils.sse import SSEEncoder
+
+
+def parse(frame: bytes):
+    id_line, data_line = frame.decode().rstrip("\n").split("\n")
+    return id_line[len("id: "):], json.loads(data_line[len("data: "):])
+
+
+def test_frames_carry_increasing_ids():
+    encoder = SSEEncoder("thread", seq=7)
+    assert parse(encoder.encode({"type": "content", "content": "a"}))[0] == "thread:8"
+    assert parse(encoder.encode({"type": "end"}))[0] == "thread:9"
+    assert encoder.seq == 9
+
+
+def test_content_fast_path_matches_json_dumps():
+    encoder = SSEEncoder("t")
+    for text in ["plain", 'quo"te', "new\nline", "café ☕", ""]:
+        frame = encoder.encode({"type": "content", "content": text})
+        assert frame.endswith(b"\n\n")
+        assert frame.split(b"\n")[1] == b"data: " + json.dumps({"type": "content", "content": text}).encode()
+
+
+def test_other_events_round_trip():
+    event = {"type": "search_results", "urls": ["https://example.com"], "cached": False}
+    assert parse(SSEEncoder("t").encode(event))[1] == event
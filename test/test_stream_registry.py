@@ -0,0 +1,135 @@
+import asyncio
+import pytest
+from services.stream_registry import StreamRegistry
+
+
+async def events(*items, gate=None):
+    for item in items:
+        if gate is not None:
+            await gate.wait()
+        yield item
+
+
+async def collect(frames):
+    return [frame async for frame in frames]
+
+
+def seqs(frames):
+    return [int(frame.split(b"\n")[0].rpartition(b":")[2]) for frame in frames]
+
+
+def test_resume_replays_missed_frames():
+    async def scenario():
+        registry = StreamRegistry(ttl=60)
+        stream = registry.start("t", events({"type": "content", "content": "a"}, {"type": "content", "content": "b"}, {"type": "end"}))
+        await stream.task
+        return await collect(registry.resume("t:1"))
+
+    assert seqs(asyncio.run(scenario())) == [2, 3]
+
+
+def test_resume_follows_a_running_turn():
+    async def scenario():
+        registry = StreamRegistry(ttl=60)
+        gate = asyncio.Event()
+        registry.start("t", events({"type": "content", "content": "a"}, {"type": "end"}, gate=gate))
+        frames = asyncio.create_task(collect(registry.resume("t:0")))
+        await asyncio.sleep(0)
+        gate.set()
+        return await frames
+
+    assert seqs(asyncio.run(scenario())) == [1, 2]
+
+
+@pytest.mark.parametrize("last_event_id", ["t:2", "gone:1", "t:9", "t:x"])
+def test_nothing_to_resume(last_event_id):
+    async def scenario():
+        registry = StreamRegistry(ttl=60)
+        stream = registry.start("t", events({"type": "content", "content": "a"}, {"type": "end"}))
+        await stream.task
+        return registry.resume(last_event_id)
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_follow_up_turn_continues_seq_without_overrun(caplog):
+    async def scenario():
+        registry = StreamRegistry(ttl=60)
+        first = registry.start("t", events({"type": "content", "content": "a"}, {"type": "end"}))
+        await first.task
+        second = registry.start("t", events({"type": "content", "content": "b"}, {"type": "end"}))
+        return await collect(second.subscribe())
+
+    assert seqs(asyncio.run(scenario())) == [3, 4]
+    assert "overrun" not in caplog.text
+
+
+def test_cancel_ends_the_stream_with_a_cancelled_frame():
+    async def scenario():
+        registry = StreamRegistry(ttl=60)
+        stream = registry.start("t", events({"type": "end"}, gate=asyncio.Event()))
+        frames = asyncio.create_task(collect(stream.subscribe()))
+        await asyncio.sleep(0)
+        assert registry.cancel("t")
+        await asyncio.gather(stream.task, return_exceptions=True)
+        return await frames
+
+    (frame,) = asyncio.run(scenario())
+    assert b'"cancelled"' in frame and b'"requested"' in frame
+
+
+def test_cancel_during_a_tool_call_leaves_the_thread_usable(tmp_path, monkeypatch):
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+    from langchain_core.outputs import ChatGeneration, ChatResult
+    from langchain_core.tools import tool
+    from services import langgraph_engine
+    from services.checkpointer import PersistentSaver, SqliteBackend
+
+    class ScriptedModel(BaseChatModel):
+        replies: list
+        seen: list = []
+
+        @property
+        def _llm_type(self):
+            return "scripted"
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+            self.seen.append(messages)
+            return ChatResult(generations=[ChatGeneration(message=self.replies.pop(0))])
+
+    started = asyncio.Event()
+
+    @tool
+    async def slow_search(query: str) -> str:
+        """Search that never finishes."""
+        started.set()
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(langgraph_engine, "tools_by_name", {"slow_search": slow_search})
+    model = ScriptedModel(replies=[
+        AIMessage(content="", tool_calls=[{"name": "slow_search", "args": {"query": "bakeries"}, "id": "call_1"}]),
+        AIMessage(content="Here is what I know."),
+    ])
+    graph = langgraph_engine.build_graph(model, checkpointer=PersistentSaver(SqliteBackend(str(tmp_path / "c.sqlite"))))
+    config = {"configurable": {"thread_id": "t", "__system_prompt": "system", "__summary": ""}}
+
+    async def turn(message):
+        async for event in graph.astream_events({"messages": [HumanMessage(content=message)]}, version="v2", config=config):
+            yield {"type": "event"}
+
+    async def scenario():
+        registry = StreamRegistry(ttl=60)
+        stream = registry.start("t", turn("Find bakeries"))
+        await asyncio.wait_for(started.wait(), 5)
+        assert registry.cancel("t")
+        await asyncio.gather(stream.task, return_exceptions=True)
+        second = registry.start("t", turn("Just tell me then"))
+        await second.task
+
+    asyncio.run(scenario())
+    sent = model.seen[-1]
+    # Every tool call the model sees is answered, as OpenAI requires.
+    answered = {m.tool_call_id for m in sent if isinstance(m, ToolMessage)}
+    assert all(c["id"] in answered for m in sent if isinstance(m, AIMessage) for c in m.tool_calls)
+    assert sent[-1].content == "Just tell me then"
@@ -0,0 +1,107 @@
+import asyncio
+from services.summary_queue import SummaryQueue
+
+
+def test_jobs_for_a_running_key_coalesce_to_the_newest():
+    async def scenario():
+        queue = SummaryQueue(workers=2, maxsize=10)
+        release = asyncio.Event()
+        ran = []
+
+        async def job(n, wait=False):
+            if wait:
+                await release.wait()
+            ran.append(n)
+
+        await queue.submit("k", lambda: job(1, wait=True))
+        await asyncio.sleep(0)
+        await queue.submit("k", lambda: job(2))
+        await queue.submit("k", lambda: job(3))
+        release.set()
+        await queue.drain(timeout=1)
+        return ran, queue.coalesced
+
+    ran, coalesced = asyncio.run(scenario())
+    assert ran == [1, 3]
+    assert coalesced == 1
+
+
+def test_keys_run_concurrently():
+    async def scenario():
+        queue = SummaryQueue(workers=2, maxsize=10)
+        started = []
+        both = asyncio.Event()
+
+        async def job(key):
+            started.append(key)
+            if len(started) == 2:
+                both.set()
+            await asyncio.wait_for(both.wait(), 1)
+
+        await queue.submit("a", lambda: job("a"))
+        await queue.submit("b", lambda: job("b"))
+        await queue.drain(timeout=2)
+        return started
+
+    assert sorted(asyncio.run(scenario())) == ["a", "b"]
+
+
+def test_failing_job_does_not_stop_the_worker():
+    async def scenario():
+        queue = SummaryQueue(workers=1, maxsize=10)
+        ran = []
+
+        async def boom():
+            raise RuntimeError("boom")
+
+        async def ok():
+            ran.append("ok")
+
+        await queue.submit("a", boom)
+        await queue.submit("b", ok)
+        await queue.drain(timeout=1)
+        return ran
+
+    assert asyncio.run(scenario()) == ["ok"]
+
+
+def test_submit_after_drain_runs_inline():
+    async def scenario():
+        queue = SummaryQueue(workers=1, maxsize=10)
+        await queue.drain(timeout=1)
+        ran = []
+
+        async def job():
+            ran.append(1)
+
+        await queue.submit("k", job)
+        return ran
+
+    assert asyncio.run(scenario()) == [1]
+
+
+def test_a_drained_queue_runs_jobs_in_the_background_again_after_start():
+    queue = SummaryQueue(workers=1, maxsize=10)
+
+    async def first_lifespan():
+        await queue.submit("a", lambda: asyncio.sleep(0))
+        await queue.drain(timeout=1)
+
+    async def second_lifespan():
+        queue.start()
+        release = asyncio.Event()
+        ran = []
+
+        async def job():
+            await release.wait()
+            ran.append("b")
+
+        # Run inline, submit would wait for the job and never return.
+        await asyncio.wait_for(queue.submit("b", job), 1)
+        assert ran == []
+        release.set()
+        await queue.drain(timeout=1)
+        return ran
+
+    asyncio.run(first_lifespan())
+    assert asyncio.run(second_lifespan()) == ["b"]
@@ -0,0 +1,134 @@
+import asyncio
+from services import summary_writer as module
+from services.summary_writer import SummaryWriteBuffer
+
+
+def buffer(**kwargs):
+    options = dict(flush_interval=60, max_pending=100, bulk_path="", retries=0, retry_delay=0, max_attempts=3)
+    options.update(kwargs)
+    return SummaryWriteBuffer(**options)
+
+
+def fake_put(monkeypatch, fail=lambda summary: False):
+    sent = []
+
+    async def put_summary(clerk_id, project_id, chat_type, summary, base_url):
+        sent.append((clerk_id, summary))
+        return not fail(summary)
+
+    monkeypatch.setattr(module, "put_summary", put_summary)
+    return sent
+
+
+def test_only_the_newest_summary_per_key_is_sent(monkeypatch):
+    sent = fake_put(monkeypatch)
+
+    async def scenario():
+        writer = buffer()
+        writer.submit("c", "p", "t", "first")
+        writer.submit("c", "p", "t", "second")
+        writer.submit("other", "p", "t", "third")
+        await writer.close()
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert sorted(sent) == [("c", "second"), ("other", "third")]
+    assert (writer.superseded, writer.written) == (1, 2)
+
+
+def test_failed_summary_is_dropped_after_max_attempts(monkeypatch):
+    sent = fake_put(monkeypatch, fail=lambda summary: True)
+
+    async def scenario():
+        writer = buffer(max_attempts=3)
+        writer.submit("c", "p", "t", "s")
+        for _ in range(5):
+            await writer.flush()
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert len(sent) == 3
+    assert writer.depth() == 0
+    assert writer.dropped == 1
+
+
+def test_newer_summary_resets_attempts(monkeypatch):
+    sent = fake_put(monkeypatch, fail=lambda summary: summary == "old")
+
+    async def scenario():
+        writer = buffer(max_attempts=2)
+        writer.submit("c", "p", "t", "old")
+        await writer.flush()
+        writer.submit("c", "p", "t", "new")
+        await writer.flush()
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert sent == [("c", "old"), ("c", "new")]
+    assert (writer.written, writer.dropped, writer.depth()) == (1, 0, 0)
+
+
+def test_bulk_falls_back_to_single_puts_when_missing(monkeypatch):
+    sent = fake_put(monkeypatch)
+    bulk_calls = []
+
+    async def put_summaries_bulk(url, items):
+        bulk_calls.append(url)
+        return 404
+
+    monkeypatch.setattr(module, "put_summaries_bulk", put_summaries_bulk)
+
+    async def scenario():
+        writer = buffer(bulk_path="bulk")
+        writer.submit("c", "p", "t", "s", base_url="http://backend")
+        await writer.flush()
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert bulk_calls == ["http://backend/bulk"]
+    assert sent == [("c", "s")]
+    assert writer.bulk_path == ""
+
+
+def test_bulk_fallback_applies_to_the_rest_of_the_flush(monkeypatch):
+    sent = fake_put(monkeypatch)
+    bulk_calls = []
+
+    async def put_summaries_bulk(url, items):
+        bulk_calls.append(url)
+        return 404
+
+    monkeypatch.setattr(module, "put_summaries_bulk", put_summaries_bulk)
+    monkeypatch.setattr(module, "SUMMARY_BULK_MAX_ITEMS", 1)
+
+    async def scenario():
+        writer = buffer(bulk_path="bulk")
+        for clerk_id in ("a", "b", "c"):
+            writer.submit(clerk_id, "p", "t", "s", base_url="http://backend")
+        writer.submit("d", "p", "t", "s", base_url="http://other")
+        await writer.flush()
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert len(bulk_calls) == 1
+    assert sorted(sent) == [("a", "s"), ("b", "s"), ("c", "s"), ("d", "s")]
+    assert writer.written == 4
+
+
+def test_interval_flush_runs_in_a_second_lifespan(monkeypatch):
+    sent = fake_put(monkeypatch)
+    writer = buffer(flush_interval=0.01)
+
+    async def lifespan(summary):
+        writer.start()
+        writer.submit("c", "p", "t", summary)
+        for _ in range(100):
+            if ("c", summary) in sent:
+                break
+            await asyncio.sleep(0.01)
+        # Flushed by the background task, not by close().
+        assert ("c", summary) in sent
+        await writer.close()
+
+    asyncio.run(lifespan("first"))
+    asyncio.run(lifespan("second"))
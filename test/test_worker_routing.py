@@ -0,0 +1,108 @@
+import asyncio
+import httpx
+import pytest
+from services import worker_routing
+from services.worker_routing import worker_ids, rank, owner, checkpoint_of, mint_checkpoint_id, MOVED_HEADER
+
+KEYS = [f"thread-{i}" for i in range(2000)]
+
+
+def test_rank_is_stable_and_led_by_the_owner():
+    workers = worker_ids(4)
+    for key in KEYS[:50]:
+        ranked = rank(key, workers)
+        assert sorted(ranked) == workers
+        assert ranked[0] == owner(key, workers)
+        assert rank(key, list(reversed(workers))) == ranked
+
+
+def test_removing_a_worker_moves_only_its_keys_to_their_next_choice():
+    workers = worker_ids(4)
+    survivors = [w for w in workers if w != "w2"]
+    for key in KEYS:
+        before = rank(key, workers)
+        if before[0] != "w2":
+            assert owner(key, survivors) == before[0]
+        else:
+            assert owner(key, survivors) == before[1]
+
+
+def test_keys_spread_across_workers():
+    counts = {w: 0 for w in worker_ids(4)}
+    for key in KEYS:
+        counts[owner(key, counts)] += 1
+    assert all(350 < n < 650 for n in counts.values())
+
+
+def test_checkpoint_of_strips_the_sequence_number():
+    assert checkpoint_of("4f1c-ab:12") == "4f1c-ab"
+    assert checkpoint_of("no-sequence") == ""
+
+
+def test_mint_checkpoint_id_is_owned_by_this_worker(monkeypatch):
+    monkeypatch.setattr(worker_routing, "WORKER_ID", "w1")
+    monkeypatch.setattr(worker_routing, "WORKER_COUNT", 3)
+    for _ in range(20):
+        assert owner(mint_checkpoint_id(), worker_ids(3)) == "w1"
+
+
+def test_mint_checkpoint_id_without_dispatcher(monkeypatch):
+    monkeypatch.setattr(worker_routing, "WORKER_ID", "")
+    assert mint_checkpoint_id() != mint_checkpoint_id()
+
+
+@pytest.fixture
+def dispatcher():
+    dispatcher_module = pytest.importorskip("dispatcher")
+    seen = []
+
+    def handler(request):
+        seen.append((request.url.port, request.headers.get(MOVED_HEADER)))
+        return httpx.Response(200, stream=httpx.ByteStream(b"data: {}\n\n"))
+
+    dispatcher = dispatcher_module.Dispatcher(["true"], 3, 9000)
+    dispatcher.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    for worker in dispatcher.workers.values():
+        worker.up = True
+    return dispatcher, dispatcher_module.create_app(dispatcher), seen
+
+
+def send(app, **kwargs):
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.get("/chat_stream", **kwargs)
+
+    return asyncio.run(scenario())
+
+
+def test_failback_tells_the_owner_its_state_is_stale(dispatcher):
+    dispatcher, app, seen = dispatcher
+    key = KEYS[0]
+    ranked = [dispatcher.workers[w] for w in rank(key, dispatcher.workers)]
+    home, fallback = ranked[0], ranked[1]
+
+    send(app, params={"checkpoint_id": key})
+    home.up = False
+    send(app, params={"checkpoint_id": key})
+    send(app, params={"checkpoint_id": key})
+    home.up = True
+    # A reconnect replays the fallback's stream and does not count as a turn.
+    send(app, params={"checkpoint_id": key}, headers={"Last-Event-ID": f"{key}:3"})
+    send(app, params={"checkpoint_id": key})
+    send(app, params={"checkpoint_id": key})
+
+    assert seen == [
+        (home.port, None),
+        (fallback.port, "1"),
+        (fallback.port, None),
+        (home.port, None),
+        (home.port, "1"),
+        (home.port, None),
+    ]
+    assert dispatcher._served_by == {}
+
+
+def test_moved_header_from_clients_is_not_forwarded(dispatcher):
+    dispatcher, app, seen = dispatcher
+    send(app, params={"checkpoint_id": KEYS[1]}, headers={MOVED_HEADER: "1"})
+    assert seen[0][1] is None
@@ -1,5 +1,98 @@
+import asyncio
+import re
+from typing import Dict, List, Optional
 from langchain_community.tools.tavily_search import TavilySearchResults
+from langchain_community.utilities.tavily_search import TavilySearchAPIWrapper, TAVILY_API_URL
+from langchain_core.callbacks import AsyncCallbackManagerForToolRun
+from langchain_core.callbacks.manager import adispatch_custom_event
+from config.settings import SEARCH_CACHE_TTL, SEARCH_CACHE_SIZE, SEARCH_CACHE_PATH, SEARCH_CACHE_MAX_ROWS, SEARCH_CACHE_PURGE_EVERY
+from utils.cache import TTLCache, SingleFlight, DiskCache
+from utils.metrics import registry, cache_collector
+from utils.http_pools import http_pools
 
+search_cache = TTLCache(SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL)
+search_disk_cache = DiskCache(SEARCH_CACHE_PATH, SEARCH_CACHE_MAX_ROWS, SEARCH_CACHE_PURGE_EVERY) if SEARCH_CACHE_PATH else None
+search_flight = SingleFlight()
+registry.collect(cache_collector("search_cache", "search", search_cache, search_flight))
 
-search_tool = TavilySearchResults(max_results=4)
-tools = [search_tool]
\ No newline at end of file
+
+def normalize_query(query: str) -> str:
+    query = re.sub(r"[^\w\s]", " ", query.lower())
+    return " ".join(query.split())
+
+
+class PooledTavilySearchAPIWrapper(TavilySearchAPIWrapper):
+    """Posts searches through the shared "tavily" pool instead of a new aiohttp session (and TLS handshake) per call."""
+
+    async def raw_results_async(
+        self,
+        query: str,
+        max_results: Optional[int] = 5,
+        search_depth: Optional[str] = "advanced",
+        include_domains: Optional[List[str]] = None,
+        exclude_domains: Optional[List[str]] = None,
+        include_answer: Optional[bool] = False,
+        include_raw_content: Optional[bool] = False,
+        include_images: Optional[bool] = False,
+    ) -> Dict:
+        params = {
+            "api_key": self.tavily_api_key.get_secret_value(),
+            "query": query,
+            "max_results": max_results,
+            "search_depth": search_depth,
+            "include_domains": include_domains or [],
+            "exclude_domains": exclude_domains or [],
+            "include_answer": include_answer,
+            "include_raw_content": include_raw_content,
+            "include_images": include_images,
+        }
+        res = await http_pools.get("tavily").post(f"{TAVILY_API_URL}/search", json=params)
+        if res.status_code != 200:
+            raise Exception(f"Error {res.status_code}: {res.reason_phrase}")
+        return res.json()
+
+
+class CachedTavilySearchResults(TavilySearchResults):
+    """Tavily search with a normalized-query cache in front of the API.
+
+    Each search dispatches a `search_cache` custom event with `cached` set, so the
+    stream can report whether the results were served from cache.
+    """
+
+    def _cache_key(self, query: str) -> str:
+        return f"{self.max_results}|{self.search_depth}|{','.join(self.include_domains)}|{','.join(self.exclude_domains)}|{normalize_query(query)}"
+
+    async def _arun(self, query: str, run_manager: Optional[AsyncCallbackManagerForToolRun] = None):
+        key = self._cache_key(query)
+        result = search_cache.get(key)
+        cached = result is not None
+        if not cached:
+            (result, from_disk), shared = await search_flight.do(key, lambda: self._lookup(key, query, run_manager))
+            cached = from_disk or shared
+        try:
+            await adispatch_custom_event("search_cache", {"query": query, "cached": cached})
+        except RuntimeError:
+            pass
+        return result
+
+    async def _lookup(self, key, query, run_manager):
+        if search_disk_cache is not None:
+            stored = await asyncio.to_thread(search_disk_cache.get, key)
+            if stored is not None:
+                value, ttl = stored
+                result = (value[0], value[1])
+                search_cache.set(key, result, ttl)
+                return result, True
+
+        result = await super()._arun(query, run_manager)
+        content, raw_results = result
+        # Errors come back as (repr(e), {}) and must not be cached.
+        if isinstance(content, list) and raw_results:
+            search_cache.set(key, result)
+            if search_disk_cache is not None:
+                await asyncio.to_thread(search_disk_cache.set, key, [content, raw_results], SEARCH_CACHE_TTL)
+        return result, False
+
+
+search_tool = CachedTavilySearchResults(max_results=4, api_wrapper=PooledTavilySearchAPIWrapper())
+tools = [search_tool]
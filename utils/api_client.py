@@ -1,21 +1,94 @@
-import requests
-from config.settings import MONGO_API_BASE
+import asyncio
+import httpx
+from config.settings import (
+    MONGO_API_BASE,
+    BACKEND_CONNECT_TIMEOUT,
+    BACKEND_MAX_CONCURRENCY,
+    SUMMARY_CACHE_SIZE,
+    SUMMARY_CACHE_TTL,
+)
+from utils.cache import TTLCache, SingleFlight
+from utils.metrics import registry, cache_collector
+from utils.http_pools import http_pools
 
-def fetch_summary(clerk_id, project_id, chat_type):
-    url = f"{MONGO_API_BASE}/{clerk_id}/{project_id}/{chat_type}"
+_semaphore = asyncio.Semaphore(BACKEND_MAX_CONCURRENCY)
+
+# Read-through summary cache keyed by (clerk_id, project_id, chat_type). Our own
+# writes update it, and the write sequence keeps a GET that started before a
+# write from putting the older summary back.
+summary_cache = TTLCache(SUMMARY_CACHE_SIZE, SUMMARY_CACHE_TTL)
+summary_flight = SingleFlight()
+_last_write = TTLCache(SUMMARY_CACHE_SIZE, SUMMARY_CACHE_TTL)
+_write_seq = 0
+registry.collect(cache_collector("summary_cache", "summary", summary_cache, summary_flight))
+
+
+def get_client() -> httpx.AsyncClient:
+    # Pooled keep-alive client, managed with the OpenAI and Tavily pools in utils.http_pools.
+    return http_pools.get("backend")
+
+
+def _timeout(timeout):
+    # A per-call timeout overrides read/write/pool only; connects keep the pool's shorter limit.
+    if timeout is None:
+        return httpx.USE_CLIENT_DEFAULT
+    return httpx.Timeout(timeout, connect=min(timeout, BACKEND_CONNECT_TIMEOUT))
+
+
+async def _get_summary(url, timeout):
     try:
-        res = requests.get(url)
+        async with _semaphore:
+            res = await get_client().get(url, timeout=_timeout(timeout))
         if res.status_code == 200:
-            return res.json().get("content","")
-    except:
+            return res.json().get("content", "")
+        if res.status_code == 404:
+            return ""
+    except Exception:
+        pass
+    return None
+
+
+async def fetch_summary(clerk_id, project_id, chat_type, base_url=MONGO_API_BASE, timeout=None):
+    key = (clerk_id, project_id, chat_type)
+    summary = summary_cache.get(key)
+    if summary is not None:
+        return summary
+
+    started = _write_seq
+    url = f"{base_url}/{clerk_id}/{project_id}/{chat_type}"
+    summary, _ = await summary_flight.do(key, lambda: _get_summary(url, timeout))
+    if summary is None:
         return ""
+    if _last_write.get(key, 0) <= started:
+        summary_cache.set(key, summary)
+    return summary
 
 
-def save_summary(clerk_id, project_id, chat_type, summary):
-    url = f"{MONGO_API_BASE}/save-type-summary/{clerk_id}/{project_id}/{chat_type}"
+def remember_summary(clerk_id, project_id, chat_type, summary):
+    """Make a summary we are about to write visible to fetch_summary right away."""
+    global _write_seq
+    key = (clerk_id, project_id, chat_type)
+    _write_seq += 1
+    _last_write.set(key, _write_seq)
+    summary_cache.set(key, summary)
 
+
+async def put_summary(clerk_id, project_id, chat_type, summary, base_url=MONGO_API_BASE, timeout=None):
+    url = f"{base_url}/save-type-summary/{clerk_id}/{project_id}/{chat_type}"
     try:
-        requests.put(url, json={"content":summary})
-    except:
-        pass    
-    
\ No newline at end of file
+        async with _semaphore:
+            res = await get_client().put(url, json={"content": summary}, timeout=_timeout(timeout))
+        return res.status_code < 400
+    except Exception:
+        return False
+
+
+async def put_summaries_bulk(url, items, timeout=None):
+    """POST many summaries at once. Returns the status code, or None on a transport error."""
+    try:
+        async with _semaphore:
+            res = await get_client().post(url, json={"summaries": items}, timeout=_timeout(timeout))
+        return res.status_code
+    except Exception:
+        return None
+
@@ -0,0 +1,103 @@
+import httpx
+from config.settings import (
+    HTTP2,
+    OPENAI_HTTP_MAX_CONNECTIONS,
+    OPENAI_HTTP_KEEPALIVE_EXPIRY,
+    OPENAI_HTTP_CONNECT_TIMEOUT,
+    OPENAI_HTTP_READ_TIMEOUT,
+    TAVILY_HTTP_MAX_CONNECTIONS,
+    TAVILY_HTTP_KEEPALIVE_EXPIRY,
+    TAVILY_HTTP_CONNECT_TIMEOUT,
+    TAVILY_HTTP_READ_TIMEOUT,
+    BACKEND_TIMEOUT,
+    BACKEND_CONNECT_TIMEOUT,
+    BACKEND_MAX_CONNECTIONS,
+    BACKEND_KEEPALIVE_EXPIRY,
+)
+from utils.metrics import registry
+
+try:
+    import h2  # noqa: F401
+except ImportError:
+    h2 = None
+
+if HTTP2 == "on" and h2 is None:
+    raise ImportError("HTTP2=on but h2 is not installed (pip install httpx[http2])")
+
+_use_http2 = h2 is not None and HTTP2 in ("auto", "on")
+
+
+class HttpPools:
+    """One pooled httpx.AsyncClient per upstream, shared by everything that calls it.
+
+    The OpenAI client is handed to both chat models, the Tavily client to the
+    search tool and the backend client to utils.api_client, so a burst reuses
+    warm keep-alive connections instead of opening new ones.
+
+    Clients looked up per call are closed by aclose() and rebuilt on the next
+    get(). A client stored by something built at import time (the chat models)
+    is taken with keep_open=True: aclose() leaves it alone, so a later lifespan
+    in the same process does not send requests on a closed client.
+    """
+
+    def __init__(self):
+        self._specs = {}
+        self._clients = {}
+        self._kept = set()
+
+    def register(self, name: str, max_connections: int, keepalive_expiry: float, connect_timeout: float, read_timeout: float):
+        self._specs[name] = (max_connections, keepalive_expiry, connect_timeout, read_timeout)
+
+    def get(self, name: str, keep_open: bool = False) -> httpx.AsyncClient:
+        if keep_open:
+            self._kept.add(name)
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            max_connections, keepalive_expiry, connect_timeout, read_timeout = self._specs[name]
+            client = httpx.AsyncClient(
+                http2=_use_http2,
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections,
+                    keepalive_expiry=keepalive_expiry,
+                ),
+            )
+            self._clients[name] = client
+        return client
+
+    async def aclose(self):
+        for name in [name for name in self._clients if name not in self._kept]:
+            await self._clients.pop(name).aclose()
+
+    def _occupancy(self, client):
+        # httpcore internals; report zeros rather than fail the scrape if they change.
+        pool = getattr(getattr(client, "_transport", None), "_pool", None)
+        connections = getattr(pool, "connections", None)
+        if connections is None:
+            return 0, 0, 0
+        try:
+            idle = sum(1 for c in connections if c.is_idle())
+            queued = sum(1 for r in list(getattr(pool, "_requests", ())) if r.is_queued())
+        except AttributeError:
+            return 0, 0, 0
+        return len(connections) - idle, idle, queued
+
+    def collect(self):
+        rows = []
+        for name, client in self._clients.items():
+            active, idle, queued = self._occupancy(client)
+            rows += [
+                (f"http_pool_{name}_connections_active", "gauge", f"Open {name} connections serving a request.", active),
+                (f"http_pool_{name}_connections_idle", "gauge", f"Open {name} connections kept alive for reuse.", idle),
+                (f"http_pool_{name}_requests_queued", "gauge", f"{name} requests waiting for a free connection.", queued),
+                (f"http_pool_{name}_max_connections", "gauge", f"Connection limit of the {name} pool.", self._specs[name][0]),
+            ]
+        return rows
+
+
+http_pools = HttpPools()
+http_pools.register("openai", OPENAI_HTTP_MAX_CONNECTIONS, OPENAI_HTTP_KEEPALIVE_EXPIRY, OPENAI_HTTP_CONNECT_TIMEOUT, OPENAI_HTTP_READ_TIMEOUT)
+http_pools.register("tavily", TAVILY_HTTP_MAX_CONNECTIONS, TAVILY_HTTP_KEEPALIVE_EXPIRY, TAVILY_HTTP_CONNECT_TIMEOUT, TAVILY_HTTP_READ_TIMEOUT)
+http_pools.register("backend", BACKEND_MAX_CONNECTIONS, BACKEND_KEEPALIVE_EXPIRY, BACKEND_CONNECT_TIMEOUT, BACKEND_TIMEOUT)
+registry.collect(http_pools.collect)
@@ -0,0 +1,133 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from config.settings import LOG_LEVEL, LOG_FORMAT, LOG_QUEUE_SIZE, LOG_SAMPLE_RATES
+from utils.metrics import registry
+
+_listener = None
+_handler = None
+
+
+def kv(sample: str = None, **fields) -> dict:
+    """`extra=` for a log call: structured fields plus an optional sampling key.
+
+    log.debug("stream event", extra=kv("stream_event", event=event_type))
+    """
+    return {"fields": fields, "sample": sample}
+
+
+def _parse_rates(spec: str) -> dict:
+    rates = {}
+    for part in spec.split(","):
+        if "=" in part:
+            key, rate = part.split("=", 1)
+            rates[key.strip()] = float(rate)
+    return rates
+
+
+class SampleFilter(logging.Filter):
+    """Keeps only `rate` of the records logged with a sampling key (kv(sample=...))."""
+
+    def __init__(self, rates: dict):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        key = getattr(record, "sample", None)
+        if key is None or key not in self.rates:
+            return True
+        return random.random() < self.rates[key]
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full."""
+
+    dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def setup_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT):
+    """Route the app's loggers through a bounded queue drained by a background thread.
+
+    Log calls only format and enqueue the record, so writing to stdout never
+    blocks the event loop that streams tokens.
+    """
+    global _listener, _handler
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    if fmt == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(TextFormatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    _handler = DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    _handler.addFilter(SampleFilter(_parse_rates(LOG_SAMPLE_RATES)))
+
+    root = logging.getLogger("chat")
+    root.setLevel(level.upper())
+    root.addHandler(_handler)
+    root.propagate = False
+
+    _listener = logging.handlers.QueueListener(_handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener, _handler
+    if _listener is not None:
+        _listener.stop()
+        logging.getLogger("chat").removeHandler(_handler)
+        _listener = None
+        _handler = None
+
+
+def collect():
+    depth = _handler.queue.qsize() if _handler is not None else 0
+    return [
+        ("log_queue_depth", "gauge", "Log records waiting for the writer thread.", depth),
+        ("log_records_dropped_total", "counter", "Log records dropped because the queue was full.", DroppingQueueHandler.dropped),
+    ]
+
+
+registry.collect(collect)
+
+
+def get_logger(name: str) -> logging.Logger:
+    setup_logging()
+    return logging.getLogger(f"chat.{name}")
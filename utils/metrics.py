@@ -0,0 +1,297 @@
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+
+# Seconds; covers a cached summary read up to a slow multi-tool turn.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+TOKEN_BUCKETS = (256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+RATIO_BUCKETS = (0, 0.1, 0.25, 0.5, 0.75, 0.9, 1)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        for key, value in self._values.items():
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        self._values[tuple(labels.get(n, "") for n in self.labelnames)] = value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) + (float("inf"),)
+        self._values = {}
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                entry[0][i] += 1
+                break
+        entry[1] += value
+        entry[2] += 1
+
+    def samples(self):
+        for key, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                yield f"{self.name}_bucket", _format_labels(self.labelnames, key, [("le", _format_value(bound))]), cumulative
+            yield f"{self.name}_sum", _format_labels(self.labelnames, key), total
+            yield f"{self.name}_count", _format_labels(self.labelnames, key), count
+
+
+class Registry:
+    """Process-wide metrics rendered in the Prometheus text format.
+
+    Besides the metrics created here, collectors registered with `collect` are
+    called on every scrape to export counters that live on other objects
+    (session store, queues, caches). A collector returns a list of
+    (name, kind, help, value) tuples.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+
+    def _add(self, metric):
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=()):
+        return self._add(Gauge(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def collect(self, collector):
+        self._collectors.append(collector)
+        return collector
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        for collector in self._collectors:
+            try:
+                rows = collector()
+            except Exception as e:
+                logging.getLogger("chat.metrics").warning("⚠️ Metrics collector failed: %s", e)
+                continue
+            for name, kind, help, value in rows:
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+stage_seconds = registry.histogram(
+    "chat_stage_seconds",
+    "Duration of each stage of a chat turn.",
+    ("stage",),
+)
+tool_call_seconds = registry.histogram(
+    "chat_tool_call_seconds",
+    "Duration of each tool call made by the model.",
+    ("tool",),
+)
+turns_total = registry.counter("chat_turns_total", "Chat turns streamed, by outcome.", ("outcome",))
+llm_tokens = registry.counter("chat_llm_tokens_total", "Chat model tokens, by kind (input, cached_input, output).", ("kind",))
+turn_input_tokens = registry.histogram(
+    "chat_turn_input_tokens",
+    "Input tokens sent to the chat model over one turn.",
+    buckets=TOKEN_BUCKETS,
+)
+turn_cache_ratio = registry.histogram(
+    "chat_turn_prompt_cache_ratio",
+    "Share of a turn's input tokens served from OpenAI's prompt cache.",
+    buckets=RATIO_BUCKETS,
+)
+loop_lag_seconds = registry.histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop woke up a periodic probe.",
+    buckets=LAG_BUCKETS,
+)
+
+
+@contextmanager
+def timed(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_seconds.observe(time.perf_counter() - start, stage=stage)
+
+
+class TurnTimer:
+    """Timing spans for one chat turn.
+
+    `span` times a block, `mark` records the time since the turn started
+    (first token, graph start). Every span also feeds `chat_stage_seconds`.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = []
+        self._open = {}
+        self.input_tokens = 0
+        self.cached_tokens = 0
+        self.output_tokens = 0
+
+    def _record(self, stage, seconds):
+        self.spans.append((stage, seconds))
+        stage_seconds.observe(seconds, stage=stage)
+
+    @contextmanager
+    def span(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(stage, time.perf_counter() - start)
+
+    def mark(self, stage: str):
+        self._record(stage, time.perf_counter() - self.started)
+
+    def start(self, key, stage: str):
+        """Open a span that ends in a later event (model and tool runs)."""
+        self._open[key] = (stage, time.perf_counter())
+
+    def end(self, key):
+        opened = self._open.pop(key, None)
+        if opened is None:
+            return None
+        stage, start = opened
+        seconds = time.perf_counter() - start
+        self._record(stage, seconds)
+        return seconds
+
+    def usage(self, usage_metadata):
+        """Add one model call's usage_metadata (needs stream_usage=True when streaming)."""
+        if not usage_metadata:
+            return
+        self.input_tokens += usage_metadata.get("input_tokens", 0)
+        self.output_tokens += usage_metadata.get("output_tokens", 0)
+        self.cached_tokens += (usage_metadata.get("input_token_details") or {}).get("cache_read") or 0
+
+    def finish(self, outcome: str = "ok"):
+        self.mark("turn")
+        turns_total.inc(outcome=outcome)
+        if self.input_tokens:
+            llm_tokens.inc(self.input_tokens, kind="input")
+            llm_tokens.inc(self.cached_tokens, kind="cached_input")
+            llm_tokens.inc(self.output_tokens, kind="output")
+            turn_input_tokens.observe(self.input_tokens)
+            turn_cache_ratio.observe(self.cached_tokens / self.input_tokens)
+        return self.summary()
+
+    def summary(self) -> str:
+        return " ".join(f"{stage}={seconds * 1000:.0f}ms" for stage, seconds in self.spans)
+
+    def tokens(self) -> str:
+        return f"in={self.input_tokens} cached={self.cached_tokens} out={self.output_tokens}"
+
+
+class LoopLagMonitor:
+    """Samples event-loop lag every `interval` seconds into `event_loop_lag_seconds`."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.max_lag = 0.0
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - start - self.interval)
+            loop_lag_seconds.observe(lag)
+            self.max_lag = max(self.max_lag, lag)
+
+    def collect(self):
+        # Reset on every scrape so the gauge shows the worst stall since the previous one.
+        max_lag, self.max_lag = self.max_lag, 0.0
+        return [("event_loop_lag_max_seconds", "gauge", "Worst event-loop lag since the last scrape.", max_lag)]
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+def cache_collector(prefix: str, what: str, cache, flight=None):
+    """Collector for a TTLCache (and the SingleFlight in front of it)."""
+    def collect():
+        rows = [
+            (f"{prefix}_entries", "gauge", f"Entries in the {what} cache.", len(cache)),
+            (f"{prefix}_hits_total", "counter", f"{what.capitalize()} cache hits.", cache.hits),
+            (f"{prefix}_misses_total", "counter", f"{what.capitalize()} cache misses.", cache.misses),
+        ]
+        if flight is not None:
+            rows.append((f"{prefix}_shared_total", "counter", f"{what.capitalize()} lookups that joined an in-flight call.", flight.shared))
+        return rows
+    return collect
+
+
+def render_metrics() -> str:
+    return registry.render()
@@ -0,0 +1,43 @@
+import json
+from json.encoder import encode_basestring_ascii
+from config.settings import SSE_JSON_BACKEND
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if SSE_JSON_BACKEND == "orjson" and orjson is None:
+    raise ImportError("SSE_JSON_BACKEND=orjson but orjson is not installed")
+
+_use_orjson = orjson is not None and SSE_JSON_BACKEND in ("auto", "orjson")
+
+# Content frames only differ in the token text, so everything around it is
+# encoded once. The layout matches json.dumps({"type": "content", "content": ...}).
+_CONTENT_PREFIX = b'data: {"type": "content", "content": '
+_FRAME_END = b"}\n\n"
+
+
+def dumps(event: dict) -> bytes:
+    if _use_orjson:
+        return orjson.dumps(event)
+    return json.dumps(event).encode()
+
+
+class SSEEncoder:
+    """Encodes one stream's events, tagging each frame with `id: {stream_id}:{seq}`.
+
+    Clients send the last id back as Last-Event-ID when they reconnect.
+    """
+
+    def __init__(self, stream_id: str, seq: int = 0):
+        self.stream_id = stream_id
+        self.seq = seq
+        self._id_prefix = b"id: " + stream_id.encode() + b":"
+
+    def encode(self, event: dict) -> bytes:
+        self.seq += 1
+        head = self._id_prefix + str(self.seq).encode()
+        if event.get("type") == "content" and len(event) == 2:
+            return head + b"\n" + _CONTENT_PREFIX + encode_basestring_ascii(event["content"]).encode() + _FRAME_END
+        return head + b"\ndata: " + dumps(event) + b"\n\n"
@@ -0,0 +1,24 @@
+import time
+from contextlib import contextmanager
+from utils.metrics import registry
+
+startup_seconds = registry.gauge("startup_phase_seconds", "Time spent in each cold-start phase (imports, graph build, warm-up steps).", ("phase",))
+
+# Phase name -> seconds, in the order the phases ran.
+phases = {}
+
+
+@contextmanager
+def phase(name: str):
+    """Time one cold-start phase; shows up in the warm-up log line and /metrics."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        phases[name] = phases.get(name, 0.0) + seconds
+        startup_seconds.set(phases[name], phase=name)
+
+
+def breakdown() -> dict:
+    return {name: f"{seconds * 1000:.0f}ms" for name, seconds in phases.items()}
@@ -0,0 +1,61 @@
+from collections import OrderedDict
+import tiktoken
+from config.settings import TOKENIZER_MODEL, TOKEN_COUNT_CACHE_SIZE
+from utils.logger import get_logger
+
+log = get_logger("tokens")
+
+# Per-message framing overhead used by OpenAI chat models.
+_TOKENS_PER_MESSAGE = 3
+_TOKENS_PER_REPLY = 3
+# Fallback ratio when no tiktoken encoding can be loaded (e.g. offline).
+_CHARS_PER_TOKEN = 4
+
+_encodings = {}
+# (model, message id) -> (content, tokens). Checkpointed messages keep their id
+# across turns, so the stored history is tokenized once rather than on every call.
+_message_tokens = OrderedDict()
+
+
+def get_encoding(model: str = TOKENIZER_MODEL):
+    if model not in _encodings:
+        try:
+            try:
+                _encodings[model] = tiktoken.encoding_for_model(model)
+            except KeyError:
+                _encodings[model] = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            log.warning("⚠️ Could not load tiktoken encoding, estimating tokens: %s", e)
+            _encodings[model] = None
+    return _encodings[model]
+
+
+def count_tokens(text: str, model: str = TOKENIZER_MODEL) -> int:
+    encoding = get_encoding(model)
+    if encoding is None:
+        return len(text) // _CHARS_PER_TOKEN + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(message, model: str = TOKENIZER_MODEL) -> int:
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    key = (model, message.id) if getattr(message, "id", None) else None
+    if key is not None:
+        cached = _message_tokens.get(key)
+        # Same id with new content (a replaced message) is counted again.
+        if cached is not None and cached[0] == content:
+            _message_tokens.move_to_end(key)
+            return cached[1]
+    tokens = _TOKENS_PER_MESSAGE + count_tokens(content, model)
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        tokens += count_tokens(str(tool_calls), model)
+    if key is not None:
+        _message_tokens[key] = (content, tokens)
+        if len(_message_tokens) > TOKEN_COUNT_CACHE_SIZE:
+            _message_tokens.popitem(last=False)
+    return tokens
+
+
+def count_messages_tokens(messages, model: str = TOKENIZER_MODEL) -> int:
+    return sum(count_message_tokens(m, model) for m in messages) + _TOKENS_PER_REPLY